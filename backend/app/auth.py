@@ -118,6 +118,22 @@ async def get_current_user(
     return user
 
 
+async def get_admin_user(current_user: models.User = Depends(get_current_user)) -> models.User:
+    """Dependency for admin-only routes: the current user, if listed in ADMIN_EMAILS"""
+    if current_user.email.lower() not in {email.lower() for email in settings.ADMIN_EMAILS}:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+def require_jobs_api() -> None:
+    """Dependency that hides the job endpoints unless JOBS_API_ENABLED is set"""
+    if not settings.JOBS_API_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
 def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
     """
     Authenticate user with email and password
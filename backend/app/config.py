@@ -18,9 +18,98 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     CORS_ORIGINS: str = "http://localhost:3000"
     
+    # Admin: emails allowed to run maintenance jobs (see JOBS_API_ENABLED)
+    ADMIN_EMAILS: List[str] = []
+    
     # Game Logic
     XP_PER_LEVEL_BASE: int = 100
     LEVEL_EXPONENT: float = 0.5
+    # Level curve: "power" (floor((xp / base) ^ LEVEL_EXPONENT) + 1, square
+    # root by default), "exponential" (each level costs LEVEL_GROWTH_RATE
+    # times the last) or "table" (LEVEL_XP_TABLE: total XP for level 2, 3, ...)
+    LEVEL_CURVE: str = "power"
+    LEVEL_GROWTH_RATE: float = 1.1
+    LEVEL_XP_TABLE: List[int] = []
+    MAX_LEVEL: int = 100_000  # Safety cap only: the default curve hits the int32 XP limit first
+    
+    # Quest selection (0 disables the per-run cap)
+    DAILY_RUN_MAX_QUESTS: int = 20
+    QUEST_RECENCY_DAYS: int = 3
+    QUEST_RECENT_COMPLETION_WEIGHT: float = 0.5
+    
+    # Store new runs' completions as bitset columns on daily_runs
+    COMPACT_RUN_STORAGE: bool = False
+    
+    # Monthly partitions of daily_runs / daily_quest_completions
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_RETAIN_MONTHS: int = 0  # 0 = never detach old months
+    PARTITION_MAINTENANCE_ON_STARTUP: bool = True
+    
+    # Runs older than this are compacted into user_monthly_summaries
+    HISTORY_COMPACTION_HORIZON_DAYS: int = 180
+    HISTORY_COMPACTION_BATCH_SIZE: int = 5000
+    
+    # All-time leaderboard: "database" polls users.updated_at so every
+    # worker sees other workers' XP changes; "local" is single-worker only
+    LEADERBOARD_BACKEND: str = "database"
+    LEADERBOARD_BUCKET_XP: int = 100
+    LEADERBOARD_MAX_BUCKETS: int = 65536  # XP past the last bucket shares it
+    LEADERBOARD_SYNC_SECONDS: float = 5.0
+    
+    # Real-time events: "postgres" relays through LISTEN/NOTIFY so a stream
+    # on any worker sees every worker's events; "local" is single-worker only
+    EVENT_BROKER_BACKEND: str = "postgres"
+    EVENT_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    EVENT_STREAM_QUEUE_SIZE: int = 100
+    
+    # Transactional outbox: side effects of user actions run in a worker
+    OUTBOX_WORKER_ENABLED: bool = True  # Drain the outbox in each API process
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_LEASE_SECONDS: int = 60
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: int = 5
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    OUTBOX_RETENTION_DAYS: int = 7
+    
+    # Background jobs: cron expressions in server local time ("" disables one)
+    JOB_SCHEDULER_ENABLED: bool = True
+    JOBS_API_ENABLED: bool = False  # /jobs and /decay/run-all, for ADMIN_EMAILS only
+    JOB_SCHEDULE_XP_DECAY: str = "0 * * * *"  # Once per decay slot
+    JOB_SCHEDULE_STREAK_RESET: str = "10 0 * * *"
+    JOB_SCHEDULE_WEEKLY_UNLOCK: str = "30 0 * * *"
+    JOB_SCHEDULE_LEADERBOARD_FREEZE: str = "5 0 * * *"
+    JOB_SCHEDULE_HISTORY_COMPACTION: str = "0 3 1 * *"
+    JOB_SCHEDULE_STREAK_REBUILD: str = ""  # Run on demand after data fixes
+    JOB_SCHEDULE_RECONCILIATION: str = "0 2 * * *"
+    JOB_SCHEDULE_DECAY_HISTORY_COMPACTION: str = "30 3 * * *"
+    JOB_SCHEDULE_AUTO_LOCK: str = "1 0 * * *"  # Before the leaderboard freeze
+    JOB_SCHEDULE_PARTITION_MAINTENANCE: str = "15 4 * * *"
+    
+    # XP decay is staggered: users are split into buckets, one per slot of the day
+    DECAY_BUCKETS: int = 24  # Slots per day; the xp_decay schedule should fire once per slot
+    DECAY_BATCH_SIZE: int = 500  # Users per transaction within a slot
+    
+    # xp_decay_history: daily rows older than this collapse into one range per inactive stretch
+    XP_DECAY_HISTORY_DETAIL_DAYS: int = 30
+    XP_DECAY_HISTORY_BATCH_SIZE: int = 1000  # Users per transaction
+    
+    # End-of-day auto-lock of runs left unlocked
+    AUTO_LOCK_BATCH_SIZE: int = 1000  # Runs per transaction
+    
+    # Streak rebuild from completion history
+    STREAK_REBUILD_CHUNK_SIZE: int = 1000  # Users per transaction
+    STREAK_REBUILD_WORKERS: int = 4
+    
+    # Nightly XP/level/streak reconciliation against source rows
+    RECONCILE_APPLY: bool = False  # Report only; true writes the fixes
+    RECONCILE_WORKERS: int = 4  # Processes
+    RECONCILE_BATCH_SIZE: int = 5000  # Users per cursor fetch and transaction
+    RECONCILE_REPORT_DIR: str = ""  # Mismatch reports (JSON lines per id range); "" = none
+    
+    # Caching
+    QUEST_CATALOG_CACHE_TTL_SECONDS: int = 300
+    SHARED_READ_TTL_SECONDS: float = 2.0  # Coalesced leaderboard/quest list/weekly challenge reads
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,7 +1,24 @@
 from datetime import date, timedelta
 from typing import Tuple
 from app.config import settings
-import math
+from app.utils.level_curve import LevelCurve
+
+import numpy as np
+
+
+def build_level_curve() -> LevelCurve:
+    """The level curve configured in settings (LEVEL_CURVE)"""
+    if settings.LEVEL_CURVE == "power":
+        return LevelCurve.power(settings.XP_PER_LEVEL_BASE, settings.LEVEL_EXPONENT, settings.MAX_LEVEL)
+    if settings.LEVEL_CURVE == "exponential":
+        return LevelCurve.exponential(settings.XP_PER_LEVEL_BASE, settings.LEVEL_GROWTH_RATE, settings.MAX_LEVEL)
+    if settings.LEVEL_CURVE == "table":
+        return LevelCurve.table(settings.LEVEL_XP_TABLE, settings.MAX_LEVEL)
+    raise ValueError(f"Unknown LEVEL_CURVE {settings.LEVEL_CURVE!r}")
+
+
+# Shared by every level lookup, scalar and batch
+level_curve = build_level_curve()
 
 
 class GameLogic:
@@ -9,45 +26,43 @@ class GameLogic:
     
     @staticmethod
     def calculate_level(total_xp: int) -> int:
-        """Calculate level from total XP using square root scaling"""
-        if total_xp <= 0:
-            return 1
-        
-        level = math.floor(
-            math.pow(total_xp / settings.XP_PER_LEVEL_BASE, settings.LEVEL_EXPONENT)
-        ) + 1
-        
-        return max(1, level)
+        """Calculate level from total XP (a lookup in the precomputed level curve)"""
+        return level_curve.level(total_xp)
     
     @staticmethod
     def xp_for_level(level: int) -> int:
         """Calculate total XP needed to reach a specific level"""
-        if level <= 1:
-            return 0
-        
-        return int(math.pow(level - 1, 2) * settings.XP_PER_LEVEL_BASE)
+        return level_curve.xp_for_level(level)
     
     @staticmethod
     def xp_for_next_level(current_xp: int) -> int:
-        """Calculate XP needed for next level"""
+        """Calculate XP needed for next level (never negative, even past the top level)"""
         current_level = GameLogic.calculate_level(current_xp)
         next_level_xp = GameLogic.xp_for_level(current_level + 1)
-        return next_level_xp - current_xp
+        return max(0, next_level_xp - current_xp)
     
     @staticmethod
     def level_progress(current_xp: int) -> float:
         """Calculate progress to next level as percentage (0-100)"""
-        current_level = GameLogic.calculate_level(current_xp)
-        current_level_xp = GameLogic.xp_for_level(current_level)
-        next_level_xp = GameLogic.xp_for_level(current_level + 1)
-        
-        level_xp_range = next_level_xp - current_level_xp
-        xp_in_current_level = current_xp - current_level_xp
-        
-        if level_xp_range == 0:
-            return 100.0
-        
-        return round((xp_in_current_level / level_xp_range) * 100, 2)
+        return level_curve.progress(current_xp)
+    
+    # Batch versions for jobs and analytics: arrays in, arrays out, with
+    # results identical to the scalar functions above
+    
+    @staticmethod
+    def calculate_level_batch(total_xp: np.ndarray) -> np.ndarray:
+        """calculate_level for an array of XP totals"""
+        return level_curve.level_batch(total_xp)
+    
+    @staticmethod
+    def xp_for_level_batch(levels: np.ndarray) -> np.ndarray:
+        """xp_for_level for an array of levels"""
+        return level_curve.xp_for_level_batch(levels)
+    
+    @staticmethod
+    def level_progress_batch(current_xp: np.ndarray) -> np.ndarray:
+        """level_progress for an array of XP totals"""
+        return level_curve.progress_batch(current_xp)
     
     @staticmethod
     def is_consecutive_day(last_date: date, current_date: date) -> bool:
@@ -2,7 +2,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import auth, quests, daily_runs, stats, goals, goal_routes, decay_routes, weekly_challenge_routes
+from app.database import SessionLocal
+from app.services.partition_service import PartitionService
+from app.services.leaderboard_service import leaderboard
+from app.services.user_event_service import user_events
+from app.services.outbox_service import OutboxService, outbox_worker
+from app.services.job_service import job_scheduler
+from app.utils.single_flight import shared_reads
+from app.routers import auth, quests, daily_runs, stats, goals, goal_routes, decay_routes, weekly_challenge_routes, dashboard, sync, events, jobs
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,6 +38,68 @@ app.include_router(goals.router, prefix=f"/api/{settings.API_VERSION}")
 app.include_router(goal_routes.router, prefix="/api/v1")
 app.include_router(decay_routes.router, prefix="/api/v1")
 app.include_router(weekly_challenge_routes.router, prefix="/api/v1")
+app.include_router(dashboard.router, prefix=f"/api/{settings.API_VERSION}")
+app.include_router(sync.router, prefix=f"/api/{settings.API_VERSION}")
+app.include_router(events.router, prefix=f"/api/{settings.API_VERSION}")
+app.include_router(jobs.router, prefix=f"/api/{settings.API_VERSION}")
+
+
+@app.on_event("startup")
+def ensure_run_partitions():
+    """Create upcoming monthly partitions before rows need them"""
+    if not settings.PARTITION_MAINTENANCE_ON_STARTUP:
+        return
+    
+    db = SessionLocal()
+    try:
+        PartitionService(db).ensure_future_partitions()
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def build_leaderboard():
+    """Load every user's XP into the in-memory leaderboard"""
+    db = SessionLocal()
+    try:
+        leaderboard.rebuild(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_user_events():
+    """Start relaying other workers' events to this worker's streams"""
+    user_events.start()
+
+
+@app.on_event("shutdown")
+def stop_user_events():
+    user_events.stop()
+
+
+@app.on_event("startup")
+def start_outbox_worker():
+    """Apply the side effects of recorded domain events in the background"""
+    if settings.OUTBOX_WORKER_ENABLED:
+        outbox_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_outbox_worker():
+    outbox_worker.stop()
+
+
+@app.on_event("startup")
+def start_job_scheduler():
+    """Fire decay, streak resets, unlocks, freezes and compaction on their schedules"""
+    if settings.JOB_SCHEDULER_ENABLED:
+        job_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_job_scheduler():
+    job_scheduler.stop()
 
 
 @app.get("/")
@@ -52,6 +121,28 @@ async def health_check():
     }
 
 
+@app.get("/health/shared-reads")
+async def shared_read_stats():
+    """Executions saved by request coalescing and the short-TTL cache"""
+    return shared_reads.stats()
+
+
+@app.get("/health/event-streams")
+async def event_stream_stats():
+    """Open event streams on this worker"""
+    return {"subscribers": user_events.subscriber_count()}
+
+
+@app.get("/health/outbox")
+def outbox_stats():
+    """Domain events waiting for (or given up by) the outbox worker"""
+    db = SessionLocal()
+    try:
+        return OutboxService(db).stats()
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Date, ForeignKey, Text, JSON, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, DateTime, Date, ForeignKey, ForeignKeyConstraint, Text, JSON, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime, date
@@ -63,6 +63,10 @@ class User(Base):
     
     # XP Decay tracking
     last_activity_date = Column(Date, server_default=func.current_date(), nullable=False)
+    timezone = Column(String(64))  # IANA name, e.g. "Europe/Berlin"; picks the user's decay slot
+    
+    # Delta sync: bumped once per flush that changes the user's synced entities
+    sync_version = Column(BigInteger, default=0, server_default="0", nullable=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -72,15 +76,30 @@ class User(Base):
     streaks = relationship("Streak", back_populates="user", cascade="all, delete-orphan")
     decay_history = relationship("XPDecayHistory", back_populates="user", cascade="all, delete-orphan")
     weekly_challenges = relationship("WeeklyChallengeCompletion", back_populates="user", cascade="all, delete-orphan")
+    monthly_summaries = relationship("UserMonthlySummary", back_populates="user", cascade="all, delete-orphan")
+    daily_stats = relationship("UserDailyStats", back_populates="user", cascade="all, delete-orphan")
+    period_xp = relationship("UserPeriodXP", back_populates="user", cascade="all, delete-orphan")
+    sync_changes = relationship("SyncChange", back_populates="user", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index('idx_user_total_xp', 'total_xp'),
+        Index('idx_user_updated_at', 'updated_at'),  # Leaderboard change polling
+    )
 
 
 class XPDecayHistory(Base):
-    """Track XP decay events for transparency and analytics"""
+    """
+    Track XP decay events for transparency and analytics.
+    
+    One row per nightly decay; old rows of one inactive stretch are
+    compacted into a range row (decay_date..end_date, xp_lost summed).
+    """
     __tablename__ = "xp_decay_history"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    decay_date = Column(Date, nullable=False)
+    decay_date = Column(Date, nullable=False)  # First day of a range
+    end_date = Column(Date)  # Last day of a compacted range; NULL for a single day
     days_inactive = Column(Integer, nullable=False)
     xp_before = Column(Integer, nullable=False)
     xp_lost = Column(Integer, nullable=False)
@@ -170,11 +189,12 @@ class Quest(Base):
 
 
 class DailyRun(Base):
+    """Partitioned by month on `date` (see PartitionService)"""
     __tablename__ = "daily_runs"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True, nullable=False)  # Partition key, so part of the PK
     
     total_xp = Column(Integer, default=0, nullable=False)
     is_perfect = Column(Boolean, default=False, nullable=False)  # All quests completed
@@ -183,21 +203,39 @@ class DailyRun(Base):
     completed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
+    # Compact completion storage (NULL for row-per-completion runs)
+    quest_ids = Column(ARRAY(UUID(as_uuid=True)))  # Ordered quest slots
+    completion_bits = Column(LargeBinary)  # Bit i set = quest_ids[i] completed
+    completion_times = Column(ARRAY(DateTime(timezone=True)))  # completed_at per slot
+    completion_xp = Column(ARRAY(Integer))  # xp_earned per slot, as awarded at toggle time
+    
     # Relationships
     user = relationship("User", back_populates="daily_runs")
     quest_completions = relationship("DailyQuestCompletion", back_populates="daily_run", cascade="all, delete-orphan")
     
+    @hybrid_property
+    def is_compact(self) -> bool:
+        """Whether completions live in the compact columns instead of rows"""
+        return self.quest_ids is not None
+    
+    @is_compact.expression
+    def is_compact(cls):
+        return cls.quest_ids.isnot(None)
+    
     __table_args__ = (
-        Index('idx_daily_run_user_date', 'user_id', 'date', unique=True),
+        Index('idx_daily_run_user_date', 'user_id', 'date', unique=True, postgresql_include=['id']),
         Index('idx_daily_run_date', 'date'),
+        {'postgresql_partition_by': 'RANGE (date)'},
     )
 
 
 class DailyQuestCompletion(Base):
+    """Co-partitioned with daily_runs by month on `run_date`"""
     __tablename__ = "daily_quest_completions"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    daily_run_id = Column(UUID(as_uuid=True), ForeignKey("daily_runs.id", ondelete="CASCADE"), nullable=False)
+    daily_run_id = Column(UUID(as_uuid=True), nullable=False)
+    run_date = Column(Date, primary_key=True, nullable=False)  # Copy of daily_runs.date (partition key)
     quest_id = Column(UUID(as_uuid=True), ForeignKey("quests.id", ondelete="CASCADE"), nullable=False)
     
     completed = Column(Boolean, default=False, nullable=False)
@@ -211,7 +249,183 @@ class DailyQuestCompletion(Base):
     quest = relationship("Quest", back_populates="completions")
     
     __table_args__ = (
-        Index('idx_completion_run_quest', 'daily_run_id', 'quest_id', unique=True),
+        ForeignKeyConstraint(
+            ['daily_run_id', 'run_date'],
+            ['daily_runs.id', 'daily_runs.date'],
+            ondelete="CASCADE"
+        ),
+        Index('idx_completion_run_quest', 'daily_run_id', 'quest_id', 'run_date', unique=True),
+        # Covers the per-category GROUP BY join without touching the heap
+        Index(
+            'idx_completion_run_covering', 'daily_run_id', 'run_date',
+            postgresql_include=['quest_id', 'completed']
+        ),
+        {'postgresql_partition_by': 'RANGE (run_date)'},
+    )
+
+
+class UserDailyStats(Base):
+    """Per-user, per-day rollup of a run, kept in step on create, toggle and lock"""
+    __tablename__ = "user_daily_stats"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    
+    total_xp = Column(Integer, default=0, nullable=False)
+    is_perfect = Column(Boolean, default=False, nullable=False)
+    is_locked = Column(Boolean, default=False, nullable=False)
+    category_counts = Column(JSON, default=dict, nullable=False)  # {category: {"total": n, "completed": m}}
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="daily_stats")
+    
+    __table_args__ = (
+        # The heatmap columns ride along so it is served by an index-only scan
+        Index(
+            'idx_user_daily_stats_user_date', 'user_id', 'date', unique=True,
+            postgresql_include=['total_xp', 'is_perfect', 'is_locked']
+        ),
+    )
+
+
+class UserMonthlySummary(Base):
+    """Per-user monthly rollup of runs compacted out of daily_runs"""
+    __tablename__ = "user_monthly_summaries"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
+    
+    total_runs = Column(Integer, default=0, nullable=False)
+    locked_runs = Column(Integer, default=0, nullable=False)
+    total_xp = Column(Integer, default=0, nullable=False)
+    locked_xp = Column(Integer, default=0, nullable=False)  # Counts toward User.total_xp
+    perfect_days = Column(Integer, default=0, nullable=False)
+    category_counts = Column(JSON, default=dict, nullable=False)  # {category: {"total": n, "completed": m}}
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="monthly_summaries")
+    
+    __table_args__ = (
+        Index('idx_monthly_summary_user_month', 'user_id', 'month', unique=True),
+    )
+
+
+class UserPeriodXP(Base):
+    """XP a user earned in one week or month, incremented as XP is awarded"""
+    __tablename__ = "user_period_xp"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period_type = Column(String(10), nullable=False)  # week, month
+    period_start = Column(Date, nullable=False)  # Monday / first of the month
+    xp = Column(Integer, default=0, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="period_xp")
+    
+    __table_args__ = (
+        Index('idx_period_xp_user', 'period_type', 'period_start', 'user_id', unique=True),
+        # Top-N and "how many are ahead of me" within one period
+        Index('idx_period_xp_ranking', 'period_type', 'period_start', 'xp'),
+    )
+
+
+class LeaderboardSnapshot(Base):
+    """Final standings of a closed week or month, frozen once"""
+    __tablename__ = "leaderboard_snapshots"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    period_type = Column(String(10), nullable=False)
+    period_start = Column(Date, nullable=False)
+    rank = Column(Integer, nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    username = Column(String(50), nullable=False)
+    xp = Column(Integer, nullable=False)
+    
+    frozen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_snapshot_period_rank', 'period_type', 'period_start', 'rank', unique=True),
+        Index('idx_snapshot_period_user', 'period_type', 'period_start', 'user_id', unique=True),
+    )
+
+
+class SyncChange(Base):
+    """Latest version at which a synced entity changed (or was deleted) for a user"""
+    __tablename__ = "sync_changes"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(30), nullable=False)  # run, goal, streak, challenge_completion
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    version = Column(BigInteger, nullable=False)
+    is_deleted = Column(Boolean, default=False, nullable=False)  # Tombstone
+    
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Relationships
+    user = relationship("User", back_populates="sync_changes")
+    
+    __table_args__ = (
+        Index('idx_sync_change_entity', 'user_id', 'entity_type', 'entity_id', unique=True),
+        Index('idx_sync_change_version', 'user_id', 'version'),
+    )
+
+
+class OutboxEvent(Base):
+    """Domain event written with the change that caused it, processed by the outbox worker"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String(50), nullable=False)  # QuestToggled, RunLocked, MilestoneToggled, ChallengeCompleted
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    payload = Column(JSON, nullable=False)
+    
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Next attempt / lease expiry
+    last_error = Column(Text)
+    processed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_outbox_pending', 'available_at', postgresql_where=processed_at.is_(None)),
+        Index('idx_outbox_processed', 'processed_at'),
+    )
+
+
+class JobRun(Base):
+    """One execution of a background job (decay, streak resets, compaction, ...)"""
+    __tablename__ = "job_runs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_name = Column(String(50), nullable=False)
+    trigger = Column(String(20), nullable=False)  # schedule, manual
+    status = Column(String(20), default="pending", nullable=False)  # pending, running, succeeded, failed, skipped
+    scheduled_for = Column(DateTime)  # Schedule slot (local time) for scheduled runs
+    
+    progress_done = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer)
+    result = Column(JSON)
+    error = Column(Text)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('idx_job_run_name_created', 'job_name', 'created_at'),
+        # Every replica's scheduler fires; only the first to claim a slot runs it
+        Index('idx_job_run_slot', 'job_name', 'scheduled_for', unique=True,
+              postgresql_where=scheduled_for.isnot(None)),
     )
 
 
@@ -236,4 +450,6 @@ class Streak(Base):
     __table_args__ = (
         Index('idx_streak_user_quest', 'user_id', 'quest_id', unique=True),
         Index('idx_streak_current', 'user_id', 'current_streak'),
+        # Nightly reset: only live streaks, by last completion
+        Index('idx_streak_live', 'last_completed_date', postgresql_where=current_streak > 0),
     )
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from app.database import get_db
 from app import models, schemas
@@ -83,7 +84,14 @@ def complete_onboarding(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Complete user onboarding by setting goal categories"""
+    """Complete user onboarding by setting goal categories (and optionally the time zone)"""
+    
+    if onboarding_data.timezone is not None:
+        try:
+            ZoneInfo(onboarding_data.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Unknown time zone: {onboarding_data.timezone}")
+        current_user.timezone = onboarding_data.timezone
     
     current_user.goal_categories = [cat.value for cat in onboarding_data.goal_categories]
     current_user.has_completed_onboarding = True
@@ -93,7 +101,8 @@ def complete_onboarding(
     
     return {
         "message": "Onboarding completed successfully",
-        "goal_categories": current_user.goal_categories
+        "goal_categories": current_user.goal_categories,
+        "timezone": current_user.timezone
     }
 
 
@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 from datetime import date, datetime
 
+from app.config import settings
 from app.database import get_db
 from app import models, schemas
 from app.auth import get_current_user
-from app.game_logic import AntiCheat, StreakCalculator, GameLogic
-from app.services.xp_decay_service import XPDecayService
+from app.game_logic import AntiCheat
+from app.services.quest_catalog_cache import quest_catalog_cache
+from app.services.run_storage_service import RunStorageService, CompletionView
+from app.services.daily_stats_service import DailyStatsService
 from app.services.weekly_challenge_service import WeeklyChallengeService
+from app.services import user_event_service
+from app.services.user_event_service import user_events
+from app.services import outbox_service
+from app.services.outbox_service import OutboxService
 
 router = APIRouter(prefix="/daily-runs", tags=["daily-runs"])
 
@@ -50,28 +57,13 @@ def _create_daily_run(
     db.add(daily_run)
     db.flush()
 
-    quest_query = db.query(models.Quest).filter(models.Quest.is_active == True)
-
-    if current_user.goal_categories:
-        quest_query = quest_query.filter(
-            models.Quest.category.in_(current_user.goal_categories)
-        )
-
-    quests = quest_query.all()
-
-    if not quests:
-        quests = db.query(models.Quest).filter(
-            models.Quest.is_active == True,
-            models.Quest.is_core == True
-        ).all()
-
-    for quest in quests:
-        db.add(models.DailyQuestCompletion(
-            daily_run_id=daily_run.id,
-            quest_id=quest.id,
-            completed=False,
-            xp_earned=0
-        ))
+    quest_ids = quest_catalog_cache.select_quest_ids(
+        db,
+        current_user.goal_categories,
+        recent_quest_ids=_get_recently_completed_quest_ids(current_user.id, target_date, db)
+    )
+    RunStorageService(db).initialize_run(daily_run, quest_ids)
+    DailyStatsService(db).record_run(daily_run)
 
     db.commit()
     db.refresh(daily_run)
@@ -166,11 +158,8 @@ async def toggle_quest_completion(
             detail=reason
         )
     
-    # Get completion with quest
-    completion = db.query(models.DailyQuestCompletion).filter(
-        models.DailyQuestCompletion.id == completion_id,
-        models.DailyQuestCompletion.daily_run_id == run_id
-    ).first()
+    # Toggle completion and update run total XP
+    completion = RunStorageService(db).toggle_completion(run, completion_id)
     
     if not completion:
         raise HTTPException(
@@ -178,24 +167,18 @@ async def toggle_quest_completion(
             detail="Quest completion not found"
         )
     
-    quest = completion.quest
-    
-    # Toggle completion
-    completion.completed = not completion.completed
-    completion.xp_earned = quest.base_xp if completion.completed else 0
-    completion.completed_at = datetime.utcnow() if completion.completed else None
-    
-    # Update run total XP
-    _recalculate_run_xp(run, db)
-    
-    # Update streak if core quest
-    if quest.is_core and completion.completed:
-        _update_streak(current_user.id, quest.id, run.date, db)
-    
-    # Update last activity date
-    decay_service = XPDecayService(db)
-    await decay_service.update_user_activity(current_user.id)
-    
+    # Rollups, streaks, activity and notifications run in the outbox worker
+    OutboxService(db).record(outbox_service.QUEST_TOGGLED, current_user.id, {
+        "run_id": run.id,
+        "run_date": run.date,
+        "completion_id": completion.completion_id,
+        "quest_id": completion.quest.id,
+        "completed": completion.completed,
+        "xp_earned": completion.xp_earned,
+        "run_total_xp": run.total_xp,
+        "is_perfect": run.is_perfect,
+        "occurred_on": date.today()
+    })
     db.commit()
     
     return {
@@ -211,7 +194,11 @@ async def complete_daily_run(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Complete (lock) daily run and check for weekly challenge unlock"""
+    """
+    Complete (lock) daily run and check for weekly challenge unlock. The
+    unlock is decided in the lock's transaction so the response can report
+    it; XP totals, leaderboards and the rest run in the outbox worker.
+    """
     
     run = db.query(models.DailyRun).filter(
         models.DailyRun.id == run_id,
@@ -242,18 +229,19 @@ async def complete_daily_run(
     run.is_locked = True
     run.completed_at = datetime.utcnow()
     
-    # Update user total XP and level
-    _update_user_xp_and_level(current_user, db)
-    
-    # Update last activity date
-    decay_service = XPDecayService(db)
-    await decay_service.update_user_activity(current_user.id)
-    
-    # Check if weekly challenge should be unlocked
+    # Check if weekly challenge should be unlocked (flushed, committed with the lock)
     challenge_service = WeeklyChallengeService(db)
-    unlock_status = await challenge_service.check_and_unlock_challenge(current_user.id)
+    unlock_status = await challenge_service.check_and_unlock_challenge(current_user.id, run.date, commit=False)
     
-    db.commit()
+    # XP totals, leaderboards, activity and notifications run in the outbox worker
+    OutboxService(db).record(outbox_service.RUN_LOCKED, current_user.id, {
+        "run_id": run.id,
+        "run_date": run.date,
+        "total_xp": run.total_xp,
+        "is_perfect": run.is_perfect,
+        "completed_at": run.completed_at,
+        "occurred_on": date.today()
+    })
     
     response = {
         "message": "Daily run completed successfully",
@@ -263,12 +251,20 @@ async def complete_daily_run(
     
     # Add weekly challenge unlock notification if just unlocked
     if unlock_status.get("just_unlocked"):
+        challenge = unlock_status["challenge"]
         response["weekly_challenge_unlocked"] = True
         response["challenge"] = {
-            "title": unlock_status["challenge"].title,
-            "xp_reward": unlock_status["challenge"].xp_reward
+            "title": challenge.title,
+            "xp_reward": challenge.xp_reward
         }
+        # The outbox's own check will find it already unlocked
+        user_events.publish_after_commit(db, current_user.id, user_event_service.CHALLENGE_UNLOCKED, {
+            "challenge_id": challenge.id,
+            "title": challenge.title,
+            "xp_reward": challenge.xp_reward
+        })
     
+    db.commit()
     return response
 
 
@@ -284,22 +280,30 @@ def get_run_history(
         models.DailyRun.user_id == current_user.id
     ).order_by(models.DailyRun.date.desc()).limit(limit).all()
     
-    return [_format_daily_run_response(run, db) for run in runs]
+    completions_by_run = RunStorageService(db).get_completions_for_runs(runs)
+    
+    return [
+        _format_daily_run_response(run, db, completions_by_run[run.id])
+        for run in runs
+    ]
 
 
 # Helper functions
-def _format_daily_run_response(run: models.DailyRun, db: Session) -> Dict[str, Any]:
+def _format_daily_run_response(
+    run: models.DailyRun,
+    db: Session,
+    completions: Optional[List[CompletionView]] = None
+) -> Dict[str, Any]:
     """Format daily run with quest details"""
     
-    completions = db.query(models.DailyQuestCompletion).filter(
-        models.DailyQuestCompletion.daily_run_id == run.id
-    ).all()
+    if completions is None:
+        completions = RunStorageService(db).get_completions(run)
     
     quests = []
     for completion in completions:
         quest = completion.quest
         quests.append({
-            "completion_id": completion.id,
+            "completion_id": completion.completion_id,
             "quest_id": quest.id,
             "title": quest.title,
             "description": quest.description,
@@ -325,54 +329,12 @@ def _format_daily_run_response(run: models.DailyRun, db: Session) -> Dict[str, A
     }
 
 
-def _recalculate_run_xp(run: models.DailyRun, db: Session) -> None:
-    """Recalculate daily run total XP and perfect status"""
-    
-    completions = db.query(models.DailyQuestCompletion).filter(
-        models.DailyQuestCompletion.daily_run_id == run.id
-    ).all()
-    
-    run.total_xp = sum(c.xp_earned for c in completions)
-    run.is_perfect = all(c.completed for c in completions) if completions else False
-
-
-def _update_user_xp_and_level(user: models.User, db: Session) -> None:
-    """Update user's total XP and level from locked runs"""
+def _get_recently_completed_quest_ids(user_id: Any, before_date: date, db: Session) -> Set[Any]:
+    """Get quests the user completed in the last QUEST_RECENCY_DAYS days"""
     
-    locked_runs = db.query(models.DailyRun).filter(
-        models.DailyRun.user_id == user.id,
-        models.DailyRun.is_locked == True
-    ).all()
+    if settings.DAILY_RUN_MAX_QUESTS <= 0:
+        return set()
     
-    user.total_xp = sum(run.total_xp for run in locked_runs)
-    user.current_level = GameLogic.calculate_level(user.total_xp)
-
-
-def _update_streak(user_id: Any, quest_id: Any, completion_date: date, db: Session) -> None:
-    """Update streak for a core quest"""
-    
-    streak = db.query(models.Streak).filter(
-        models.Streak.user_id == user_id,
-        models.Streak.quest_id == quest_id
-    ).first()
-    
-    if streak:
-        new_current, new_longest = StreakCalculator.update_streak(
-            streak.current_streak,
-            streak.longest_streak,
-            streak.last_completed_date,
-            completion_date
-        )
-        
-        streak.current_streak = new_current
-        streak.longest_streak = new_longest
-        streak.last_completed_date = completion_date
-    else:
-        streak = models.Streak(
-            user_id=user_id,
-            quest_id=quest_id,
-            current_streak=1,
-            longest_streak=1,
-            last_completed_date=completion_date
-        )
-        db.add(streak)
\ No newline at end of file
+    return RunStorageService(db).get_recently_completed_quest_ids(
+        user_id, before_date, settings.QUEST_RECENCY_DAYS
+    )
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Optional
+import inspect
+
+from app.database import get_db
+from app import models, schemas
+from app.auth import get_current_user
+from app.routers import stats, daily_runs, goals, weekly_challenge_routes, decay_routes
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+# Section name -> loader. Each loader reuses the standalone endpoint so the
+# payload of a section is exactly what that endpoint returns.
+SECTIONS: Dict[str, Callable] = {
+    "profile": lambda user, db: schemas.ProfileResponse.model_validate(stats.get_user_profile(user, db)),
+    "today": lambda user, db: schemas.DailyRunResponse.model_validate(daily_runs.get_todays_run(user, db)),
+    "streaks": lambda user, db: [schemas.StreakResponse.model_validate(s) for s in stats.get_user_streaks(user, db)],
+    "goals": lambda user, db: goals.list_goals(user, db),
+    "weekly_challenge": lambda user, db: weekly_challenge_routes.get_current_challenge(user, db),
+    "decay": lambda user, db: decay_routes.get_decay_status(user),
+}
+
+
+@router.get("")
+async def get_dashboard(
+    sections: Optional[str] = Query(
+        None,
+        description=f"Comma-separated subset of: {', '.join(SECTIONS)} (default: all)"
+    ),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the home screen needs in one round trip.
+
+    The user is authenticated and loaded once; every section then runs on
+    the same session instead of six requests each re-authenticating.
+    """
+    if sections:
+        requested = [name.strip() for name in sections.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown dashboard sections: {', '.join(unknown)}"
+            )
+    else:
+        requested = list(SECTIONS)
+
+    payload: Dict[str, Any] = {}
+    for name in requested:
+        result = SECTIONS[name](current_user, db)
+        # Async endpoints hand back a coroutine
+        if inspect.isawaitable(result):
+            result = await result
+        payload[name] = result
+
+    return payload
@@ -1,52 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.services.xp_decay_service import XPDecayService
-from app.auth import get_current_user
+from app.services.decay_simulation_service import DecayPolicy, DecaySimulationService
+from app.services.job_service import JobService, JobAlreadyRunning
+from app.auth import get_admin_user, get_current_user, require_jobs_api
+from app.config import settings
 from app import schemas, models
 from datetime import date
 
 router = APIRouter(prefix="/decay", tags=["xp-decay"])
 
-@router.post("/run-all")
+MAX_SIMULATION_DAYS = 365
+
+@router.post("/run-all", dependencies=[Depends(require_jobs_api)])
 async def trigger_decay_for_all(
-    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_admin_user)
+):
+    """
+    Manually trigger the decay job: every bucket whose slot has started
+    today and not run yet. Admins only, and only with JOBS_API_ENABLED.
+    """
+    try:
+        # Runs as a persisted job with its own session; poll /jobs/runs/{id}
+        job_run = JobService(db).trigger("xp_decay")
+    except JobAlreadyRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return {
+        "message": "Decay process started in background",
+        "triggered_at": date.today().isoformat(),
+        "job_run_id": job_run.id
+    }
+
+@router.get("/buckets")
+def get_decay_buckets(
+    day: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
-    Manually trigger decay process for all users.
-    In production, this should be restricted to admin users only.
-    For testing, it's open to authenticated users.
+    Decay slots of the day: when each bucket runs and, once it has, how
+    many users it decayed and how long it took. Defaults to today.
     """
+    day = day or date.today()
     decay_service = XPDecayService(db)
-    
-    # Run in background to avoid timeout
-    background_tasks.add_task(decay_service.process_decay_for_all_users)
+    done = decay_service.get_bucket_stats(day)
     
     return {
-        "message": "Decay process started in background",
-        "triggered_at": date.today().isoformat()
+        "date": day.isoformat(),
+        "buckets": [
+            done.get(bucket) or {
+                "bucket": bucket,
+                "slot": XPDecayService.slot_start(bucket).strftime("%H:%M"),
+                "pending": True
+            }
+            for bucket in range(settings.DECAY_BUCKETS)
+        ]
     }
 
+@router.post("/simulate")
+def simulate_decay_policies(
+    request: schemas.DecaySimulationRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_admin_user)
+):
+    """
+    What-if: XP lost and levels dropped across all users if nobody is
+    active for each horizon, under the current decay policy and each
+    candidate. Admins only: it scans the whole user base.
+    """
+    if any(not 1 <= days <= MAX_SIMULATION_DAYS for days in request.horizons):
+        raise HTTPException(status_code=400, detail=f"Horizons must be 1-{MAX_SIMULATION_DAYS} days")
+    
+    policies = [DecayPolicy.current()]
+    policies += [
+        candidate for candidate in (DecayPolicy(p.decay_rate, p.grace_period_days) for p in request.policies)
+        if candidate not in policies
+    ]
+    return DecaySimulationService(db).run(policies, request.horizons)
+
 @router.get("/status")
 async def get_decay_status(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(get_current_user)
 ):
     """
     Get user's current decay status and potential impact.
     Shows if decay will happen and how much XP would be lost.
+    Computed from the already-loaded user: no further queries.
     """
-    decay_service = XPDecayService(db)
-    
-    potential_decay = await decay_service.calculate_potential_decay(current_user.id)
-    days_until_decay = await decay_service.get_days_until_decay(current_user.id)
+    status = XPDecayService.get_decay_status(current_user)
+    potential_decay = status["potential_decay"]
     
     return {
         "last_activity_date": current_user.last_activity_date.isoformat(),
-        "days_until_decay": days_until_decay,
+        "days_until_decay": status["days_until_decay"],
         "is_currently_safe": not potential_decay.get("will_decay", False),
         "potential_decay": potential_decay
     }
@@ -57,13 +107,19 @@ async def get_decay_history(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get user's decay history"""
+    """
+    Get user's decay history, newest first. Recent nights are one entry
+    each; older ones come as one entry per inactive stretch, covering
+    decay_date..end_date with the XP lost over the whole range.
+    """
     decay_service = XPDecayService(db)
     history = await decay_service.get_user_decay_history(current_user.id, limit)
     
     return [
         {
             "decay_date": record.decay_date.isoformat(),
+            "end_date": (record.end_date or record.decay_date).isoformat(),
+            "is_range": record.end_date is not None,
             "days_inactive": record.days_inactive,
             "xp_before": record.xp_before,
             "xp_lost": record.xp_lost,
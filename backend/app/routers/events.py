@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import AsyncIterator
+import asyncio
+import json
+
+from app.config import settings
+from app.database import get_db
+from app import models
+from app.auth import get_current_user
+from app.services.user_event_service import user_events, Subscription
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events for the current user.
+
+    Emits `quest_toggled`, `run_locked`, `challenge_completed` and
+    `xp_decayed` as they commit on any device, so clients can stop
+    polling `/daily-runs/today` and `/weekly-challenge/current`. A comment
+    line is sent every EVENT_STREAM_HEARTBEAT_SECONDS to keep proxies
+    from closing an idle stream.
+    """
+    # The stream can stay open for hours; don't hold a pooled connection for it
+    db.close()
+
+    subscription = user_events.subscribe(current_user.id)
+    return StreamingResponse(
+        _event_source(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _event_source(request: Request, subscription: Subscription) -> AsyncIterator[str]:
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                user_event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=settings.EVENT_STREAM_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+
+            yield f"event: {user_event['type']}\ndata: {json.dumps(user_event)}\n\n"
+    finally:
+        user_events.unsubscribe(subscription)
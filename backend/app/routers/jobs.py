@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+import uuid
+
+from app.database import get_db
+from app import models
+from app.auth import get_admin_user, require_jobs_api
+from app.services.job_service import JobService, JobScheduler, JobAlreadyRunning, JOBS
+
+# Jobs rewrite XP, streaks and run history: off unless JOBS_API_ENABLED, admins only
+router = APIRouter(prefix="/jobs", tags=["jobs"], dependencies=[Depends(require_jobs_api)])
+
+
+@router.get("")
+def list_jobs(
+    current_user: models.User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Registered jobs with their schedule, next run and last run"""
+    service = JobService(db)
+    result = []
+    for job in JOBS.values():
+        last_run = service.get_last_run(job.name)
+        result.append({
+            "name": job.name,
+            "description": job.description,
+            "schedule": job.schedule.expression if job.schedule else None,
+            "next_run_at": JobScheduler.next_run_at(job),
+            "last_run": service.describe_run(last_run) if last_run else None
+        })
+    return result
+
+
+@router.post("/{job_name}/run", status_code=202)
+def run_job(
+    job_name: str,
+    current_user: models.User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a job now (admins only). Poll /jobs/runs/{id} for progress.
+    """
+    if job_name not in JOBS:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    try:
+        job_run = JobService(db).trigger(job_name)
+    except JobAlreadyRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return JobService.describe_run(job_run)
+
+
+@router.get("/runs/{run_id}")
+def get_job_run(
+    run_id: uuid.UUID,
+    current_user: models.User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Status, progress and throughput of one job run"""
+    job_run = JobService(db).get_run(run_id)
+    if not job_run:
+        raise HTTPException(status_code=404, detail="Job run not found")
+    return JobService.describe_run(job_run)
+
+
+@router.get("/{job_name}/runs")
+def get_job_runs(
+    job_name: str,
+    limit: int = 20,
+    current_user: models.User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recent runs of one job, newest first"""
+    if job_name not in JOBS:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return [JobService.describe_run(job_run) for job_run in JobService(db).get_runs(job_name, limit)]
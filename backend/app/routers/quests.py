@@ -5,6 +5,8 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.auth import get_current_user
+from app.services.quest_catalog_cache import quest_catalog_cache
+from app.utils.single_flight import shared_reads
 
 router = APIRouter(prefix="/quests", tags=["quests"])
 
@@ -12,22 +14,29 @@ router = APIRouter(prefix="/quests", tags=["quests"])
 @router.get("/", response_model=List[schemas.QuestResponse])
 def get_all_quests(db: Session = Depends(get_db)):
     """Get all active quests"""
-    quests = db.query(models.Quest).filter(
-        models.Quest.is_active == True
-    ).order_by(models.Quest.category, models.Quest.base_xp.desc()).all()
     
-    return quests
+    def load() -> List[schemas.QuestResponse]:
+        quests = db.query(models.Quest).filter(
+            models.Quest.is_active == True
+        ).order_by(models.Quest.category, models.Quest.base_xp.desc()).all()
+        return [schemas.QuestResponse.model_validate(quest) for quest in quests]
+    
+    # Identical for every caller: concurrent requests share one query
+    return shared_reads.do(("quests", "all"), load)
 
 
 @router.get("/core", response_model=List[schemas.QuestResponse])
 def get_core_quests(db: Session = Depends(get_db)):
     """Get only core quests (affect streaks)"""
-    quests = db.query(models.Quest).filter(
-        models.Quest.is_active == True,
-        models.Quest.is_core == True
-    ).order_by(models.Quest.base_xp.desc()).all()
     
-    return quests
+    def load() -> List[schemas.QuestResponse]:
+        quests = db.query(models.Quest).filter(
+            models.Quest.is_active == True,
+            models.Quest.is_core == True
+        ).order_by(models.Quest.base_xp.desc()).all()
+        return [schemas.QuestResponse.model_validate(quest) for quest in quests]
+    
+    return shared_reads.do(("quests", "core"), load)
 
 
 @router.get("/{quest_id}", response_model=schemas.QuestResponse)
@@ -65,5 +74,7 @@ def create_quest(
     db.add(quest)
     db.commit()
     db.refresh(quest)
+    quest_catalog_cache.invalidate()
+    shared_reads.invalidate("quests")
     
     return quest
\ No newline at end of file
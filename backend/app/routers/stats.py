@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import date, timedelta
@@ -7,6 +7,11 @@ from app.database import get_db
 from app import models, schemas
 from app.auth import get_current_user
 from app.game_logic import GameLogic
+from app.services.daily_stats_service import DailyStatsService
+from app.services.history_compaction_service import HistoryCompactionService
+from app.services.leaderboard_service import leaderboard, LeaderboardEntry
+from app.services.period_leaderboard_service import PeriodLeaderboardService
+from app.utils.single_flight import shared_reads
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
@@ -50,20 +55,95 @@ def get_leaderboard(
 ):
     """Get global leaderboard of top users by XP"""
     
-    users = db.query(models.User).order_by(
-        models.User.total_xp.desc()
-    ).limit(limit).all()
-    
-    leaderboard = []
-    for idx, user in enumerate(users, start=1):
-        leaderboard.append({
-            "rank": idx,
-            "username": user.username,
-            "level": user.current_level,
-            "total_xp": user.total_xp
-        })
+    def load() -> List[Dict[str, Any]]:
+        leaderboard.sync(db)
+        return [_format_leaderboard_entry(entry) for entry in leaderboard.top(limit)]
+    
+    # Identical for every caller: concurrent requests share one computation
+    return shared_reads.do(("leaderboard", limit), load)
+
+
+@router.get("/leaderboard/me")
+def get_my_rank(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's all-time rank"""
+    
+    leaderboard.sync(db)
+    entry = leaderboard.rank_of(current_user.id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="User is not ranked yet")
+    
+    return {
+        **_format_leaderboard_entry(entry),
+        "total_users": leaderboard.size()
+    }
+
+
+@router.get("/leaderboard/neighbors")
+def get_leaderboard_neighbors(
+    radius: int = Query(5, ge=0, le=50),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the users ranked directly above and below the current user"""
     
-    return leaderboard
+    leaderboard.sync(db)
+    return [
+        {**_format_leaderboard_entry(entry), "is_me": entry.user_id == current_user.id}
+        for entry in leaderboard.neighbors(current_user.id, radius)
+    ]
+
+
+@router.get("/leaderboard/{period}")
+def get_period_leaderboard(
+    period: schemas.LeaderboardPeriod,
+    start: Optional[date] = None,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """Get the top users by XP earned in a week or month (default: the current one)"""
+    
+    service = PeriodLeaderboardService(db)
+    period_start = service.period_start(period, start or date.today())
+    
+    return {
+        "period": period,
+        "period_start": period_start,
+        "period_end": service.period_end(period, period_start) - timedelta(days=1),
+        "is_final": service.is_closed(period, period_start),
+        "leaderboard": [
+            {key: entry[key] for key in ("rank", "username", "xp")}
+            for entry in service.top(period, period_start, limit)
+        ]
+    }
+
+
+@router.get("/leaderboard/{period}/me")
+def get_my_period_rank(
+    period: schemas.LeaderboardPeriod,
+    start: Optional[date] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's rank in a week or month"""
+    
+    service = PeriodLeaderboardService(db)
+    period_start = service.period_start(period, start or date.today())
+    
+    entry = service.rank_of(period, period_start, current_user.id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No XP earned in this period")
+    
+    return {
+        "period": period,
+        "period_start": period_start,
+        "is_final": service.is_closed(period, period_start),
+        "rank": entry["rank"],
+        "username": current_user.username,
+        "xp": entry["xp"]
+    }
 
 
 @router.get("/streaks", response_model=List[schemas.StreakResponse])
@@ -103,31 +183,39 @@ def get_progress_stats(
 ):
     """Get progress statistics for the last N days"""
     
-    start_date = date.today() - timedelta(days=days)
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+    
+    day_stats = DailyStatsService(db).get_days(current_user.id, start_date, end_date)
     
-    runs = db.query(models.DailyRun).filter(
-        models.DailyRun.user_id == current_user.id,
-        models.DailyRun.date >= start_date
-    ).order_by(models.DailyRun.date).all()
+    total_runs = len(day_stats)
+    locked_runs = sum(1 for day in day_stats if day.is_locked)
+    total_xp_earned = sum(day.total_xp for day in day_stats)
+    perfect_days = sum(1 for day in day_stats if day.is_perfect)
     
-    total_runs = len(runs)
-    locked_runs = sum(1 for run in runs if run.is_locked)
-    total_xp_earned = sum(run.total_xp for run in runs)
-    perfect_days = sum(1 for run in runs if run.is_perfect)
+    # Months compacted out of daily_runs only survive as monthly totals
+    summaries = HistoryCompactionService(db).get_summaries(current_user.id, start_date)
+    for summary in summaries:
+        total_runs += summary.total_runs
+        locked_runs += summary.locked_runs
+        total_xp_earned += summary.total_xp
+        perfect_days += summary.perfect_days
     
     # XP progression
     xp_progression = [
         {
-            "date": run.date,
-            "xp": run.total_xp,
-            "is_perfect": run.is_perfect,
-            "is_locked": run.is_locked
+            "date": day.date,
+            "xp": day.total_xp,
+            "is_perfect": day.is_perfect,
+            "is_locked": day.is_locked
         }
-        for run in runs
+        for day in day_stats
     ]
     
     # Category breakdown
-    category_breakdown = _get_category_breakdown(current_user.id, start_date, db)
+    category_breakdown = _get_category_breakdown(
+        DailyStatsService(db).get_category_totals(current_user.id, start_date, end_date)
+    )
     
     return {
         "period_days": days,
@@ -150,16 +238,14 @@ def get_activity_heatmap(
 ):
     """Get activity heatmap data"""
     
-    start_date = date.today() - timedelta(days=days)
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
     
-    runs = db.query(models.DailyRun).filter(
-        models.DailyRun.user_id == current_user.id,
-        models.DailyRun.date >= start_date
-    ).order_by(models.DailyRun.date).all()
+    day_stats = DailyStatsService(db).get_days(current_user.id, start_date, end_date)
     
     heatmap = []
-    for run in runs:
-        xp = run.total_xp
+    for day in day_stats:
+        xp = day.total_xp
         
         # Categorize activity level
         if xp == 0:
@@ -174,22 +260,31 @@ def get_activity_heatmap(
             level = 4
         
         heatmap.append({
-            "date": run.date,
+            "date": day.date,
             "xp": xp,
             "level": level,
-            "is_locked": run.is_locked,
-            "is_perfect": run.is_perfect
+            "is_locked": day.is_locked,
+            "is_perfect": day.is_perfect
         })
     
     return {
         "start_date": start_date,
-        "end_date": date.today(),
+        "end_date": end_date,
         "total_days": days,
         "heatmap": heatmap
     }
 
 
 # Helper functions
+def _format_leaderboard_entry(entry: LeaderboardEntry) -> Dict[str, Any]:
+    return {
+        "rank": entry.rank,
+        "username": entry.username,
+        "level": entry.level,
+        "total_xp": entry.total_xp
+    }
+
+
 def _is_streak_active(last_completed_date: Optional[date]) -> bool:
     """Check if streak is still active (completed today or yesterday)"""
     if not last_completed_date:
@@ -200,40 +295,13 @@ def _is_streak_active(last_completed_date: Optional[date]) -> bool:
     return days_since <= 1
 
 
-def _get_category_breakdown(user_id: Any, start_date: date, db: Session) -> List[Dict[str, Any]]:
-    """Calculate quest completion by category"""
-    
-    # Get all completions in date range with quest info
-    completions = db.query(
-        models.DailyQuestCompletion,
-        models.Quest.category
-    ).join(
-        models.DailyRun,
-        models.DailyQuestCompletion.daily_run_id == models.DailyRun.id
-    ).join(
-        models.Quest,
-        models.DailyQuestCompletion.quest_id == models.Quest.id
-    ).filter(
-        models.DailyRun.user_id == user_id,
-        models.DailyRun.date >= start_date
-    ).all()
-    
-    category_totals: Dict[str, int] = {}
-    category_completed: Dict[str, int] = {}
-    
-    for completion, category in completions:
-        if category not in category_totals:
-            category_totals[category] = 0
-            category_completed[category] = 0
-        
-        category_totals[category] += 1
-        if completion.completed:
-            category_completed[category] += 1
+def _get_category_breakdown(category_totals: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Calculate quest completion rate by category"""
     
     category_stats = []
-    for category in category_totals:
-        total = category_totals[category]
-        completed = category_completed[category]
+    for category, counts in category_totals.items():
+        total = counts["total"]
+        completed = counts["completed"]
         rate = round((completed / total * 100), 2) if total > 0 else 0
         
         category_stats.append({
@@ -243,4 +311,4 @@ def _get_category_breakdown(user_id: Any, start_date: date, db: Session) -> List
             "completion_rate": rate
         })
     
-    return category_stats
\ No newline at end of file
+    return category_stats
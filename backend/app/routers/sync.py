@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session, selectinload
+from typing import Any, Dict, List
+
+from app.database import get_db
+from app import models
+from app.auth import get_current_user
+from app.services.run_storage_service import RunStorageService
+from app.services import sync_service
+from app.services.sync_service import SyncService
+from app.routers.daily_runs import _format_daily_run_response
+from app.routers.stats import _is_streak_active
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("")
+def get_changes(
+    since: int = Query(0, ge=0, description="Highest version the client has applied (0 for a full sync)"),
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Entities changed since the client's last sync.
+
+    Changed runs, goals, streaks and challenge completions are returned in
+    full (a run carries its quests, a goal its milestones); deleted ones
+    as tombstones. Pass `cursor` back as `since` on the next call, and
+    keep calling while `has_more` is true.
+    """
+    changes, cursor, has_more = SyncService(db).get_changes(current_user.id, since, limit)
+
+    changed: Dict[str, List[Any]] = {}
+    deleted = []
+    for change in changes:
+        if change.is_deleted:
+            deleted.append({"type": change.entity_type, "id": change.entity_id})
+        else:
+            changed.setdefault(change.entity_type, []).append(change.entity_id)
+
+    return {
+        "cursor": cursor,
+        "has_more": has_more,
+        "runs": _load_runs(current_user, changed.get(sync_service.RUN), db),
+        "goals": _load_goals(current_user, changed.get(sync_service.GOAL), db),
+        "streaks": _load_streaks(current_user, changed.get(sync_service.STREAK), db),
+        "challenge_completions": _load_challenge_completions(
+            current_user, changed.get(sync_service.CHALLENGE_COMPLETION), db
+        ),
+        "deleted": deleted
+    }
+
+
+# Helper functions
+# An entity can be stamped and then removed without a tombstone (history
+# compaction), so each loader simply returns the ones that still exist
+
+def _load_runs(user: models.User, ids, db: Session) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    runs = db.query(models.DailyRun).filter(
+        models.DailyRun.user_id == user.id,
+        models.DailyRun.id.in_(ids)
+    ).order_by(models.DailyRun.date).all()
+
+    completions_by_run = RunStorageService(db).get_completions_for_runs(runs)
+    return [_format_daily_run_response(run, db, completions_by_run[run.id]) for run in runs]
+
+
+def _load_goals(user: models.User, ids, db: Session) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    goals = db.query(models.Goal).options(selectinload(models.Goal.milestones)).filter(
+        models.Goal.user_id == user.id,
+        models.Goal.id.in_(ids)
+    ).all()
+
+    return [
+        {
+            "id": goal.id,
+            "title": goal.title,
+            "description": goal.description,
+            "category": goal.category,
+            "target_date": goal.target_date,
+            "is_completed": goal.is_completed,
+            "progress_percentage": goal.progress_percentage,
+            "created_at": goal.created_at,
+            "milestones": [
+                {
+                    "id": m.id,
+                    "title": m.title,
+                    "order": m.order,
+                    "is_completed": m.is_completed
+                }
+                for m in sorted(goal.milestones, key=lambda x: x.order)
+            ]
+        }
+        for goal in goals
+    ]
+
+
+def _load_streaks(user: models.User, ids, db: Session) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    streaks = db.query(models.Streak).options(selectinload(models.Streak.quest)).filter(
+        models.Streak.user_id == user.id,
+        models.Streak.id.in_(ids)
+    ).all()
+
+    return [
+        {
+            "id": streak.id,
+            "quest_id": streak.quest.id,
+            "quest_title": streak.quest.title,
+            "quest_category": streak.quest.category,
+            "current_streak": streak.current_streak,
+            "longest_streak": streak.longest_streak,
+            "last_completed_date": streak.last_completed_date,
+            "is_active": _is_streak_active(streak.last_completed_date)
+        }
+        for streak in streaks
+    ]
+
+
+def _load_challenge_completions(user: models.User, ids, db: Session) -> List[Dict[str, Any]]:
+    if not ids:
+        return []
+    completions = db.query(models.WeeklyChallengeCompletion).filter(
+        models.WeeklyChallengeCompletion.user_id == user.id,
+        models.WeeklyChallengeCompletion.id.in_(ids)
+    ).all()
+
+    return [
+        {
+            "id": completion.id,
+            "challenge_id": completion.challenge_id,
+            "is_unlocked": completion.is_unlocked,
+            "is_completed": completion.is_completed,
+            "xp_earned": completion.xp_earned,
+            "unlocked_at": completion.unlocked_at,
+            "completed_at": completion.completed_at
+        }
+        for completion in completions
+    ]
@@ -20,6 +20,11 @@ class QuestDifficulty(str, Enum):
     HARD = "Hard"
 
 
+class LeaderboardPeriod(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+
+
 # User Schemas
 class UserCreate(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -34,6 +39,7 @@ class UserLogin(BaseModel):
 
 class UserOnboarding(BaseModel):
     goal_categories: List[QuestCategory] = Field(..., min_length=1, max_length=5)
+    timezone: Optional[str] = Field(None, max_length=64)  # IANA name, e.g. "Europe/Berlin"
 
 
 class UserResponse(BaseModel):
@@ -44,6 +50,7 @@ class UserResponse(BaseModel):
     current_level: int
     goal_categories: List[str]
     has_completed_onboarding: bool
+    timezone: Optional[str] = None
     created_at: datetime
     
     class Config:
@@ -229,4 +236,15 @@ class GoalResponse(BaseModel):
     milestones: List[MilestoneResponse]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# Decay Schemas
+class DecayPolicyIn(BaseModel):
+    decay_rate: float = Field(..., gt=0, lt=1)
+    grace_period_days: int = Field(0, ge=0)
+
+
+class DecaySimulationRequest(BaseModel):
+    policies: List[DecayPolicyIn] = Field(default_factory=list, max_length=10)  # Current policy is always included
+    horizons: List[int] = Field(default_factory=lambda: [7, 30, 90], min_length=1, max_length=10)  # Days ahead
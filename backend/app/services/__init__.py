@@ -4,6 +4,7 @@ from app.services.xp_service import XPService
 from app.services.streak_service import StreakService
 from app.services.user_service import UserService
 from app.services.goal_services import GoalService
+from app.services.sync_service import SyncService
 
 __all__ = [
     "QuestService",
@@ -11,5 +12,6 @@ __all__ = [
     "XPService",
     "StreakService",
     "UserService",
-    "GoalService"
+    "GoalService",
+    "SyncService"
 ]
\ No newline at end of file
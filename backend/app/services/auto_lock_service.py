@@ -0,0 +1,153 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date, timedelta
+
+import numpy as np
+
+from app import models
+from app.config import settings
+from app.game_logic import GameLogic
+from app.services import sync_service, user_event_service
+from app.services.daily_stats_service import DailyStatsService
+from app.services.period_leaderboard_service import PeriodLeaderboardService
+from app.services.sync_service import SyncService
+from app.services.user_event_service import user_events
+from app.services.weekly_challenge_service import WeeklyChallengeService
+
+
+# Locks up to :limit of the day's unlocked runs in one statement. A user
+# has at most one run per day, so each returned row is a different user.
+_LOCK_BATCH_SQL = text("""
+    UPDATE daily_runs r
+    SET is_locked = true, completed_at = now()
+    WHERE r.date = :day AND NOT r.is_locked
+      AND r.id IN (SELECT id FROM daily_runs WHERE date = :day AND NOT is_locked LIMIT :limit)
+    RETURNING r.id, r.user_id, r.total_xp, r.is_perfect
+""")
+
+# The batch's XP in one update; rows are locked FOR UPDATE beforehand
+_APPLY_XP_SQL = text("""
+    UPDATE users u
+    SET total_xp = v.total_xp, current_level = v.current_level, updated_at = now()
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:total_xp AS int[]), CAST(:current_level AS int[]))
+         AS v(user_id, total_xp, current_level)
+    WHERE u.id = v.user_id
+""")
+
+
+class AutoLockService:
+    """
+    Locks the runs users left unlocked when their day ended.
+
+    Only locked runs count toward `total_xp`, and a user can only lock a
+    run on its own day, so a forgotten lock used to lose the day's XP and
+    leave the run open forever. After rollover this locks all of the
+    previous day's unlocked runs set-based, BATCH_SIZE per transaction,
+    and does what the outbox does for a manual lock in bulk: one
+    aggregated XP update per batch, the daily stats rollup, period
+    leaderboards, sync stamps, and the weekly challenge unlock check for
+    the whole batch in one query.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def lock_day(
+        self,
+        day: Optional[date] = None,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """Lock every unlocked run of `day` (default yesterday) and award its XP"""
+        day = day or date.today() - timedelta(days=1)
+        batch_size = batch_size or settings.AUTO_LOCK_BATCH_SIZE
+
+        total_runs = self.db.query(func.count(models.DailyRun.id)).filter(
+            models.DailyRun.date == day,
+            models.DailyRun.is_locked == False
+        ).scalar()
+        self.db.commit()
+
+        stats = {
+            "date": day.isoformat(),
+            "runs_locked": 0,
+            "perfect_runs": 0,
+            "xp_awarded": 0,
+            "levels_gained": 0,
+            "challenges_unlocked": 0,
+            "batches": 0
+        }
+
+        while True:
+            runs = self.db.execute(_LOCK_BATCH_SQL, {"day": day, "limit": batch_size}).all()
+            if not runs:
+                break
+
+            batch = await self._apply_batch(day, runs)
+            self.db.commit()
+
+            stats["batches"] += 1
+            stats["runs_locked"] += len(runs)
+            for key in ("perfect_runs", "xp_awarded", "levels_gained", "challenges_unlocked"):
+                stats[key] += batch[key]
+            if progress:
+                progress(stats["runs_locked"], max(total_runs, stats["runs_locked"]))
+
+        return stats
+
+    async def _apply_batch(self, day: date, runs: List[Any]) -> Dict[str, int]:
+        """Side effects of one batch of just-locked runs; the caller commits"""
+        user_ids = [run.user_id for run in runs]
+        run_xp = {run.user_id: run.total_xp for run in runs}
+
+        users = self.db.query(
+            models.User.id, models.User.total_xp, models.User.current_level
+        ).filter(models.User.id.in_(user_ids)).order_by(models.User.id).with_for_update().all()
+
+        xp_before = np.fromiter((user.total_xp for user in users), dtype=np.int64, count=len(users))
+        xp_after = xp_before + np.fromiter((run_xp[user.id] for user in users), dtype=np.int64, count=len(users))
+        levels_after = GameLogic.calculate_level_batch(xp_after).tolist()
+        xp_after = xp_after.tolist()
+
+        self.db.execute(_APPLY_XP_SQL, {
+            "user_ids": [str(user.id) for user in users],
+            "total_xp": xp_after,
+            "current_level": levels_after
+        })
+
+        DailyStatsService(self.db).mark_locked(day, user_ids)
+        PeriodLeaderboardService(self.db).record_xp_bulk(day, [(run.user_id, run.total_xp) for run in runs])
+        SyncService(self.db).record_bulk_changes(sync_service.RUN, [(run.user_id, run.id) for run in runs])
+
+        unlocked = []
+        challenge = None
+        if day.weekday() < 5:
+            challenge, unlocked = await WeeklyChallengeService(self.db).unlock_batch(user_ids, day)
+            SyncService(self.db).record_bulk_changes(sync_service.CHALLENGE_COMPLETION, unlocked)
+
+        runs_by_user = {run.user_id: run for run in runs}
+        for user, total_xp, level in zip(users, xp_after, levels_after):
+            run = runs_by_user[user.id]
+            user_events.publish_after_commit(self.db, user.id, user_event_service.RUN_LOCKED, {
+                "run_id": run.id,
+                "run_date": day,
+                "total_xp": run.total_xp,
+                "is_perfect": run.is_perfect,
+                "auto_locked": True,
+                "user_total_xp": total_xp,
+                "current_level": level
+            })
+        for user_id, _ in unlocked:
+            user_events.publish_after_commit(self.db, user_id, user_event_service.CHALLENGE_UNLOCKED, {
+                "challenge_id": challenge.id,
+                "title": challenge.title,
+                "xp_reward": challenge.xp_reward
+            })
+
+        return {
+            "perfect_runs": sum(1 for run in runs if run.is_perfect),
+            "xp_awarded": sum(run.total_xp for run in runs),
+            "levels_gained": sum(level > user.current_level for user, level in zip(users, levels_after)),
+            "challenges_unlocked": len(unlocked)
+        }
@@ -1,10 +1,16 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Set
 from datetime import date, datetime
 from fastapi import HTTPException, status
 from app import models, schemas
-from app.game_logic import AntiCheat, StreakCalculator, GameLogic
+from app.config import settings
+from app.game_logic import AntiCheat
+from app.services.quest_catalog_cache import quest_catalog_cache
+from app.services.run_storage_service import RunStorageService
+from app.services.daily_stats_service import DailyStatsService
+from app.services import outbox_service
+from app.services.outbox_service import OutboxService
 import uuid
 
 class DailyRunService:
@@ -52,18 +58,17 @@ class DailyRunService:
         self.db.add(daily_run)
         self.db.flush() # Secure the ID for completions
         
-        # 4. Get and filter quests based on user categories
-        quests = await self._get_filtered_quests(goal_categories)
+        # 4. Pick a capped, weighted quest set for the user's categories
+        recent_quest_ids = await self._get_recently_completed_quest_ids(user_id, run_date)
+        quest_ids = quest_catalog_cache.select_quest_ids(
+            self.db,
+            goal_categories,
+            recent_quest_ids=recent_quest_ids
+        )
         
         # 5. Create quest completion trackers for this run
-        for quest in quests:
-            completion = models.DailyQuestCompletion(
-                daily_run_id=daily_run.id,
-                quest_id=quest.id,
-                completed=False,
-                xp_earned=0
-            )
-            self.db.add(completion)
+        RunStorageService(self.db).initialize_run(daily_run, quest_ids)
+        DailyStatsService(self.db).record_run(daily_run)
         
         self.db.commit()
         self.db.refresh(daily_run)
@@ -82,7 +87,7 @@ class DailyRunService:
         completion_id: uuid.UUID,
         user_id: uuid.UUID
     ) -> Dict:
-        """Toggle a specific quest status and update XP/Streaks"""
+        """Toggle a specific quest status; streaks are updated by the outbox worker"""
         
         # 1. Verify run ownership and editability
         run = self.db.query(models.DailyRun).filter(
@@ -97,31 +102,24 @@ class DailyRunService:
         if not can_edit:
             raise HTTPException(status_code=403, detail=reason)
         
-        # 2. Toggle the completion
-        completion = self.db.query(models.DailyQuestCompletion).filter(
-            models.DailyQuestCompletion.id == completion_id,
-            models.DailyQuestCompletion.daily_run_id == run_id
-        ).first()
+        # 2. Toggle the completion and 3. recalculate run totals
+        completion = RunStorageService(self.db).toggle_completion(run, completion_id)
         
         if not completion:
             raise HTTPException(status_code=404, detail="Completion record not found")
-            
-        quest = completion.quest
-        completion.completed = not completion.completed
-        completion.xp_earned = quest.base_xp if completion.completed else 0
-        completion.completed_at = datetime.utcnow() if completion.completed else None
-        
-        # 3. Recalculate Run totals
-        completions = self.db.query(models.DailyQuestCompletion).filter(
-            models.DailyQuestCompletion.daily_run_id == run_id
-        ).all()
-        run.total_xp = sum(c.xp_earned for c in completions)
-        run.is_perfect = all(c.completed for c in completions)
         
-        # 4. Handle Core Quest Streaks
-        if quest.is_core and completion.completed:
-            await self._update_streak(user_id, quest.id, run.date)
-            
+        # 4. Rollups, streaks, activity and notifications run in the outbox worker
+        OutboxService(self.db).record(outbox_service.QUEST_TOGGLED, user_id, {
+            "run_id": run.id,
+            "run_date": run.date,
+            "completion_id": completion.completion_id,
+            "quest_id": completion.quest.id,
+            "completed": completion.completed,
+            "xp_earned": completion.xp_earned,
+            "run_total_xp": run.total_xp,
+            "is_perfect": run.is_perfect,
+            "occurred_on": date.today()
+        })
         self.db.commit()
         return {
             "completed": completion.completed,
@@ -146,57 +144,23 @@ class DailyRunService:
         run.is_locked = True
         run.completed_at = datetime.utcnow()
         
-        # Update User level info
-        user = run.user
-        total_xp = self.db.query(models.func.sum(models.DailyRun.total_xp)).filter(
-            models.DailyRun.user_id == user_id,
-            models.DailyRun.is_locked == True
-        ).scalar() or 0
-        
-        user.total_xp = total_xp
-        user.current_level = GameLogic.calculate_level(total_xp)
-        
+        # Level gains, leaderboards and the weekly unlock run in the outbox worker
+        OutboxService(self.db).record(outbox_service.RUN_LOCKED, user_id, {
+            "run_id": run.id,
+            "run_date": run.date,
+            "total_xp": run.total_xp,
+            "is_perfect": run.is_perfect,
+            "completed_at": run.completed_at,
+            "occurred_on": date.today()
+        })
         self.db.commit()
         return run
 
-    async def _get_filtered_quests(self, categories: List[str]) -> List[models.Quest]:
-        """Helper to find relevant quests based on user preferences"""
-        query = self.db.query(models.Quest).filter(models.Quest.is_active == True)
+    async def _get_recently_completed_quest_ids(self, user_id: uuid.UUID, before_date: date) -> Set[uuid.UUID]:
+        """Quests completed in the last QUEST_RECENCY_DAYS days, used to down-weight repeats"""
+        if settings.DAILY_RUN_MAX_QUESTS <= 0:
+            return set()
         
-        if categories:
-            query = query.filter(models.Quest.category.in_(categories))
-            
-        quests = query.all()
-        if not quests: # Fallback
-            quests = self.db.query(models.Quest).filter(
-                models.Quest.is_active == True,
-                models.Quest.is_core == True
-            ).all()
-        return quests
-
-    async def _update_streak(self, user_id: uuid.UUID, quest_id: uuid.UUID, completion_date: date):
-        """Internal logic for streak calculation"""
-        streak = self.db.query(models.Streak).filter(
-            models.Streak.user_id == user_id,
-            models.Streak.quest_id == quest_id
-        ).first()
-        
-        if streak:
-            new_curr, new_long = StreakCalculator.update_streak(
-                streak.current_streak,
-                streak.longest_streak,
-                streak.last_completed_date,
-                completion_date
-            )
-            streak.current_streak = new_curr
-            streak.longest_streak = new_long
-            streak.last_completed_date = completion_date
-        else:
-            new_streak = models.Streak(
-                user_id=user_id,
-                quest_id=quest_id,
-                current_streak=1,
-                longest_streak=1,
-                last_completed_date=completion_date
-            )
-            self.db.add(new_streak)
\ No newline at end of file
+        return RunStorageService(self.db).get_recently_completed_quest_ids(
+            user_id, before_date, settings.QUEST_RECENCY_DAYS
+        )
@@ -0,0 +1,221 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, func, and_
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, Dict, List, Optional
+from datetime import date
+import uuid
+
+from app import models
+from app.services.run_storage_service import RunStorageService, CompletionView
+
+
+# Recomputes rollup rows from the raw runs (row and compact layouts)
+_REBUILD_SQL = """
+    WITH selected_runs AS (
+        SELECT id, user_id, date, total_xp, is_perfect, is_locked, quest_ids, completion_bits
+        FROM daily_runs
+        WHERE {run_filter}
+    ),
+    slots AS (
+        SELECT r.user_id, r.date, c.quest_id, c.completed
+        FROM selected_runs r
+        JOIN daily_quest_completions c ON c.daily_run_id = r.id AND c.run_date = r.date
+        UNION ALL
+        SELECT r.user_id, r.date, s.quest_id, get_bit(r.completion_bits, (s.ord - 1)::int) = 1
+        FROM selected_runs r
+        CROSS JOIN LATERAL unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+        WHERE r.quest_ids IS NOT NULL
+    ),
+    per_category AS (
+        SELECT slots.user_id, slots.date, q.category,
+               count(*) AS total,
+               count(*) FILTER (WHERE slots.completed) AS completed
+        FROM slots JOIN quests q ON q.id = slots.quest_id
+        GROUP BY slots.user_id, slots.date, q.category
+    ),
+    categories AS (
+        SELECT user_id, date,
+               jsonb_object_agg(category, jsonb_build_object('total', total, 'completed', completed)) AS counts
+        FROM per_category
+        GROUP BY user_id, date
+    )
+    INSERT INTO user_daily_stats (id, user_id, date, total_xp, is_perfect, is_locked, category_counts)
+    SELECT gen_random_uuid(), r.user_id, r.date, r.total_xp, r.is_perfect, r.is_locked,
+           coalesce(categories.counts, '{{}}'::jsonb)::json
+    FROM selected_runs r
+    LEFT JOIN categories ON categories.user_id = r.user_id AND categories.date = r.date
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        total_xp = excluded.total_xp,
+        is_perfect = excluded.is_perfect,
+        is_locked = excluded.is_locked,
+        category_counts = excluded.category_counts,
+        updated_at = now()
+"""
+
+
+# Category totals over a window: rollup days plus compacted months, summed
+# in the database so only one row per category comes back
+_CATEGORY_TOTALS_SQL = text("""
+    SELECT counts.key AS category,
+           sum((counts.value ->> 'total')::int) AS total,
+           sum((counts.value ->> 'completed')::int) AS completed
+    FROM (
+        SELECT c.key, c.value
+        FROM user_daily_stats s
+        CROSS JOIN LATERAL json_each(s.category_counts) c
+        WHERE s.user_id = :user_id AND s.date >= :start_date AND s.date <= :end_date
+        UNION ALL
+        SELECT c.key, c.value
+        FROM user_monthly_summaries m
+        CROSS JOIN LATERAL json_each(m.category_counts) c
+        WHERE m.user_id = :user_id AND m.month >= date_trunc('month', CAST(:start_date AS date))
+    ) counts
+    GROUP BY counts.key
+""")
+
+
+class DailyStatsService:
+    """
+    Maintains `user_daily_stats`, one row per user and run date holding the
+    run's XP, perfect and locked flags and per-category completion counts.
+
+    Writers call `record_run` after changing a run (create, toggle, lock) so
+    the stats endpoints can answer with one range scan instead of loading
+    runs and joining completions. `rebuild` recomputes rows from the raw
+    runs in bulk.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def category_counts(completions: List[CompletionView]) -> Dict[str, Dict[str, int]]:
+        counts: Dict[str, Dict[str, int]] = {}
+        for completion in completions:
+            entry = counts.setdefault(completion.quest.category, {"total": 0, "completed": 0})
+            entry["total"] += 1
+            entry["completed"] += int(completion.completed)
+        return counts
+
+    def record_run(self, run: models.DailyRun, completions: Optional[List[CompletionView]] = None) -> None:
+        """Upsert the rollup row for a run inside the caller's transaction"""
+        if completions is None:
+            # New completion rows may still be pending (autoflush is off)
+            self.db.flush()
+            completions = RunStorageService(self.db).get_completions(run)
+
+        values = {
+            "total_xp": run.total_xp or 0,
+            "is_perfect": bool(run.is_perfect),
+            "is_locked": bool(run.is_locked),
+            "category_counts": self.category_counts(completions)
+        }
+        statement = insert(models.UserDailyStats).values(
+            id=uuid.uuid4(), user_id=run.user_id, date=run.date, **values
+        )
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={**values, "updated_at": func.now()}
+        ))
+
+    def mark_locked(self, day: date, user_ids: List[uuid.UUID]) -> int:
+        """Flag these users' rollup rows for `day` locked, after a set-based lock of their runs"""
+        if not user_ids:
+            return 0
+        return self.db.query(models.UserDailyStats).filter(
+            models.UserDailyStats.date == day,
+            models.UserDailyStats.user_id.in_(user_ids)
+        ).update({"is_locked": True, "updated_at": func.now()}, synchronize_session=False)
+
+    def get_days(self, user_id: uuid.UUID, start_date: date, end_date: date) -> List[Any]:
+        """
+        (date, total_xp, is_locked, is_perfect) per day in the window, oldest
+        first. Only indexed columns are selected: an index-only range scan,
+        with no runs or completions loaded.
+        """
+        return self.db.query(
+            models.UserDailyStats.date,
+            models.UserDailyStats.total_xp,
+            models.UserDailyStats.is_locked,
+            models.UserDailyStats.is_perfect
+        ).filter(
+            models.UserDailyStats.user_id == user_id,
+            models.UserDailyStats.date >= start_date,
+            models.UserDailyStats.date <= end_date
+        ).order_by(models.UserDailyStats.date).all()
+
+    def get_category_totals(self, user_id: uuid.UUID, start_date: date, end_date: date) -> Dict[str, Dict[str, int]]:
+        """
+        Per-category totals from the rollup, including compacted months
+        overlapping the window (which count in full)
+        """
+        rows = self.db.execute(_CATEGORY_TOTALS_SQL, {
+            "user_id": user_id, "start_date": start_date, "end_date": end_date
+        }).all()
+        return {row.category: {"total": int(row.total), "completed": int(row.completed)} for row in rows}
+
+    def get_category_totals_from_runs(self, user_id: uuid.UUID, start_date: date, end_date: date) -> Dict[str, Dict[str, int]]:
+        """
+        Per-category totals straight from the raw runs, the source the rollup
+        is derived from. Row-layout completions are grouped in the database
+        (idx_completion_run_covering keeps it an index-only join).
+        """
+        rows = self.db.query(
+            models.Quest.category,
+            func.count().label("total"),
+            func.count().filter(models.DailyQuestCompletion.completed == True).label("completed")
+        ).select_from(models.DailyRun).join(
+            models.DailyQuestCompletion,
+            and_(
+                models.DailyQuestCompletion.daily_run_id == models.DailyRun.id,
+                models.DailyQuestCompletion.run_date == models.DailyRun.date
+            )
+        ).join(
+            models.Quest,
+            models.DailyQuestCompletion.quest_id == models.Quest.id
+        ).filter(
+            models.DailyRun.user_id == user_id,
+            models.DailyRun.date >= start_date,
+            models.DailyRun.date <= end_date,
+            models.DailyQuestCompletion.run_date >= start_date,
+            models.DailyQuestCompletion.run_date <= end_date
+        ).group_by(models.Quest.category).all()
+
+        totals = {row.category: {"total": row.total, "completed": row.completed} for row in rows}
+
+        # Compact runs keep their completions on the run row itself
+        compact_runs = self.db.query(models.DailyRun).filter(
+            models.DailyRun.user_id == user_id,
+            models.DailyRun.date >= start_date,
+            models.DailyRun.date <= end_date,
+            models.DailyRun.is_compact
+        ).all()
+        for completions in RunStorageService(self.db).get_completions_for_runs(compact_runs).values():
+            for category, counts in self.category_counts(completions).items():
+                entry = totals.setdefault(category, {"total": 0, "completed": 0})
+                entry["total"] += counts["total"]
+                entry["completed"] += counts["completed"]
+
+        return totals
+
+    def rebuild(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """Recompute rollup rows from raw runs; returns the number of rows written"""
+        conditions = ["true"]
+        params = {}
+        if user_id is not None:
+            conditions.append("user_id = :user_id")
+            params["user_id"] = user_id
+        if start_date is not None:
+            conditions.append("date >= :start_date")
+            params["start_date"] = start_date
+        if end_date is not None:
+            conditions.append("date <= :end_date")
+            params["end_date"] = end_date
+
+        sql = _REBUILD_SQL.format(run_filter=" AND ".join(conditions))
+        return self.db.execute(text(sql), params).rowcount
@@ -0,0 +1,150 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+from datetime import date
+import time
+
+import numpy as np
+
+from app.game_logic import GameLogic
+from app.services.xp_decay_service import XPDecayService
+
+_SNAPSHOT_SQL = text("SELECT total_xp, CAST(:today AS date) - last_activity_date AS days_inactive FROM users")
+
+
+class DecayPolicy(NamedTuple):
+    decay_rate: float
+    grace_period_days: int
+
+    @classmethod
+    def current(cls) -> "DecayPolicy":
+        return cls(XPDecayService.DECAY_RATE, XPDecayService.GRACE_PERIOD_DAYS)
+
+
+class DecaySimulationService:
+    """
+    What-if analysis of decay policies over the whole user base.
+
+    Every user's (total_xp, days inactive) is loaded once into two arrays,
+    then each candidate policy replays the nightly decay job over the next
+    N days, vectorized across users, with the job's own formula. Nobody is
+    assumed to come back, so the results are an upper bound on what the
+    policy takes. Each horizon reports the distribution of XP lost and of
+    levels dropped.
+    """
+
+    PERCENTILES = (50, 90, 99)
+    # Lower edges of the levels-dropped histogram buckets
+    LEVEL_DROP_BUCKETS = (0, 1, 2, 3, 6, 11)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_snapshot(self, today: Optional[date] = None, batch_size: int = 100_000) -> Tuple[np.ndarray, np.ndarray]:
+        """Every user's total XP and days inactive as of `today`, streamed into arrays"""
+        rows = self.db.execute(
+            _SNAPSHOT_SQL,
+            {"today": today or date.today()},
+            execution_options={"stream_results": True, "yield_per": batch_size}
+        )
+        xp_chunks, inactive_chunks = [], []
+        for batch in rows.partitions():
+            xp_chunks.append(np.fromiter((row.total_xp for row in batch), dtype=np.int64, count=len(batch)))
+            inactive_chunks.append(np.fromiter((row.days_inactive for row in batch), dtype=np.int64, count=len(batch)))
+
+        if not xp_chunks:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(xp_chunks), np.concatenate(inactive_chunks)
+
+    def run(self, policies: Sequence[DecayPolicy], horizons: Sequence[int], today: Optional[date] = None) -> Dict[str, Any]:
+        """Load the user base once and simulate every policy on it"""
+        today = today or date.today()
+        started = time.perf_counter()
+        total_xp, days_inactive = self.load_snapshot(today)
+        load_seconds = time.perf_counter() - started
+
+        results = []
+        for policy in policies:
+            started = time.perf_counter()
+            outcome = self.simulate(total_xp, days_inactive, policy, horizons)
+            results.append({
+                **policy._asdict(),
+                "is_current": policy == DecayPolicy.current(),
+                "horizons": outcome,
+                "seconds": round(time.perf_counter() - started, 3)
+            })
+
+        return {
+            "as_of": today.isoformat(),
+            "users": len(total_xp),
+            "load_seconds": round(load_seconds, 3),
+            "policies": results
+        }
+
+    @classmethod
+    def simulate(
+        cls,
+        total_xp: np.ndarray,
+        days_inactive: np.ndarray,
+        policy: DecayPolicy,
+        horizons: Sequence[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Run the nightly decay for max(horizons) days without anyone coming
+        back, summarizing the outcome after each horizon.
+        """
+        horizons = sorted(set(horizons))
+        xp_before = np.asarray(total_xp, dtype=np.int64)
+        levels_before = GameLogic.calculate_level_batch(xp_before)
+
+        xp = xp_before.copy()
+        summaries = {}
+        for day in range(1, horizons[-1] + 1 if horizons else 1):
+            inactive = days_inactive + day
+            xp_lost = XPDecayService.calculate_xp_lost_batch(xp, inactive, decay_rate=policy.decay_rate)
+            xp = np.where(inactive > policy.grace_period_days, np.maximum(0, xp - xp_lost), xp)
+            if day in horizons:
+                summaries[day] = cls._summarize(xp_before, xp, levels_before)
+        return summaries
+
+    @classmethod
+    def _summarize(cls, xp_before: np.ndarray, xp_after: np.ndarray, levels_before: np.ndarray) -> Dict[str, Any]:
+        xp_lost = xp_before - xp_after
+        levels_dropped = levels_before - GameLogic.calculate_level_batch(xp_after)
+        affected = xp_lost > 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_lost = xp_lost[affected] / xp_before[affected] * 100
+
+        edges = list(cls.LEVEL_DROP_BUCKETS) + [np.iinfo(np.int64).max]
+        counts, _ = np.histogram(levels_dropped, bins=edges)
+
+        return {
+            "users_affected": int(affected.sum()),
+            "xp_lost_total": int(xp_lost.sum()),
+            "xp_lost": cls._distribution(xp_lost[affected]),
+            "percent_lost": cls._distribution(percent_lost),
+            "users_dropping_levels": int((levels_dropped > 0).sum()),
+            "levels_dropped": {
+                cls._bucket_label(low, high): int(count)
+                for low, high, count in zip(edges, edges[1:], counts)
+            }
+        }
+
+    @classmethod
+    def _distribution(cls, values: np.ndarray) -> Dict[str, float]:
+        if len(values) == 0:
+            return {}
+        points = np.percentile(values, cls.PERCENTILES)
+        return {
+            "mean": round(float(values.mean()), 2),
+            **{f"p{p}": round(float(point), 2) for p, point in zip(cls.PERCENTILES, points)},
+            "max": round(float(values.max()), 2)
+        }
+
+    @staticmethod
+    def _bucket_label(low: int, high: int) -> str:
+        if high == np.iinfo(np.int64).max:
+            return f"{low}+"
+        return str(low) if high - low == 1 else f"{low}-{high - 1}"
+
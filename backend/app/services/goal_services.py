@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
+from datetime import date
 from fastapi import HTTPException, status
 from app import models, schemas
+from app.services import outbox_service
+from app.services.outbox_service import OutboxService
 import uuid
 
 class GoalService:
@@ -69,16 +72,19 @@ class GoalService:
         # Check if all milestones for this goal are now complete
         parent_goal = milestone.goal
         all_milestones = parent_goal.milestones
+        was_completed = parent_goal.is_completed
         parent_goal.is_completed = all(m.is_completed for m in all_milestones)
         
-        # Award XP if goal just completed
-        if parent_goal.is_completed:
-            user = self.db.query(models.User).filter(models.User.id == user_uuid).first()
-            if user:
-                user.total_xp += parent_goal.xp_reward
-                # Update level based on new XP
-                from app.game_logic import GameLogic
-                user.current_level = GameLogic.calculate_level(user.total_xp)
+        # XP for a just-completed goal is awarded by the outbox worker
+        OutboxService(self.db).record(outbox_service.MILESTONE_TOGGLED, user_uuid, {
+            "goal_id": parent_goal.id,
+            "milestone_id": milestone.id,
+            "completed": milestone.is_completed,
+            "goal_completed": parent_goal.is_completed,
+            "goal_was_completed": was_completed,
+            "xp_reward": parent_goal.xp_reward,
+            "occurred_on": date.today()
+        })
         
         self.db.commit()
         self.db.refresh(parent_goal)
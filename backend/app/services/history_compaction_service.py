@@ -0,0 +1,186 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, func
+from typing import Dict, List, Optional
+from datetime import date, timedelta
+import uuid
+
+from app import models
+from app.config import settings
+from app.services.partition_service import PartitionService
+
+
+# Rolls one month of raw runs (row and compact layouts) up per user. A month
+# is pruned in the same transaction, so a conflict means late rows arrived
+# after it was compacted and they are added to the existing summary.
+# get_bit() numbers bits LSB-first within each byte, same as the bitset encoder.
+_SUMMARIZE_MONTH_SQL = text("""
+    WITH slots AS (
+        SELECT r.user_id, c.quest_id, c.completed
+        FROM daily_quest_completions c
+        JOIN daily_runs r ON r.id = c.daily_run_id AND r.date = c.run_date
+        WHERE r.date >= :start AND r.date < :end
+          AND c.run_date >= :start AND c.run_date < :end
+        UNION ALL
+        SELECT r.user_id, s.quest_id, get_bit(r.completion_bits, (s.ord - 1)::int) = 1
+        FROM daily_runs r
+        CROSS JOIN LATERAL unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+        WHERE r.date >= :start AND r.date < :end AND r.quest_ids IS NOT NULL
+    ),
+    per_category AS (
+        SELECT slots.user_id, q.category,
+               count(*) AS total,
+               count(*) FILTER (WHERE slots.completed) AS completed
+        FROM slots JOIN quests q ON q.id = slots.quest_id
+        GROUP BY slots.user_id, q.category
+    ),
+    categories AS (
+        SELECT user_id,
+               jsonb_object_agg(category, jsonb_build_object('total', total, 'completed', completed)) AS counts
+        FROM per_category
+        GROUP BY user_id
+    ),
+    runs AS (
+        SELECT user_id,
+               count(*) AS total_runs,
+               count(*) FILTER (WHERE is_locked) AS locked_runs,
+               coalesce(sum(total_xp), 0) AS total_xp,
+               coalesce(sum(total_xp) FILTER (WHERE is_locked), 0) AS locked_xp,
+               count(*) FILTER (WHERE is_perfect) AS perfect_days
+        FROM daily_runs
+        WHERE date >= :start AND date < :end
+        GROUP BY user_id
+    )
+    INSERT INTO user_monthly_summaries
+        (id, user_id, month, total_runs, locked_runs, total_xp, locked_xp, perfect_days, category_counts)
+    SELECT gen_random_uuid(), runs.user_id, :start, runs.total_runs, runs.locked_runs,
+           runs.total_xp, runs.locked_xp, runs.perfect_days,
+           coalesce(categories.counts, '{}'::jsonb)::json
+    FROM runs LEFT JOIN categories ON categories.user_id = runs.user_id
+    ON CONFLICT (user_id, month) DO UPDATE SET
+        total_runs = user_monthly_summaries.total_runs + excluded.total_runs,
+        locked_runs = user_monthly_summaries.locked_runs + excluded.locked_runs,
+        total_xp = user_monthly_summaries.total_xp + excluded.total_xp,
+        locked_xp = user_monthly_summaries.locked_xp + excluded.locked_xp,
+        perfect_days = user_monthly_summaries.perfect_days + excluded.perfect_days,
+        category_counts = (
+            SELECT coalesce(jsonb_object_agg(k, jsonb_build_object(
+                       'total', coalesce((o.counts -> k ->> 'total')::int, 0)
+                                + coalesce((n.counts -> k ->> 'total')::int, 0),
+                       'completed', coalesce((o.counts -> k ->> 'completed')::int, 0)
+                                    + coalesce((n.counts -> k ->> 'completed')::int, 0)
+                   )), '{}'::jsonb)::json
+            FROM (SELECT user_monthly_summaries.category_counts::jsonb AS counts) o,
+                 (SELECT excluded.category_counts::jsonb AS counts) n,
+                 LATERAL (SELECT jsonb_object_keys(o.counts)
+                          UNION SELECT jsonb_object_keys(n.counts)) AS keys(k)
+        )
+""")
+
+# Completions go with their run through the ON DELETE CASCADE foreign key
+_DELETE_BATCH_SQL = text("""
+    DELETE FROM daily_runs
+    WHERE (id, date) IN (
+        SELECT id, date FROM daily_runs
+        WHERE date >= :start AND date < :end
+        LIMIT :batch_size
+    )
+""")
+
+_DELETE_DAILY_STATS_SQL = text(
+    "DELETE FROM user_daily_stats WHERE date >= :start AND date < :end"
+)
+
+
+class HistoryCompactionService:
+    """
+    Archives cold run history into per-user monthly summaries.
+
+    Whole months older than HISTORY_COMPACTION_HORIZON_DAYS are rolled up
+    into `user_monthly_summaries` (XP, perfect days, per-category counts)
+    and their raw runs and completions are removed in the same
+    transaction: monthly partitions are detached (left as plain tables for
+    archiving) when the tables are partitioned, rows are deleted in
+    batches otherwise. A run is therefore never in a summary and in
+    daily_runs at once, and readers simply add the two together.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def compact(self, horizon_days: Optional[int] = None, today: Optional[date] = None) -> Dict:
+        """Summarize and prune every fully cold month; returns job stats"""
+        if horizon_days is None:
+            horizon_days = settings.HISTORY_COMPACTION_HORIZON_DAYS
+        today = today or date.today()
+
+        cutoff = PartitionService.month_start(today - timedelta(days=horizon_days))
+        first_run = self.db.query(func.min(models.DailyRun.date)).filter(
+            models.DailyRun.date < cutoff
+        ).scalar()
+
+        stats = {
+            "cutoff": cutoff.isoformat(),
+            "months_compacted": 0,
+            "summaries_written": 0,
+            "runs_deleted": 0,
+            "partitions_detached": []
+        }
+        if first_run is None:
+            return stats
+
+        partitions = PartitionService(self.db)
+        partitioned = partitions.is_partitioned("daily_runs")
+
+        month = PartitionService.month_start(first_run)
+        while month < cutoff:
+            next_month = PartitionService.add_months(month, 1)
+            bounds = {"start": month, "end": next_month}
+
+            # One transaction per month: summary and pruning land together,
+            # so an interrupted job never counts a month twice
+            stats["summaries_written"] += self.db.execute(_SUMMARIZE_MONTH_SQL, bounds).rowcount
+            if partitioned:
+                stats["partitions_detached"] += partitions.detach_month(month)
+            # Without partitions this is the whole month; with them only
+            # rows that fell into the default partition are left
+            stats["runs_deleted"] += self._delete_month(bounds)
+            # The summary supersedes the month's daily rollup rows too
+            self.db.execute(_DELETE_DAILY_STATS_SQL, bounds)
+            self.db.commit()
+
+            stats["months_compacted"] += 1
+            month = next_month
+
+        return stats
+
+    def get_summaries(self, user_id: uuid.UUID, start_date: date) -> List[models.UserMonthlySummary]:
+        """
+        Summaries for months overlapping [start_date, today], oldest first.
+        Compacted months have no daily detail, so they count in full.
+        """
+        return self.db.query(models.UserMonthlySummary).filter(
+            models.UserMonthlySummary.user_id == user_id,
+            models.UserMonthlySummary.month >= PartitionService.month_start(start_date)
+        ).order_by(models.UserMonthlySummary.month).all()
+
+    def get_locked_xp_total(self, user_id: uuid.UUID) -> int:
+        """Total XP from locked runs, including compacted months"""
+        archived_xp = self.db.query(func.coalesce(func.sum(models.UserMonthlySummary.locked_xp), 0)).filter(
+            models.UserMonthlySummary.user_id == user_id
+        ).scalar()
+
+        query = self.db.query(func.coalesce(func.sum(models.DailyRun.total_xp), 0)).filter(
+            models.DailyRun.user_id == user_id,
+            models.DailyRun.is_locked == True
+        )
+        return int(archived_xp) + int(query.scalar())
+
+    def _delete_month(self, bounds: Dict) -> int:
+        """Delete a month's runs in bounded statements; the caller commits"""
+        batch_size = settings.HISTORY_COMPACTION_BATCH_SIZE
+        deleted = 0
+        while True:
+            batch = self.db.execute(_DELETE_BATCH_SQL, {**bounds, "batch_size": batch_size}).rowcount
+            deleted += batch
+            if batch < batch_size:
+                return deleted
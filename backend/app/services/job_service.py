@@ -0,0 +1,446 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import zlib
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.services import sync_service
+from app.services.auto_lock_service import AutoLockService
+from app.services.history_compaction_service import HistoryCompactionService
+from app.services.partition_service import PartitionService
+from app.services.period_leaderboard_service import PeriodLeaderboardService
+from app.services.reconciliation_service import ReconciliationService
+from app.services.streak_rebuild_service import StreakRebuildService
+from app.services.streak_service import StreakService
+from app.services.sync_service import SyncService
+from app.services.weekly_challenge_service import WeeklyChallengeService
+from app.services.xp_decay_service import XPDecayService
+from app.utils.cron import CronSchedule
+
+logger = logging.getLogger(__name__)
+
+
+class JobProgress:
+    """
+    Progress reporter handed to a running job: call it with (done, total).
+
+    Writes go through their own short sessions, so progress is visible
+    while the job's transaction is still open; they are throttled to one
+    every FLUSH_SECONDS.
+    """
+
+    FLUSH_SECONDS = 2.0
+
+    def __init__(self, run_id: uuid.UUID):
+        self.run_id = run_id
+        self.done = 0
+        self.total: Optional[int] = None
+        self._flushed_at = 0.0
+
+    def __call__(self, done: int, total: Optional[int] = None) -> None:
+        self.done = done
+        if total is not None:
+            self.total = total
+        if time.monotonic() - self._flushed_at >= self.FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(models.JobRun).filter(models.JobRun.id == self.run_id).update(
+                {"progress_done": self.done, "progress_total": self.total},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        self._flushed_at = time.monotonic()
+
+
+# A job gets its own session and a progress reporter and returns its stats
+JobFunction = Callable[[Session, JobProgress], Awaitable[Dict[str, Any]]]
+
+
+class Job(NamedTuple):
+    name: str
+    description: str
+    run: JobFunction
+    schedule_setting: str  # Settings attribute holding the cron expression
+
+    @property
+    def schedule(self) -> Optional[CronSchedule]:
+        expression = getattr(settings, self.schedule_setting)
+        return CronSchedule(expression) if expression else None
+
+
+class JobAlreadyRunning(Exception):
+    pass
+
+
+class JobService:
+    """
+    Persistent background jobs.
+
+    Every execution is a `job_runs` row (pending -> running -> succeeded /
+    failed, or skipped), so runs survive the request that started them and
+    their progress can be polled. A job runs in its own thread with its own
+    session, under a Postgres advisory lock keyed by the job name: however
+    many replicas trigger it, only one instance runs at a time.
+    """
+
+    # First key of the two-key advisory lock; the second is the job's name hash
+    LOCK_NAMESPACE = 0x51E57
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- Starting runs ----
+
+    def trigger(self, job_name: str) -> models.JobRun:
+        """Start a job now in a background thread; raises JobAlreadyRunning"""
+        job = JOBS[job_name]
+        active = self.db.query(models.JobRun).filter(
+            models.JobRun.job_name == job.name,
+            models.JobRun.status.in_(("pending", "running"))
+        ).first()
+        if active is not None and self._is_locked(job.name):
+            raise JobAlreadyRunning(f"{job.name} is already running (run {active.id})")
+
+        job_run = models.JobRun(job_name=job.name, trigger="manual", status="pending")
+        self.db.add(job_run)
+        self.db.commit()
+        self.db.refresh(job_run)
+
+        _start_thread(job, job_run.id)
+        return job_run
+
+    def claim_slot(self, job: Job, scheduled_for: datetime) -> Optional[uuid.UUID]:
+        """Record a scheduled run; None if another replica already claimed the slot"""
+        run_id = self.db.execute(
+            insert(models.JobRun).values(
+                id=uuid.uuid4(),
+                job_name=job.name,
+                trigger="schedule",
+                status="pending",
+                scheduled_for=scheduled_for
+            ).on_conflict_do_nothing().returning(models.JobRun.id)
+        ).scalar()
+        self.db.commit()
+        return run_id
+
+    # ---- Reads ----
+
+    def get_run(self, run_id: uuid.UUID) -> Optional[models.JobRun]:
+        return self.db.query(models.JobRun).filter(models.JobRun.id == run_id).first()
+
+    def get_runs(self, job_name: str, limit: int) -> List[models.JobRun]:
+        return self.db.query(models.JobRun).filter(
+            models.JobRun.job_name == job_name
+        ).order_by(models.JobRun.created_at.desc()).limit(limit).all()
+
+    def get_last_run(self, job_name: str) -> Optional[models.JobRun]:
+        runs = self.get_runs(job_name, 1)
+        return runs[0] if runs else None
+
+    @staticmethod
+    def describe_run(job_run: models.JobRun) -> Dict[str, Any]:
+        """Status with progress and throughput (items per second over the run so far)"""
+        elapsed = None
+        if job_run.started_at is not None:
+            end = job_run.finished_at or datetime.now(job_run.started_at.tzinfo)
+            elapsed = max((end - job_run.started_at).total_seconds(), 0.0)
+
+        throughput = round(job_run.progress_done / elapsed, 2) if elapsed else None
+        eta_seconds = None
+        if job_run.status == "running" and throughput and job_run.progress_total:
+            eta_seconds = round(max(job_run.progress_total - job_run.progress_done, 0) / throughput, 1)
+
+        return {
+            "id": job_run.id,
+            "job_name": job_run.job_name,
+            "trigger": job_run.trigger,
+            "status": job_run.status,
+            "scheduled_for": job_run.scheduled_for,
+            "progress_done": job_run.progress_done,
+            "progress_total": job_run.progress_total,
+            "percent": round(job_run.progress_done / job_run.progress_total * 100, 1) if job_run.progress_total else None,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "items_per_second": throughput,
+            "eta_seconds": eta_seconds,
+            "result": job_run.result,
+            "error": job_run.error,
+            "created_at": job_run.created_at,
+            "started_at": job_run.started_at,
+            "finished_at": job_run.finished_at
+        }
+
+    # ---- Execution ----
+
+    @classmethod
+    def execute(cls, job: Job, run_id: uuid.UUID) -> None:
+        """Run a claimed job_runs row to completion (blocking)"""
+        lock_connection = engine.connect()
+        acquired = False
+        try:
+            acquired = lock_connection.execute(
+                text("SELECT pg_try_advisory_lock(:namespace, :key)"),
+                {"namespace": cls.LOCK_NAMESPACE, "key": cls._lock_key(job.name)}
+            ).scalar()
+            lock_connection.commit()
+
+            db = SessionLocal()
+            try:
+                job_run = db.query(models.JobRun).filter(models.JobRun.id == run_id).one()
+                if not acquired:
+                    job_run.status = "skipped"
+                    job_run.error = "Another instance of this job is running"
+                    job_run.finished_at = datetime.utcnow()
+                    db.commit()
+                    return
+
+                # We hold the lock, so any other "running" row is left over from a dead worker
+                db.query(models.JobRun).filter(
+                    models.JobRun.job_name == job.name,
+                    models.JobRun.status == "running"
+                ).update({
+                    "status": "failed",
+                    "error": "Abandoned (worker stopped before finishing)",
+                    "finished_at": datetime.utcnow()
+                }, synchronize_session=False)
+                job_run.status = "running"
+                job_run.started_at = datetime.utcnow()
+                db.commit()
+            finally:
+                db.close()
+
+            cls._run(job, run_id)
+        finally:
+            try:
+                if acquired:
+                    lock_connection.execute(
+                        text("SELECT pg_advisory_unlock(:namespace, :key)"),
+                        {"namespace": cls.LOCK_NAMESPACE, "key": cls._lock_key(job.name)}
+                    )
+                    lock_connection.commit()
+            finally:
+                lock_connection.close()
+
+    @staticmethod
+    def _run(job: Job, run_id: uuid.UUID) -> None:
+        progress = JobProgress(run_id)
+        db = SessionLocal()
+        try:
+            result, error = asyncio.run(job.run(db, progress)), None
+        except Exception as e:
+            db.rollback()
+            logger.exception("Job %s failed", job.name)
+            result, error = None, repr(e)[:2000]
+        finally:
+            db.close()
+
+        db = SessionLocal()
+        try:
+            db.query(models.JobRun).filter(models.JobRun.id == run_id).update({
+                "status": "failed" if error else "succeeded",
+                "progress_done": progress.done,
+                "progress_total": progress.total,
+                "result": result,
+                "error": error,
+                "finished_at": datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _is_locked(self, job_name: str) -> bool:
+        """True while some session holds the job's advisory lock"""
+        return bool(self.db.execute(text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_locks
+                WHERE locktype = 'advisory' AND granted
+                  AND classid = :namespace AND objid = :key AND objsubid = 2
+            )
+        """), {"namespace": self.LOCK_NAMESPACE, "key": self._lock_key(job_name) & 0xFFFFFFFF}).scalar())
+
+    @staticmethod
+    def _lock_key(job_name: str) -> int:
+        # Signed 32-bit, as the two-key advisory lock functions expect
+        key = zlib.crc32(job_name.encode())
+        return key - (1 << 32) if key >= (1 << 31) else key
+
+
+def _start_thread(job: Job, run_id: uuid.UUID) -> None:
+    threading.Thread(
+        target=JobService.execute,
+        args=(job, run_id),
+        name=f"job-{job.name}",
+        daemon=True
+    ).start()
+
+
+class JobScheduler:
+    """
+    Fires jobs on their cron schedules (server local time).
+
+    Each replica runs a scheduler; a slot is claimed through the unique
+    (job_name, scheduled_for) index, so exactly one replica runs it. Slots
+    that pass while no scheduler is running are not replayed; trigger the
+    job by hand instead.
+    """
+
+    TICK_SECONDS = 20
+
+    def __init__(self):
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.TICK_SECONDS)
+            self._thread = None
+
+    @staticmethod
+    def next_run_at(job: Job, after: Optional[datetime] = None) -> Optional[datetime]:
+        schedule = job.schedule
+        return schedule.next_after(after or datetime.now()) if schedule else None
+
+    def _loop(self) -> None:
+        checked_at = datetime.now()
+        while not self._stopping.wait(self.TICK_SECONDS):
+            now = datetime.now()
+            for job in JOBS.values():
+                try:
+                    self._fire_due(job, checked_at, now)
+                except Exception:
+                    logger.exception("Could not schedule job %s", job.name)
+            checked_at = now
+
+    def _fire_due(self, job: Job, checked_at: datetime, now: datetime) -> None:
+        slot = self.next_run_at(job, checked_at)
+        if slot is None or slot > now:
+            return
+        # Only the latest slot if several passed (e.g. after a long pause)
+        while True:
+            following = job.schedule.next_after(slot)
+            if following > now:
+                break
+            slot = following
+
+        db = SessionLocal()
+        try:
+            run_id = JobService(db).claim_slot(job, slot)
+        finally:
+            db.close()
+        if run_id is not None:
+            _start_thread(job, run_id)
+
+
+# Global scheduler instance (started with the API when JOB_SCHEDULER_ENABLED)
+job_scheduler = JobScheduler()
+
+
+# ---- Jobs ----
+
+async def _run_xp_decay(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return await XPDecayService(db).process_due_buckets(progress=progress)
+
+
+async def _run_streak_reset(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    stats = StreakService(db).reset_all_broken_streaks()
+    progress(stats["streaks_reset"], stats["streaks_reset"])
+    return stats
+
+
+async def _run_streak_rebuild(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return StreakRebuildService(db).rebuild_all(progress=progress)
+
+
+async def _run_reconciliation(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return ReconciliationService(db).reconcile(apply=settings.RECONCILE_APPLY, progress=progress)
+
+
+async def _run_auto_lock(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return await AutoLockService(db).lock_day(progress=progress)
+
+
+_WEEKLY_UNLOCK_BATCH_SIZE = 1000  # Users per unlock query and transaction
+
+
+async def _run_weekly_unlock(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    """Catch unlocks the per-run check missed (e.g. runs locked before the outbox caught up)"""
+    target_date = date.today() - timedelta(days=1)
+    monday = target_date - timedelta(days=target_date.weekday())
+
+    user_ids = [row.user_id for row in db.query(models.DailyRun.user_id).filter(
+        models.DailyRun.date >= monday,
+        models.DailyRun.date <= monday + timedelta(days=4),
+        models.DailyRun.is_locked == True
+    ).distinct()]
+
+    service = WeeklyChallengeService(db)
+    unlocked = 0
+    for start in range(0, len(user_ids), _WEEKLY_UNLOCK_BATCH_SIZE):
+        _, newly_unlocked = await service.unlock_batch(user_ids[start:start + _WEEKLY_UNLOCK_BATCH_SIZE], target_date)
+        SyncService(db).record_bulk_changes(sync_service.CHALLENGE_COMPLETION, newly_unlocked)
+        db.commit()
+        unlocked += len(newly_unlocked)
+        progress(min(start + _WEEKLY_UNLOCK_BATCH_SIZE, len(user_ids)), len(user_ids))
+    return {"week_start": monday.isoformat(), "users_checked": len(user_ids), "unlocked": unlocked}
+
+
+async def _run_leaderboard_freeze(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    frozen = PeriodLeaderboardService(db).freeze_closed_periods()
+    return {"frozen": [{"period": period, "start": start.isoformat()} for period, start in frozen]}
+
+
+async def _run_decay_history_compaction(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return XPDecayService(db).compact_history(progress=progress)
+
+
+async def _run_partition_maintenance(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return PartitionService(db).maintain()
+
+
+async def _run_history_compaction(db: Session, progress: JobProgress) -> Dict[str, Any]:
+    return HistoryCompactionService(db).compact()
+
+
+JOBS: Dict[str, Job] = {
+    job.name: job for job in (
+        Job("xp_decay", "Apply inactivity XP decay to the buckets whose slot has come", _run_xp_decay,
+            "JOB_SCHEDULE_XP_DECAY"),
+        Job("streak_reset", "Zero streaks whose last completion is before yesterday", _run_streak_reset,
+            "JOB_SCHEDULE_STREAK_RESET"),
+        Job("streak_rebuild", "Recompute every streak from completion history", _run_streak_rebuild,
+            "JOB_SCHEDULE_STREAK_REBUILD"),
+        Job("reconciliation", "Check user XP, levels and streaks against source rows", _run_reconciliation,
+            "JOB_SCHEDULE_RECONCILIATION"),
+        Job("auto_lock", "Lock yesterday's unlocked runs and award their XP", _run_auto_lock,
+            "JOB_SCHEDULE_AUTO_LOCK"),
+        Job("weekly_unlock", "Unlock weekly challenges earned with Monday-Friday core quests", _run_weekly_unlock,
+            "JOB_SCHEDULE_WEEKLY_UNLOCK"),
+        Job("leaderboard_freeze", "Snapshot closed weekly and monthly leaderboards", _run_leaderboard_freeze,
+            "JOB_SCHEDULE_LEADERBOARD_FREEZE"),
+        Job("history_compaction", "Roll cold run history into monthly summaries", _run_history_compaction,
+            "JOB_SCHEDULE_HISTORY_COMPACTION"),
+        Job("partition_maintenance", "Create upcoming monthly run partitions and detach expired ones",
+            _run_partition_maintenance, "JOB_SCHEDULE_PARTITION_MAINTENANCE"),
+        Job("decay_history_compaction", "Collapse old daily decay records into one range per inactive stretch",
+            _run_decay_history_compaction, "JOB_SCHEDULE_DECAY_HISTORY_COMPACTION"),
+    )
+}
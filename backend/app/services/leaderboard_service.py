@@ -0,0 +1,268 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func, inspect
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta
+from bisect import bisect_left, insort
+import threading
+import time
+import uuid
+
+from app import models
+from app.config import settings
+from app.game_logic import GameLogic
+from app.utils.fenwick import FenwickTree
+
+
+class LeaderboardEntry(NamedTuple):
+    rank: int
+    user_id: uuid.UUID
+    username: str
+    total_xp: int
+    level: int
+
+
+# (user_id, username, total_xp)
+UserScore = Tuple[uuid.UUID, str, int]
+
+
+class LeaderboardStore:
+    """
+    Where a worker's leaderboard gets the scores it did not write itself.
+
+    `load` returns every user's score for a rebuild; `changes` returns the
+    scores that changed since the previous call (an empty list when the
+    store has nothing new or is not due to be polled).
+    """
+
+    def load(self, db: Session) -> List[UserScore]:
+        rows = db.query(models.User.id, models.User.username, models.User.total_xp).all()
+        return [(row.id, row.username, row.total_xp) for row in rows]
+
+    def changes(self, db: Session) -> List[UserScore]:
+        return []
+
+
+class LocalLeaderboardStore(LeaderboardStore):
+    """Single-worker deployments: local commits are the only writes"""
+
+
+class DatabaseLeaderboardStore(LeaderboardStore):
+    """
+    Multi-worker deployments: polls `users.updated_at` at most every
+    LEADERBOARD_SYNC_SECONDS to pick up commits made by other workers.
+
+    The watermark trails by a safety margin so a transaction that stamped
+    `updated_at` before committing is not skipped; re-applying a score is
+    idempotent.
+    """
+
+    OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, sync_seconds: float):
+        self.sync_seconds = sync_seconds
+        self._watermark: Optional[datetime] = None
+        self._polled_at = 0.0
+
+    def load(self, db: Session) -> List[UserScore]:
+        self._watermark = db.query(func.max(models.User.updated_at)).scalar()
+        self._polled_at = time.monotonic()
+        return super().load(db)
+
+    def changes(self, db: Session) -> List[UserScore]:
+        if time.monotonic() - self._polled_at < self.sync_seconds:
+            return []
+        self._polled_at = time.monotonic()
+
+        query = db.query(models.User.id, models.User.username, models.User.total_xp, models.User.updated_at)
+        if self._watermark is not None:
+            query = query.filter(models.User.updated_at > self._watermark - self.OVERLAP)
+        rows = query.all()
+
+        if rows:
+            self._watermark = max(self._watermark or rows[0].updated_at, max(row.updated_at for row in rows))
+        return [(row.id, row.username, row.total_xp) for row in rows]
+
+
+class LeaderboardEngine:
+    """
+    In-memory all-time XP ranking with O(log n) rank lookups.
+
+    Users are grouped into XP buckets of LEADERBOARD_BUCKET_XP. A Fenwick
+    tree counts users per bucket, so "how many users are above this
+    bucket" and "which bucket holds the k-th user" are O(log B); each
+    bucket keeps its members sorted for the position inside it. Ties are
+    broken by user id so every user has a distinct rank. The bucket
+    count is capped at LEADERBOARD_MAX_BUCKETS: everyone past the cap
+    shares the last bucket, which keeps the tree small however high XP
+    goes without changing any rank.
+
+    Local commits are applied as soon as they happen (see the session
+    hooks below); the store brings in other workers' changes.
+    """
+
+    def __init__(self, store: LeaderboardStore, bucket_xp: int, max_buckets: int):
+        self.store = store
+        self.bucket_xp = max(1, bucket_xp)
+        self.max_buckets = max(1, max_buckets)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._counts = FenwickTree()
+        self._buckets: Dict[int, List[Tuple[int, str]]] = {}
+        self._scores: Dict[uuid.UUID, Tuple[int, str]] = {}
+        self._ready = False
+
+    # ---- Maintenance ----
+
+    def rebuild(self, db: Session) -> int:
+        """Reload every user from the store; returns the number ranked"""
+        scores = self.store.load(db)
+        with self._lock:
+            self._reset()
+            for user_id, username, total_xp in scores:
+                self._apply(user_id, username, total_xp)
+            self._ready = True
+            return len(self._scores)
+
+    def sync(self, db: Session) -> None:
+        """Build on first use, then pull in changes from other workers"""
+        if not self._ready:
+            self.rebuild(db)
+            return
+        self.apply_scores(self.store.changes(db))
+
+    def apply_scores(self, scores: Iterable[UserScore]) -> None:
+        with self._lock:
+            if not self._ready:
+                return
+            for user_id, username, total_xp in scores:
+                self._apply(user_id, username, total_xp)
+
+    def remove(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._discard(user_id)
+
+    # ---- Queries ----
+
+    def size(self) -> int:
+        return self._counts.total
+
+    def top(self, limit: int) -> List[LeaderboardEntry]:
+        with self._lock:
+            return [self._entry_at(rank) for rank in range(1, min(limit, self.size()) + 1)]
+
+    def rank_of(self, user_id: uuid.UUID) -> Optional[LeaderboardEntry]:
+        with self._lock:
+            rank = self._rank(user_id)
+            return self._entry_at(rank) if rank else None
+
+    def neighbors(self, user_id: uuid.UUID, radius: int) -> List[LeaderboardEntry]:
+        """The user plus up to `radius` users directly above and below"""
+        with self._lock:
+            rank = self._rank(user_id)
+            if not rank:
+                return []
+            first = max(1, rank - radius)
+            last = min(self.size(), rank + radius)
+            return [self._entry_at(r) for r in range(first, last + 1)]
+
+    # ---- Internals ----
+
+    @staticmethod
+    def _key(user_id: uuid.UUID, total_xp: int) -> Tuple[int, str]:
+        return (total_xp, str(user_id))
+
+    def _bucket(self, total_xp: int) -> int:
+        return min(max(0, total_xp) // self.bucket_xp, self.max_buckets - 1)
+
+    def _apply(self, user_id: uuid.UUID, username: str, total_xp: int) -> None:
+        current = self._scores.get(user_id)
+        if current is not None and current[0] == total_xp:
+            self._scores[user_id] = (total_xp, username)
+            return
+
+        self._discard(user_id)
+        bucket = self._bucket(total_xp)
+        insort(self._buckets.setdefault(bucket, []), self._key(user_id, total_xp))
+        self._counts.add(bucket, 1)
+        self._scores[user_id] = (total_xp, username)
+
+    def _discard(self, user_id: uuid.UUID) -> None:
+        current = self._scores.pop(user_id, None)
+        if current is None:
+            return
+
+        bucket = self._bucket(current[0])
+        members = self._buckets[bucket]
+        del members[bisect_left(members, self._key(user_id, current[0]))]
+        if not members:
+            del self._buckets[bucket]
+        self._counts.add(bucket, -1)
+
+    def _rank(self, user_id: uuid.UUID) -> Optional[int]:
+        current = self._scores.get(user_id)
+        if current is None:
+            return None
+
+        bucket = self._bucket(current[0])
+        members = self._buckets[bucket]
+        above_bucket = self._counts.total - self._counts.prefix_sum(bucket)
+        above_in_bucket = len(members) - bisect_left(members, self._key(user_id, current[0])) - 1
+        return above_bucket + above_in_bucket + 1
+
+    def _entry_at(self, rank: int) -> LeaderboardEntry:
+        # Rank 1 is the largest key, i.e. the last one in ascending order
+        position = self._counts.total - rank + 1
+        bucket = self._counts.find(position)
+        total_xp, user_id = self._buckets[bucket][position - self._counts.prefix_sum(bucket - 1) - 1]
+
+        user_id = uuid.UUID(user_id)
+        username = self._scores[user_id][1]
+        return LeaderboardEntry(rank, user_id, username, total_xp, GameLogic.calculate_level(total_xp))
+
+
+def _create_store() -> LeaderboardStore:
+    if settings.LEADERBOARD_BACKEND == "local":
+        return LocalLeaderboardStore()
+    return DatabaseLeaderboardStore(settings.LEADERBOARD_SYNC_SECONDS)
+
+
+# Global leaderboard instance
+leaderboard = LeaderboardEngine(_create_store(), settings.LEADERBOARD_BUCKET_XP, settings.LEADERBOARD_MAX_BUCKETS)
+
+
+# ---- Keep the engine in step with committed XP changes ----
+
+_PENDING_KEY = "leaderboard_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_score_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, {})
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, models.User):
+            continue
+        state = inspect(obj)
+        if obj in session.new or state.attrs.total_xp.history.has_changes() or state.attrs.username.history.has_changes():
+            pending[obj.id] = (obj.id, obj.username, obj.total_xp or 0)
+    for obj in session.deleted:
+        if isinstance(obj, models.User):
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_score_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for user_id, score in pending.items():
+        if score is None:
+            leaderboard.remove(user_id)
+        else:
+            leaderboard.apply_scores([score])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_score_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,322 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func, text
+from typing import Any, Dict, Optional
+from datetime import date, timedelta
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.game_logic import GameLogic
+from app.services.daily_stats_service import DailyStatsService
+from app.services.period_leaderboard_service import PeriodLeaderboardService
+from app.services.quest_catalog_cache import quest_catalog_cache
+from app.services.reconciliation_service import ReconciliationService
+from app.services.streak_service import StreakService
+from app.services.weekly_challenge_service import WeeklyChallengeService
+from app.services import user_event_service
+from app.services.user_event_service import user_events
+
+logger = logging.getLogger(__name__)
+
+# Domain events
+QUEST_TOGGLED = "QuestToggled"
+RUN_LOCKED = "RunLocked"
+MILESTONE_TOGGLED = "MilestoneToggled"
+CHALLENGE_COMPLETED = "ChallengeCompleted"
+
+
+# Leases a batch to this worker: other workers skip it until the lease runs out
+_CLAIM_SQL = text("""
+    UPDATE outbox_events
+    SET available_at = now() + make_interval(secs => :lease_seconds), attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM outbox_events
+        WHERE processed_at IS NULL AND available_at <= now() AND attempts < :max_attempts
+        ORDER BY created_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""")
+
+
+class OutboxService:
+    """
+    Transactional outbox for the side effects of user actions.
+
+    Request handlers make only the core write (toggle a quest, lock a run,
+    toggle a milestone, complete a challenge) and `record` a domain event
+    in the same transaction. The outbox worker later applies the rollups,
+    streaks, XP totals, period leaderboards, unlock checks and client
+    notifications for each event.
+
+    Delivery is at least once: a batch is leased, and an event whose
+    worker dies or whose handler fails is retried with backoff. Handlers
+    are written to be re-runnable: they recompute from current state where
+    they can (user XP is settled from the ledger, see ReconciliationService),
+    and the one additive write (period XP) commits in the same transaction
+    that marks the event processed.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- Writing ----
+
+    def record(self, event_type: str, user_id: uuid.UUID, payload: Dict[str, Any]) -> models.OutboxEvent:
+        """Add an event to the caller's transaction"""
+        outbox_event = models.OutboxEvent(
+            event_type=event_type,
+            user_id=user_id,
+            payload=json.loads(json.dumps(payload, default=str))
+        )
+        self.db.add(outbox_event)
+        self.db.info[_RECORDED_KEY] = True
+        return outbox_event
+
+    # ---- Processing ----
+
+    async def process_batch(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Claim and handle up to `limit` due events, one transaction per event"""
+        claimed = self.db.execute(_CLAIM_SQL, {
+            "lease_seconds": settings.OUTBOX_LEASE_SECONDS,
+            "max_attempts": settings.OUTBOX_MAX_ATTEMPTS,
+            "limit": limit or settings.OUTBOX_BATCH_SIZE
+        }).scalars().all()
+        self.db.commit()
+
+        stats = {"claimed": len(claimed), "processed": 0, "failed": 0}
+        if not claimed:
+            return stats
+
+        events = self.db.query(models.OutboxEvent).filter(
+            models.OutboxEvent.id.in_(claimed)
+        ).order_by(models.OutboxEvent.created_at).all()
+
+        for outbox_event in events:
+            event_id, attempts = outbox_event.id, outbox_event.attempts
+            try:
+                await self._HANDLERS[outbox_event.event_type](self, outbox_event.user_id, outbox_event.payload)
+                outbox_event.processed_at = func.now()
+                outbox_event.last_error = None
+                self.db.commit()
+                stats["processed"] += 1
+            except Exception as e:
+                self.db.rollback()
+                logger.exception("Outbox event %s failed (attempt %d)", event_id, attempts)
+                self.db.query(models.OutboxEvent).filter(models.OutboxEvent.id == event_id).update({
+                    "last_error": repr(e)[:2000],
+                    "available_at": func.now() + timedelta(seconds=self._backoff_seconds(attempts))
+                }, synchronize_session=False)
+                self.db.commit()
+                stats["failed"] += 1
+
+        return stats
+
+    def purge_processed(self, retention_days: Optional[int] = None) -> int:
+        """Delete events processed more than `retention_days` ago"""
+        if retention_days is None:
+            retention_days = settings.OUTBOX_RETENTION_DAYS
+        deleted = self.db.query(models.OutboxEvent).filter(
+            models.OutboxEvent.processed_at < func.now() - timedelta(days=retention_days)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        pending, dead, oldest = self.db.query(
+            func.count().filter(models.OutboxEvent.attempts < settings.OUTBOX_MAX_ATTEMPTS),
+            func.count().filter(models.OutboxEvent.attempts >= settings.OUTBOX_MAX_ATTEMPTS),
+            func.min(models.OutboxEvent.created_at).filter(models.OutboxEvent.attempts < settings.OUTBOX_MAX_ATTEMPTS)
+        ).filter(models.OutboxEvent.processed_at.is_(None)).one()
+
+        return {
+            "pending": pending,
+            "dead": dead,  # Gave up after OUTBOX_MAX_ATTEMPTS; fix and reset attempts to replay
+            "oldest_pending_at": oldest
+        }
+
+    @staticmethod
+    def _backoff_seconds(attempts: int) -> int:
+        return min(settings.OUTBOX_RETRY_MAX_SECONDS, settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+    # ---- Handlers ----
+
+    async def _on_quest_toggled(self, user_id: uuid.UUID, payload: Dict[str, Any]) -> None:
+        run = self._get_run(payload)
+        if run is None:
+            return
+        run_date = date.fromisoformat(payload["run_date"])
+
+        DailyStatsService(self.db).record_run(run)
+
+        quest_id = uuid.UUID(payload["quest_id"])
+        quest = quest_catalog_cache.get_quests(self.db, [quest_id]).get(quest_id)
+        if payload["completed"] and quest is not None and quest.is_core:
+            StreakService(self.db).record_completion(user_id, quest.id, run_date)
+
+        self._touch_activity(user_id, date.fromisoformat(payload["occurred_on"]))
+        user_events.publish_after_commit(self.db, user_id, user_event_service.QUEST_TOGGLED, payload)
+
+    async def _on_run_locked(self, user_id: uuid.UUID, payload: Dict[str, Any]) -> None:
+        run_date = date.fromisoformat(payload["run_date"])
+
+        run = self._get_run(payload)
+        if run is None or not run.is_locked:
+            return
+
+        DailyStatsService(self.db).record_run(run)
+        PeriodLeaderboardService(self.db).record_xp(user_id, run.date, run.total_xp)
+
+        user = self.db.query(models.User).filter(models.User.id == user_id).first()
+        user.total_xp = ReconciliationService(self.db).expected_xp(user_id)
+        user.current_level = GameLogic.calculate_level(user.total_xp)
+        self._touch_activity(user_id, date.fromisoformat(payload["occurred_on"]))
+
+        unlock_status = await WeeklyChallengeService(self.db).check_and_unlock_challenge(user_id, run_date, commit=False)
+
+        user_events.publish_after_commit(self.db, user_id, user_event_service.RUN_LOCKED, {
+            **payload,
+            "user_total_xp": user.total_xp,
+            "current_level": user.current_level
+        })
+        if unlock_status.get("just_unlocked"):
+            challenge = unlock_status["challenge"]
+            user_events.publish_after_commit(self.db, user_id, user_event_service.CHALLENGE_UNLOCKED, {
+                "challenge_id": challenge.id,
+                "title": challenge.title,
+                "xp_reward": challenge.xp_reward
+            })
+
+    async def _on_milestone_toggled(self, user_id: uuid.UUID, payload: Dict[str, Any]) -> None:
+        # Settle from the ledger: toggling a goal back and forth never awards it twice
+        user = self.db.query(models.User).filter(models.User.id == user_id).first()
+        user.total_xp = ReconciliationService(self.db).expected_xp(user_id)
+        user.current_level = GameLogic.calculate_level(user.total_xp)
+
+        # Period XP follows the ledger too: credited when the goal becomes
+        # completed, taken back when it stops being completed
+        was_completed = payload.get("goal_was_completed", False)
+        if payload["goal_completed"] == was_completed:
+            return
+        amount = payload["xp_reward"] if payload["goal_completed"] else -payload["xp_reward"]
+        PeriodLeaderboardService(self.db).record_xp(user_id, date.fromisoformat(payload["occurred_on"]), amount)
+        if not payload["goal_completed"]:
+            return
+
+        user_events.publish_after_commit(self.db, user_id, user_event_service.GOAL_COMPLETED, {
+            "goal_id": payload["goal_id"],
+            "xp_reward": payload["xp_reward"],
+            "total_xp": user.total_xp,
+            "current_level": user.current_level
+        })
+
+    async def _on_challenge_completed(self, user_id: uuid.UUID, payload: Dict[str, Any]) -> None:
+        PeriodLeaderboardService(self.db).record_xp(user_id, date.fromisoformat(payload["occurred_on"]), payload["xp_earned"])
+        user_events.publish_after_commit(self.db, user_id, user_event_service.CHALLENGE_COMPLETED, payload)
+
+    _HANDLERS = {
+        QUEST_TOGGLED: _on_quest_toggled,
+        RUN_LOCKED: _on_run_locked,
+        MILESTONE_TOGGLED: _on_milestone_toggled,
+        CHALLENGE_COMPLETED: _on_challenge_completed,
+    }
+
+    # ---- Internals ----
+
+    def _get_run(self, payload: Dict[str, Any]) -> Optional[models.DailyRun]:
+        # Gone if the run was compacted before the event was handled
+        return self.db.query(models.DailyRun).filter(
+            models.DailyRun.id == uuid.UUID(payload["run_id"]),
+            models.DailyRun.date == date.fromisoformat(payload["run_date"])
+        ).first()
+
+    def _touch_activity(self, user_id: uuid.UUID, day: date) -> None:
+        self.db.query(models.User).filter(
+            models.User.id == user_id,
+            models.User.last_activity_date < day
+        ).update({"last_activity_date": day}, synchronize_session=False)
+
+
+class OutboxWorker:
+    """
+    Background thread that drains the outbox, one session per batch.
+
+    Polls every OUTBOX_POLL_SECONDS and is woken early when this process
+    commits an event. Any number of workers (threads or processes) can
+    run; leases keep them from handling the same event concurrently.
+    """
+
+    # Processed events are purged at most this often
+    PURGE_INTERVAL_SECONDS = 3600
+
+    def __init__(self, poll_seconds: float):
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._purged_at = 0.0
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 5)
+            self._thread = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run_forever(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                stats = self.run_once()
+            except Exception:
+                logger.exception("Outbox worker batch failed")
+                stats = {"claimed": 0}
+            # A full batch means there may be more waiting
+            if stats["claimed"] < settings.OUTBOX_BATCH_SIZE:
+                self._wake.wait(self.poll_seconds)
+
+    def run_once(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            stats = asyncio.run(OutboxService(db).process_batch())
+            if time.monotonic() - self._purged_at >= self.PURGE_INTERVAL_SECONDS:
+                OutboxService(db).purge_processed()
+                self._purged_at = time.monotonic()
+            return stats
+        finally:
+            db.close()
+
+
+# Global worker instance (started with the API when OUTBOX_WORKER_ENABLED)
+outbox_worker = OutboxWorker(settings.OUTBOX_POLL_SECONDS)
+
+
+# ---- Wake the local worker as soon as an event commits ----
+
+_RECORDED_KEY = "outbox_recorded"
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_outbox_worker(session: Session) -> None:
+    if session.info.pop(_RECORDED_KEY, False):
+        outbox_worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_outbox_events(session: Session) -> None:
+    session.info.pop(_RECORDED_KEY, None)
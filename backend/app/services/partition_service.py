@@ -0,0 +1,257 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+import re
+
+from app.config import settings
+
+
+class PartitionService:
+    """
+    Maintains the monthly range partitions of daily_runs and
+    daily_quest_completions (co-partitioned on the run date).
+
+    Partitions are named `<table>_pYYYY_MM`; each table also has a
+    `<table>_default` partition so a late maintenance run never makes an
+    insert fail. The partition_maintenance job creates upcoming months
+    on a schedule and moves any rows that landed in the default
+    partition into their month's partition as it is created.
+
+    check_partition_detach.py exercises detaching against a real
+    Postgres (rolled back); run it after changing the detach path.
+    """
+
+    # (table, partition key); completions come first so detaching never
+    # leaves completion rows pointing at a detached run partition
+    # (see `_detach` for the foreign key the detached completions keep)
+    PARTITIONED_TABLES: Tuple[Tuple[str, str], ...] = (
+        ("daily_quest_completions", "run_date"),
+        ("daily_runs", "date"),
+    )
+
+    _PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+    # Serializes DDL across workers that start at the same time
+    _ADVISORY_LOCK_KEY = "partition_maintenance"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def month_start(day: date) -> date:
+        return day.replace(day=1)
+
+    @staticmethod
+    def add_months(month: date, months: int) -> date:
+        index = month.year * 12 + (month.month - 1) + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    @staticmethod
+    def partition_name(table: str, month: date) -> str:
+        return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+    def is_partitioned(self, table: str) -> bool:
+        """False until the partitioning migration has been applied"""
+        return bool(self.db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+        ), {"table": table}).scalar())
+
+    def list_partitions(self, table: str) -> Dict[date, str]:
+        """Attached monthly partitions of a table, keyed by month"""
+        names = self.db.execute(text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table"
+        ), {"table": table}).scalars().all()
+
+        partitions = {}
+        for name in names:
+            match = self._PARTITION_NAME.search(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return partitions
+
+    def ensure_future_partitions(self, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+        """
+        Create partitions from the current month through `months_ahead`
+        months from now, plus the default partitions and the partitions of
+        any month with rows in a default partition. Returns created names.
+        """
+        created, _ = self._ensure_partitions(months_ahead, today)
+        return created
+
+    def maintain(self, months_ahead: Optional[int] = None, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Scheduled maintenance: create upcoming partitions (first moving rows
+        that landed in the default partitions into them) and detach months
+        past PARTITION_RETAIN_MONTHS.
+        """
+        created, moved = self._ensure_partitions(months_ahead, today)
+        detached = self.detach_old_partitions(today=today)
+        return {"created": created, "rows_moved": moved, "detached": detached}
+
+    def _ensure_partitions(self, months_ahead: Optional[int], today: Optional[date]) -> Tuple[List[str], Dict[str, int]]:
+        if months_ahead is None:
+            months_ahead = settings.PARTITION_MONTHS_AHEAD
+        today = today or date.today()
+
+        if not self.is_partitioned("daily_runs"):
+            return [], {}
+
+        self._lock()
+        first_month = self.month_start(today)
+        months = {self.add_months(first_month, i) for i in range(months_ahead + 1)}
+
+        # Runs first: completion partitions reference them
+        for table, _ in reversed(self.PARTITIONED_TABLES):
+            self.db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT'
+            ))
+
+        # Rows of any month (past ones included) that landed in a default
+        # partition get their month's partition too, and are moved into it
+        for table, key in self.PARTITIONED_TABLES:
+            months.update(self.db.execute(text(
+                f"SELECT DISTINCT CAST(date_trunc('month', {key}) AS date) "
+                f'FROM "{table}_default"'
+            )).scalars().all())
+
+        existing = {table: self.list_partitions(table) for table, _ in self.PARTITIONED_TABLES}
+        created: List[str] = []
+        moved: Dict[str, int] = {}
+        for month in sorted(months):
+            missing = [table for table, _ in reversed(self.PARTITIONED_TABLES) if month not in existing[table]]
+            if not missing:
+                continue
+            for table, count in self._create_month(month, missing).items():
+                moved[table] = moved.get(table, 0) + count
+            created += [self.partition_name(table, month) for table in missing]
+
+        self.db.commit()
+        return created, moved
+
+    def _create_month(self, month: date, tables: List[str]) -> Dict[str, int]:
+        """
+        Create one month's missing partitions. Postgres refuses to create a
+        partition while the default partition holds rows for its range, so
+        those rows (of both tables: the completions FK cascades from runs)
+        are set aside, removed, and re-inserted once the partitions exist.
+        Returns rows moved per table.
+        """
+        end = self.add_months(month, 1)
+        bounds = {"start": month, "end": end}
+
+        # Writers block until the move commits instead of slipping rows in
+        self.db.execute(text(
+            "LOCK TABLE " + ", ".join(f'"{table}_default"' for table, _ in self.PARTITIONED_TABLES)
+            + " IN EXCLUSIVE MODE"
+        ))
+        stray = {
+            table: self.db.execute(text(
+                f'SELECT count(*) FROM "{table}_default" WHERE {key} >= :start AND {key} < :end'
+            ), bounds).scalar()
+            for table, key in self.PARTITIONED_TABLES
+        }
+
+        if any(stray.values()):
+            for table, key in self.PARTITIONED_TABLES:
+                self.db.execute(text(
+                    f'CREATE TEMP TABLE "moved_{table}" ON COMMIT DROP AS '
+                    f'SELECT * FROM "{table}_default" WHERE {key} >= :start AND {key} < :end'
+                ), bounds)
+            # Completions first, so deleting runs cascades to nothing
+            for table, key in self.PARTITIONED_TABLES:
+                self.db.execute(text(
+                    f'DELETE FROM "{table}_default" WHERE {key} >= :start AND {key} < :end'
+                ), bounds)
+
+        for table in tables:
+            self.db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{self.partition_name(table, month)}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+
+        if any(stray.values()):
+            # Runs first, so the completions' foreign key finds them
+            for table, _ in reversed(self.PARTITIONED_TABLES):
+                self.db.execute(text(f'INSERT INTO "{table}" SELECT * FROM "moved_{table}"'))
+                self.db.execute(text(f'DROP TABLE "moved_{table}"'))
+
+        return {table: count for table, count in stray.items() if count}
+
+    def detach_old_partitions(self, retain_months: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+        """
+        Detach monthly partitions older than `retain_months` full months.
+
+        Detached partitions stay in the database as plain tables, ready to
+        be archived or dropped. A retention of 0 disables detaching. Only
+        detach months whose history has been summarized elsewhere: locked
+        runs are the source of a user's total XP.
+        """
+        if retain_months is None:
+            retain_months = settings.PARTITION_RETAIN_MONTHS
+        today = today or date.today()
+
+        if retain_months <= 0:
+            return []
+
+        return self.detach_partitions_before(self.add_months(self.month_start(today), -retain_months))
+
+    def detach_partitions_before(self, cutoff: date) -> List[str]:
+        """Detach every monthly partition that ends on or before `cutoff`"""
+        if not self.is_partitioned("daily_runs"):
+            return []
+
+        self._lock()
+        detached = []
+        for table, _ in self.PARTITIONED_TABLES:
+            for month, name in sorted(self.list_partitions(table).items()):
+                if month >= cutoff:
+                    continue
+                self._detach(table, name)
+                detached.append(name)
+
+        self.db.commit()
+        return detached
+
+    def detach_month(self, month: date) -> List[str]:
+        """
+        Detach one month's partitions inside the caller's transaction, so
+        the caller can commit it together with whatever replaces the data.
+        """
+        self._lock()
+        detached = []
+        for table, _ in self.PARTITIONED_TABLES:
+            name = self.list_partitions(table).get(month)
+            if name:
+                self._detach(table, name)
+                detached.append(name)
+        return detached
+
+    def _detach(self, table: str, name: str) -> None:
+        """
+        Detach one partition. A detached completions partition keeps the
+        composite foreign key to daily_runs as a constraint of its own, so
+        detaching the matching runs partition after it would fail on the
+        rows it references; the detached table is an archive, so its
+        foreign keys into the partitioned tables are dropped.
+        """
+        self.db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+
+        constraints = self.db.execute(text(
+            "SELECT con.conname FROM pg_constraint con "
+            "JOIN pg_class child ON child.oid = con.conrelid "
+            "JOIN pg_class referenced ON referenced.oid = con.confrelid "
+            "WHERE con.contype = 'f' AND child.relname = :name AND referenced.relname = ANY(:tables)"
+        ), {"name": name, "tables": [partitioned for partitioned, _ in self.PARTITIONED_TABLES]}).scalars().all()
+        for constraint in constraints:
+            self.db.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+
+    def _lock(self) -> None:
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": self._ADVISORY_LOCK_KEY}
+        )
@@ -0,0 +1,199 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+import uuid
+
+from app import models
+from app.schemas import LeaderboardPeriod
+from app.services.partition_service import PartitionService
+
+
+# Ranks a closed period once; ties are ordered like the all-time board
+_FREEZE_SQL = text("""
+    INSERT INTO leaderboard_snapshots (id, period_type, period_start, rank, user_id, username, xp)
+    SELECT gen_random_uuid(), p.period_type, p.period_start,
+           row_number() OVER (ORDER BY p.xp DESC, p.user_id DESC),
+           p.user_id, u.username, p.xp
+    FROM user_period_xp p
+    JOIN users u ON u.id = p.user_id
+    WHERE p.period_type = :period_type AND p.period_start = :period_start AND p.xp > 0
+    ON CONFLICT DO NOTHING
+""")
+
+
+# record_xp for many users at once: one upsert per period
+_RECORD_XP_BULK_SQL = text("""
+    INSERT INTO user_period_xp (id, user_id, period_type, period_start, xp)
+    SELECT gen_random_uuid(), v.user_id, :period_type, :period_start, v.xp
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:amounts AS int[])) AS v(user_id, xp)
+    WHERE v.xp <> 0
+    ON CONFLICT (period_type, period_start, user_id)
+    DO UPDATE SET xp = user_period_xp.xp + excluded.xp, updated_at = now()
+""")
+
+
+class PeriodLeaderboardService:
+    """
+    Weekly and monthly leaderboards.
+
+    Every XP award is added to the user's `user_period_xp` row for the
+    current week and month (`record_xp`), so a period ranking is an index
+    scan over one period instead of summing runs across all users. When a
+    period closes its standings are frozen into `leaderboard_snapshots`
+    and served from there; later XP adjustments do not reorder a closed
+    period.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def period_start(period: LeaderboardPeriod, day: date) -> date:
+        if period == LeaderboardPeriod.WEEK:
+            return day - timedelta(days=day.weekday())
+        return PartitionService.month_start(day)
+
+    @staticmethod
+    def period_end(period: LeaderboardPeriod, start: date) -> date:
+        """Exclusive end of the period starting at `start`"""
+        if period == LeaderboardPeriod.WEEK:
+            return start + timedelta(days=7)
+        return PartitionService.add_months(start, 1)
+
+    def is_closed(self, period: LeaderboardPeriod, start: date, today: Optional[date] = None) -> bool:
+        return self.period_end(period, start) <= (today or date.today())
+
+    # ---- Writes ----
+
+    def record_xp(self, user_id: uuid.UUID, day: date, amount: int) -> None:
+        """Add awarded XP to the user's week and month, in the caller's transaction"""
+        if not amount:
+            return
+
+        for period in LeaderboardPeriod:
+            statement = insert(models.UserPeriodXP).values(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                period_type=period.value,
+                period_start=self.period_start(period, day),
+                xp=amount
+            )
+            self.db.execute(statement.on_conflict_do_update(
+                index_elements=["period_type", "period_start", "user_id"],
+                set_={"xp": models.UserPeriodXP.xp + amount, "updated_at": func.now()}
+            ))
+
+    def record_xp_bulk(self, day: date, awards: List[Tuple[uuid.UUID, int]]) -> None:
+        """record_xp for (user_id, amount) pairs awarded on the same day (one user per pair)"""
+        if not awards:
+            return
+
+        for period in LeaderboardPeriod:
+            self.db.execute(_RECORD_XP_BULK_SQL, {
+                "period_type": period.value,
+                "period_start": self.period_start(period, day),
+                "user_ids": [str(user_id) for user_id, _ in awards],
+                "amounts": [amount for _, amount in awards]
+            })
+
+    def freeze(self, period: LeaderboardPeriod, start: date) -> int:
+        """Snapshot a closed period's standings; returns rows written (0 if already frozen)"""
+        written = self.db.execute(_FREEZE_SQL, {"period_type": period.value, "period_start": start}).rowcount
+        self.db.commit()
+        return written
+
+    def freeze_closed_periods(self, today: Optional[date] = None) -> List[Tuple[str, date]]:
+        """Freeze every closed period that has XP but no snapshot yet"""
+        today = today or date.today()
+        frozen = []
+
+        for period in LeaderboardPeriod:
+            current = self.period_start(period, today)
+            starts = self.db.query(models.UserPeriodXP.period_start).filter(
+                models.UserPeriodXP.period_type == period.value,
+                models.UserPeriodXP.period_start < current,
+                ~self._snapshot_exists(period, models.UserPeriodXP.period_start)
+            ).distinct().all()
+
+            for (start,) in sorted(starts):
+                self.freeze(period, start)
+                frozen.append((period.value, start))
+
+        return frozen
+
+    # ---- Reads ----
+
+    def top(self, period: LeaderboardPeriod, start: date, limit: int) -> List[Dict]:
+        if self.is_closed(period, start):
+            self._ensure_frozen(period, start)
+            rows = self.db.query(models.LeaderboardSnapshot).filter(
+                models.LeaderboardSnapshot.period_type == period.value,
+                models.LeaderboardSnapshot.period_start == start
+            ).order_by(models.LeaderboardSnapshot.rank).limit(limit).all()
+            return [
+                {"rank": row.rank, "user_id": row.user_id, "username": row.username, "xp": row.xp}
+                for row in rows
+            ]
+
+        rows = self.db.query(
+            models.UserPeriodXP.user_id,
+            models.UserPeriodXP.xp,
+            models.User.username
+        ).join(
+            models.User, models.User.id == models.UserPeriodXP.user_id
+        ).filter(
+            models.UserPeriodXP.period_type == period.value,
+            models.UserPeriodXP.period_start == start,
+            models.UserPeriodXP.xp > 0
+        ).order_by(
+            models.UserPeriodXP.xp.desc(),
+            models.UserPeriodXP.user_id.desc()
+        ).limit(limit).all()
+
+        return [
+            {"rank": rank, "user_id": row.user_id, "username": row.username, "xp": row.xp}
+            for rank, row in enumerate(rows, start=1)
+        ]
+
+    def rank_of(self, period: LeaderboardPeriod, start: date, user_id: uuid.UUID) -> Optional[Dict]:
+        """The user's rank in a period, or None if they earned no XP in it"""
+        if self.is_closed(period, start):
+            self._ensure_frozen(period, start)
+            row = self.db.query(models.LeaderboardSnapshot).filter(
+                models.LeaderboardSnapshot.period_type == period.value,
+                models.LeaderboardSnapshot.period_start == start,
+                models.LeaderboardSnapshot.user_id == user_id
+            ).first()
+            return {"rank": row.rank, "xp": row.xp} if row else None
+
+        mine = self.db.query(models.UserPeriodXP.xp).filter(
+            models.UserPeriodXP.period_type == period.value,
+            models.UserPeriodXP.period_start == start,
+            models.UserPeriodXP.user_id == user_id
+        ).scalar()
+        if not mine:
+            return None
+
+        ahead = self.db.query(func.count()).select_from(models.UserPeriodXP).filter(
+            models.UserPeriodXP.period_type == period.value,
+            models.UserPeriodXP.period_start == start,
+            or_(
+                models.UserPeriodXP.xp > mine,
+                and_(models.UserPeriodXP.xp == mine, models.UserPeriodXP.user_id > user_id)
+            )
+        ).scalar()
+        return {"rank": ahead + 1, "xp": mine}
+
+    # ---- Internals ----
+
+    def _snapshot_exists(self, period: LeaderboardPeriod, start):
+        return self.db.query(models.LeaderboardSnapshot.id).filter(
+            models.LeaderboardSnapshot.period_type == period.value,
+            models.LeaderboardSnapshot.period_start == start
+        ).exists()
+
+    def _ensure_frozen(self, period: LeaderboardPeriod, start: date) -> None:
+        if not self.db.query(self._snapshot_exists(period, start)).scalar():
+            self.freeze(period, start)
@@ -0,0 +1,293 @@
+from sqlalchemy.orm import Session
+from typing import AbstractSet, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+from itertools import combinations
+import random
+import threading
+import time
+import uuid
+
+from app import models
+from app.config import settings
+from app.schemas import QuestCategory
+from app.utils.sampling import AliasTable
+
+
+class CatalogQuest(NamedTuple):
+    """Read-only copy of a quest row, shared by every request in the process"""
+    id: uuid.UUID
+    title: str
+    description: Optional[str]
+    category: str
+    difficulty: str
+    base_xp: int
+    is_core: bool
+    is_active: bool
+
+
+class _CategoryPool:
+    """Optional (non-core) quests of one category with their alias table"""
+
+    def __init__(self, quest_ids: List[uuid.UUID], weights: List[float]):
+        self.quest_ids = quest_ids
+        self.table = AliasTable(weights)
+
+
+class _CatalogSnapshot:
+    """Everything precomputed from one catalog read, swapped in atomically"""
+
+    def __init__(
+        self,
+        all_ids: Tuple[uuid.UUID, ...],
+        all_core_ids: Tuple[uuid.UUID, ...],
+        by_combination: Dict[FrozenSet[str], Tuple[uuid.UUID, ...]],
+        core_by_combination: Dict[FrozenSet[str], Tuple[uuid.UUID, ...]],
+        pools: Dict[str, _CategoryPool],
+        positions: Dict[uuid.UUID, int],
+        quests: Dict[uuid.UUID, CatalogQuest]
+    ):
+        self.all_ids = all_ids
+        self.all_core_ids = all_core_ids
+        self.by_combination = by_combination
+        self.core_by_combination = core_by_combination
+        self.pools = pools
+        self.positions = positions
+        self.quests = quests
+        self.loaded_at = time.monotonic()
+
+
+class QuestCatalogCache:
+    """
+    Process-wide cache of the quest ids assigned to a new daily run.
+
+    The catalog only has a handful of categories, so every combination of
+    goal categories (plus the core-quest fallback) is precomputed from a
+    single catalog read. Run creation then looks up a tuple of ids instead
+    of querying the quests table.
+
+    For large catalogs, `select_quest_ids` caps the run size: core quests
+    are always included and the remaining slots are filled by weighted
+    sampling from per-category alias tables, so a draw costs O(k).
+    """
+
+    CATEGORIES: Tuple[str, ...] = tuple(c.value for c in QuestCategory)
+
+    # Relative sampling weight per difficulty; unknown difficulties get 1.0
+    DIFFICULTY_WEIGHTS: Dict[str, float] = {
+        "Easy": 1.2,
+        "Medium": 1.0,
+        "Hard": 0.8
+    }
+
+    # Give up on rejection sampling after this many draws per open slot
+    MAX_DRAWS_PER_SLOT = 20
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_CatalogSnapshot] = None
+
+    def get_quest_ids(self, db: Session, categories: Optional[Iterable[str]]) -> Tuple[uuid.UUID, ...]:
+        """
+        Get ordered quest ids for a user's goal categories.
+
+        No categories means every active quest. Categories without any
+        active quest fall back to the core quests, same as before caching.
+        """
+        snapshot = self._get_snapshot(db)
+
+        if not categories:
+            return snapshot.all_ids
+
+        return snapshot.by_combination[self._key(categories)]
+
+    def select_quest_ids(
+        self,
+        db: Session,
+        categories: Optional[Iterable[str]],
+        recent_quest_ids: AbstractSet[uuid.UUID] = frozenset(),
+        max_quests: Optional[int] = None,
+        rng: Optional[random.Random] = None
+    ) -> Tuple[uuid.UUID, ...]:
+        """
+        Pick at most `max_quests` quest ids for a new run.
+
+        Core quests are always included, even if they alone exceed the cap.
+        Other quests are sampled by difficulty weight; quests in
+        `recent_quest_ids` are kept only with probability
+        QUEST_RECENT_COMPLETION_WEIGHT. A cap of 0 disables selection.
+        """
+        if max_quests is None:
+            max_quests = settings.DAILY_RUN_MAX_QUESTS
+        rng = rng or random
+
+        snapshot = self._get_snapshot(db)
+
+        if categories:
+            key = self._key(categories)
+            candidate_ids = snapshot.by_combination[key]
+            core_ids = snapshot.core_by_combination[key]
+            pool_categories = [c for c in self.CATEGORIES if c in key and c in snapshot.pools]
+        else:
+            candidate_ids = snapshot.all_ids
+            core_ids = snapshot.all_core_ids
+            pool_categories = sorted(snapshot.pools)
+
+        if max_quests <= 0 or len(candidate_ids) <= max_quests:
+            return candidate_ids
+
+        slots = max_quests - len(core_ids)
+        if slots <= 0 or not pool_categories:
+            return core_ids
+
+        pools = [snapshot.pools[c] for c in pool_categories]
+        picked = self._sample(pools, slots, recent_quest_ids, rng)
+
+        positions = snapshot.positions
+        return tuple(sorted(core_ids + tuple(picked), key=lambda quest_id: positions[quest_id]))
+
+    def get_quests(self, db: Session, quest_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, CatalogQuest]:
+        """
+        Look up quest details (active or not) without touching the database.
+
+        An unknown id means the quest was created after this snapshot, so
+        the snapshot is rebuilt once before giving up on it.
+        """
+        quest_ids = list(quest_ids)
+        snapshot = self._get_snapshot(db)
+
+        if any(quest_id not in snapshot.quests for quest_id in quest_ids):
+            self.invalidate()
+            snapshot = self._get_snapshot(db)
+
+        return {
+            quest_id: snapshot.quests[quest_id]
+            for quest_id in quest_ids
+            if quest_id in snapshot.quests
+        }
+
+    def invalidate(self) -> None:
+        """Drop the precomputed sets; call after any quest catalog write"""
+        with self._lock:
+            self._snapshot = None
+
+    def _key(self, categories: Iterable[str]) -> FrozenSet[str]:
+        return frozenset(categories) & frozenset(self.CATEGORIES)
+
+    def _sample(
+        self,
+        pools: List[_CategoryPool],
+        slots: int,
+        recent_quest_ids: AbstractSet[uuid.UUID],
+        rng: random.Random
+    ) -> Set[uuid.UUID]:
+        """Sample distinct optional quests across the given category pools"""
+        pool_size = sum(len(pool.quest_ids) for pool in pools)
+
+        if pool_size <= slots:
+            return {quest_id for pool in pools for quest_id in pool.quest_ids}
+
+        # Picking the category by its total weight first keeps the overall
+        # distribution identical to one table over the combined pool
+        category_table = AliasTable([pool.table.total_weight for pool in pools])
+        recent_weight = settings.QUEST_RECENT_COMPLETION_WEIGHT
+
+        picked: Set[uuid.UUID] = set()
+        draws = 0
+        max_draws = slots * self.MAX_DRAWS_PER_SLOT
+
+        while len(picked) < slots and draws < max_draws:
+            draws += 1
+            pool = pools[category_table.sample(rng)]
+            quest_id = pool.quest_ids[pool.table.sample(rng)]
+
+            if quest_id in picked:
+                continue
+            if quest_id in recent_quest_ids and rng.random() >= recent_weight:
+                continue
+
+            picked.add(quest_id)
+
+        # Unlucky streak of rejections: top up in catalog order
+        if len(picked) < slots:
+            for pool in pools:
+                for quest_id in pool.quest_ids:
+                    if len(picked) >= slots:
+                        break
+                    picked.add(quest_id)
+
+        return picked
+
+    def _is_fresh(self, snapshot: Optional[_CatalogSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl_seconds
+
+    def _get_snapshot(self, db: Session) -> _CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if not self._is_fresh(snapshot):
+                snapshot = self._build(db)
+                self._snapshot = snapshot
+            return snapshot
+
+    def _build(self, db: Session) -> _CatalogSnapshot:
+        """Load the catalog once and precompute every combination"""
+        quests = [
+            CatalogQuest(*row)
+            for row in db.query(
+                models.Quest.id,
+                models.Quest.title,
+                models.Quest.description,
+                models.Quest.category,
+                models.Quest.difficulty,
+                models.Quest.base_xp,
+                models.Quest.is_core,
+                models.Quest.is_active
+            ).order_by(
+                models.Quest.category,
+                models.Quest.base_xp.desc(),
+                models.Quest.id
+            ).all()
+        ]
+        rows = [q for q in quests if q.is_active]
+
+        core_ids = tuple(q.id for q in rows if q.is_core)
+
+        by_combination: Dict[FrozenSet[str], Tuple[uuid.UUID, ...]] = {}
+        core_by_combination: Dict[FrozenSet[str], Tuple[uuid.UUID, ...]] = {}
+        for size in range(len(self.CATEGORIES) + 1):
+            for combo in combinations(self.CATEGORIES, size):
+                key = frozenset(combo)
+                ids = tuple(q.id for q in rows if q.category in key)
+                combo_core_ids = tuple(q.id for q in rows if q.category in key and q.is_core)
+                by_combination[key] = ids or core_ids
+                core_by_combination[key] = combo_core_ids if ids else core_ids
+
+        pool_rows: Dict[str, Tuple[List[uuid.UUID], List[float]]] = {}
+        for q in rows:
+            if q.is_core:
+                continue
+            ids, weights = pool_rows.setdefault(q.category, ([], []))
+            ids.append(q.id)
+            weights.append(self.DIFFICULTY_WEIGHTS.get(q.difficulty, 1.0))
+
+        all_ids = tuple(q.id for q in rows)
+
+        return _CatalogSnapshot(
+            all_ids=all_ids or core_ids,
+            all_core_ids=core_ids,
+            by_combination=by_combination,
+            core_by_combination=core_by_combination,
+            pools={
+                category: _CategoryPool(ids, weights)
+                for category, (ids, weights) in pool_rows.items()
+            },
+            positions={quest_id: index for index, quest_id in enumerate(all_ids)},
+            quests={q.id: q for q in quests}
+        )
+
+
+# Global cache instance
+quest_catalog_cache = QuestCatalogCache(ttl_seconds=settings.QUEST_CATALOG_CACHE_TTL_SECONDS)
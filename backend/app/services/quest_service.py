@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app import models, schemas
 from fastapi import HTTPException, status
+from app.services.quest_catalog_cache import quest_catalog_cache
+from app.utils.single_flight import shared_reads
 import uuid
 
 class QuestService:
@@ -57,6 +59,8 @@ class QuestService:
         self.db.add(db_quest)
         self.db.commit()
         self.db.refresh(db_quest)
+        quest_catalog_cache.invalidate()
+        shared_reads.invalidate("quests")
         return db_quest
     
     async def deactivate_quest(self, quest_id: str) -> bool:
@@ -67,4 +71,6 @@ class QuestService:
         
         quest.is_active = False
         self.db.commit()
+        quest_catalog_cache.invalidate()
+        shared_reads.invalidate("quests")
         return True
\ No newline at end of file
@@ -0,0 +1,240 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date
+from pathlib import Path
+import json
+import multiprocessing
+import uuid
+
+import numpy as np
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.game_logic import GameLogic
+from app.services.streak_rebuild_service import StreakRebuildService
+
+
+# The XP ledger: a user's XP is what their source rows add up to. Locked
+# runs (live and compacted), completed goals and completed weekly
+# challenges add XP, recorded decay takes it away. Users in [low, high].
+_LEDGER_SQL = text("""
+    SELECT u.id AS user_id, u.total_xp, u.current_level,
+           GREATEST(0, coalesce(runs.xp, 0) + coalesce(archived.xp, 0) + coalesce(goals.xp, 0)
+                       + coalesce(challenges.xp, 0) - coalesce(decay.xp, 0))::int AS expected_xp
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id, sum(total_xp) AS xp FROM daily_runs
+        WHERE user_id BETWEEN :low AND :high AND is_locked GROUP BY user_id
+    ) runs ON runs.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(locked_xp) AS xp FROM user_monthly_summaries
+        WHERE user_id BETWEEN :low AND :high GROUP BY user_id
+    ) archived ON archived.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(xp_reward) AS xp FROM goals
+        WHERE user_id BETWEEN :low AND :high AND is_completed GROUP BY user_id
+    ) goals ON goals.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(xp_earned) AS xp FROM weekly_challenge_completions
+        WHERE user_id BETWEEN :low AND :high AND is_completed GROUP BY user_id
+    ) challenges ON challenges.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(xp_lost) AS xp FROM xp_decay_history
+        WHERE user_id BETWEEN :low AND :high GROUP BY user_id
+    ) decay ON decay.user_id = u.id
+    WHERE u.id BETWEEN :low AND :high
+    ORDER BY u.id
+""")
+
+# Only rows still holding the XP the diff saw: a user who earned XP since
+# is left for the next run instead of being overwritten
+_APPLY_XP_SQL = text("""
+    UPDATE users u
+    SET total_xp = v.expected_xp, current_level = v.expected_level, updated_at = now()
+    FROM unnest(
+        CAST(:user_ids AS uuid[]), CAST(:stored_xp AS int[]),
+        CAST(:expected_xp AS int[]), CAST(:expected_level AS int[])
+    ) AS v(user_id, stored_xp, expected_xp, expected_level)
+    WHERE u.id = v.user_id AND u.total_xp = v.stored_xp
+""")
+
+
+class ReconciliationService:
+    """
+    Checks every user's XP, level and streaks against their source rows.
+
+    XP is written incrementally by several paths (run locks, goals, weekly
+    challenges, decay), so a lost or doubled write leaves `total_xp` off
+    for good. The reconciliation recomputes the ledger for each user and
+    reports every mismatch; with `apply` it also writes the fixes in bulk.
+    The outbox handlers use the same ledger, so a run lock or goal
+    toggle settles the user's total instead of adding to it.
+
+    The user id space is split into ranges handled by separate processes.
+    Each streams its range through a server-side cursor, BATCH_SIZE users
+    at a time, and writes each batch's mismatches to its own report file
+    as it goes, handing back only counts and a capped sample, so memory
+    stays flat however many users (or mismatches) there are.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def expected_xp(self, user_id: uuid.UUID) -> int:
+        """One user's XP according to the ledger"""
+        row = self.db.execute(_LEDGER_SQL, {"low": str(user_id), "high": str(user_id)}).first()
+        return row.expected_xp if row else 0
+
+    def reconcile(
+        self,
+        apply: bool = False,
+        streaks: bool = True,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        report_dir: Optional[Path] = None,
+        sample_size: int = 100,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Diff (and with `apply`, fix) every user. With `report_dir`, every
+        mismatch is written as a JSON line to one file per id range there;
+        at most `sample_size` are returned.
+        """
+        workers = workers or settings.RECONCILE_WORKERS
+        batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+        if report_dir is None and settings.RECONCILE_REPORT_DIR:
+            report_dir = Path(settings.RECONCILE_REPORT_DIR)
+        today = date.today()
+
+        if report_dir is not None:
+            report_dir = Path(report_dir) / today.isoformat()
+            report_dir.mkdir(parents=True, exist_ok=True)
+
+        total_users = self.db.query(func.count(models.User.id)).scalar()
+        self.db.commit()
+
+        stats = {"users": 0, "xp_mismatches": 0, "xp_fixed": 0, "streak_mismatches": 0, "streaks_fixed": 0}
+        sample: List[Dict[str, Any]] = []
+        reports: List[str] = []
+
+        # Spawned, not forked: the caller may be a job thread in the API process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # More ranges than workers, so one dense range does not hold up the rest
+            futures = []
+            for index, (low, high) in enumerate(self.id_ranges(workers * 4)):
+                report_path = str(report_dir / f"range-{index:03d}.jsonl") if report_dir is not None else None
+                futures.append(pool.submit(
+                    _reconcile_range, low, high, today, apply, streaks, batch_size, report_path, sample_size
+                ))
+            for future in as_completed(futures):
+                result = future.result()
+                diffs = result.pop("sample")
+                report_path = result.pop("report")
+                for key, value in result.items():
+                    stats[key] += value
+                sample.extend(diffs[:max(0, sample_size - len(sample))])
+                if report_path is not None:
+                    reports.append(report_path)
+                if progress is not None:
+                    progress(stats["users"], total_users)
+
+        return {"today": today.isoformat(), "applied": apply, **stats, "sample": sample, "reports": sorted(reports)}
+
+    @staticmethod
+    def id_ranges(parts: int) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        """Split the uuid space into `parts` inclusive ranges (uuids compare as 128-bit integers)"""
+        step = (1 << 128) // parts
+        bounds = [part * step for part in range(parts)] + [1 << 128]
+        return [(uuid.UUID(int=bounds[i]), uuid.UUID(int=bounds[i + 1] - 1)) for i in range(parts)]
+
+
+def _reconcile_range(
+    low: uuid.UUID,
+    high: uuid.UUID,
+    today: date,
+    apply: bool,
+    streaks: bool,
+    batch_size: int,
+    report_path: Optional[str],
+    sample_size: int
+) -> Dict[str, Any]:
+    """
+    Worker process: diff (and fix) the users in [low, high]. Mismatches go
+    to `report_path` batch by batch; only the first `sample_size` are kept.
+    """
+    stats: Dict[str, Any] = {
+        "users": 0, "xp_mismatches": 0, "xp_fixed": 0, "streak_mismatches": 0, "streaks_fixed": 0,
+        "sample": [], "report": None
+    }
+    db = SessionLocal()
+    report = open(report_path, "w") if report_path is not None else None
+    try:
+        with engine.connect() as connection:
+            rows = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+                _LEDGER_SQL, {"low": str(low), "high": str(high)}
+            )
+            for batch in rows.partitions():
+                stats["users"] += len(batch)
+                expected_levels = GameLogic.calculate_level_batch(
+                    np.fromiter((row.expected_xp for row in batch), dtype=np.int64, count=len(batch))
+                ).tolist()
+                diffs: List[Dict[str, Any]] = []
+                xp_diffs = []
+                for row, expected_level in zip(batch, expected_levels):
+                    if row.total_xp != row.expected_xp or row.current_level != expected_level:
+                        xp_diffs.append((row, expected_level))
+                        diffs.append({
+                            "kind": "xp",
+                            "user_id": str(row.user_id),
+                            "stored_xp": row.total_xp,
+                            "expected_xp": row.expected_xp,
+                            "stored_level": row.current_level,
+                            "expected_level": expected_level
+                        })
+                stats["xp_mismatches"] += len(xp_diffs)
+
+                streak_diffs = []
+                if streaks:
+                    rebuild = StreakRebuildService(db)
+                    streak_diffs, _ = rebuild.diff_chunk([row.user_id for row in batch], today)
+                    stats["streak_mismatches"] += len(streak_diffs)
+                    diffs.extend({
+                        "kind": "streak",
+                        "user_id": str(diff["user_id"]),
+                        "quest_id": str(diff["quest_id"]),
+                        "stored": list(diff["stored"]) if diff["stored"] else None,
+                        "expected": [diff["current_streak"], diff["longest_streak"], diff["last_completed_date"]]
+                    } for diff in streak_diffs)
+
+                if diffs:
+                    lines = [json.dumps(diff, default=str) for diff in diffs]
+                    if report is not None:
+                        report.writelines(line + "\n" for line in lines)
+                        report.flush()
+                    room = sample_size - len(stats["sample"])
+                    stats["sample"].extend(json.loads(line) for line in lines[:max(0, room)])
+
+                if apply:
+                    if xp_diffs:
+                        stats["xp_fixed"] += db.execute(_APPLY_XP_SQL, {
+                            "user_ids": [str(row.user_id) for row, _ in xp_diffs],
+                            "stored_xp": [row.total_xp for row, _ in xp_diffs],
+                            "expected_xp": [row.expected_xp for row, _ in xp_diffs],
+                            "expected_level": [level for _, level in xp_diffs]
+                        }).rowcount
+                    if streak_diffs:
+                        stats["streaks_fixed"] += StreakRebuildService(db).apply_changes(streak_diffs)
+                    db.commit()
+                else:
+                    db.rollback()
+    finally:
+        if report is not None:
+            report.close()
+        db.close()
+
+    stats["report"] = report_path
+    return stats
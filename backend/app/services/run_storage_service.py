@@ -0,0 +1,336 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+from datetime import date, datetime, timedelta
+import uuid
+
+from app import models
+from app.config import settings
+from app.services.quest_catalog_cache import CatalogQuest, quest_catalog_cache
+
+
+class CompletionView(NamedTuple):
+    """One quest slot of a run, independent of how it is stored"""
+    completion_id: uuid.UUID
+    quest: CatalogQuest
+    completed: bool
+    xp_earned: int
+    completed_at: Optional[datetime]
+
+
+class RunStorageService:
+    """
+    Reads and writes a run's quest completions in either storage layout.
+
+    Row layout: one `DailyQuestCompletion` row per quest (the original).
+    Compact layout: the run itself holds an ordered `quest_ids` array, a
+    `completion_bits` bitset and `completion_times` / `completion_xp`
+    arrays, so reading a run needs no join and no completion rows. Quest
+    details come from the catalog cache in both layouts; the XP a slot
+    earned is always the stored value, never the quest's current XP.
+
+    Compact completion ids are derived as uuid5(run_id, quest_id), which
+    keeps them stable when a run is materialized back into rows.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- Encoding helpers ----
+
+    @staticmethod
+    def completion_id_for(run_id: uuid.UUID, quest_id: uuid.UUID) -> uuid.UUID:
+        """Stable completion id for a quest slot of a compact run"""
+        return uuid.uuid5(run_id, str(quest_id))
+
+    @staticmethod
+    def encode_bits(flags: Sequence[bool]) -> bytes:
+        """Pack booleans into a little-endian bitset (bit i -> byte i // 8)"""
+        bits = bytearray((len(flags) + 7) // 8)
+        for i, flag in enumerate(flags):
+            if flag:
+                bits[i // 8] |= 1 << (i % 8)
+        return bytes(bits)
+
+    @staticmethod
+    def decode_bits(bits: Optional[bytes], count: int) -> List[bool]:
+        """Unpack the first `count` flags of a bitset"""
+        bits = bits or b""
+        return [
+            i // 8 < len(bits) and bool(bits[i // 8] & (1 << (i % 8)))
+            for i in range(count)
+        ]
+
+    # ---- Run lifecycle ----
+
+    def initialize_run(
+        self,
+        run: models.DailyRun,
+        quest_ids: Sequence[uuid.UUID],
+        compact: Optional[bool] = None
+    ) -> None:
+        """Attach quest slots to a freshly flushed run"""
+        if compact is None:
+            compact = settings.COMPACT_RUN_STORAGE
+
+        if compact:
+            run.quest_ids = list(quest_ids)
+            run.completion_bits = self.encode_bits([False] * len(quest_ids))
+            run.completion_times = [None] * len(quest_ids)
+            run.completion_xp = [0] * len(quest_ids)
+            return
+
+        for quest_id in quest_ids:
+            self.db.add(models.DailyQuestCompletion(
+                daily_run_id=run.id,
+                run_date=run.date,
+                quest_id=quest_id,
+                completed=False,
+                xp_earned=0
+            ))
+
+    def get_completions(self, run: models.DailyRun) -> List[CompletionView]:
+        """Decode all quest slots of one run"""
+        return self.get_completions_for_runs([run])[run.id]
+
+    def get_completions_for_runs(self, runs: Iterable[models.DailyRun]) -> Dict[uuid.UUID, List[CompletionView]]:
+        """Decode many runs with at most one query (for row-layout runs)"""
+        runs = list(runs)
+        result: Dict[uuid.UUID, List[CompletionView]] = {run.id: [] for run in runs}
+
+        row_runs = [run for run in runs if not run.is_compact]
+        rows: List[models.DailyQuestCompletion] = []
+        if row_runs:
+            # run_date lets Postgres prune to the runs' month partitions
+            rows = self.db.query(models.DailyQuestCompletion).filter(
+                models.DailyQuestCompletion.daily_run_id.in_([run.id for run in row_runs]),
+                models.DailyQuestCompletion.run_date.in_({run.date for run in row_runs})
+            ).all()
+
+        quest_ids: Set[uuid.UUID] = {row.quest_id for row in rows}
+        for run in runs:
+            if run.is_compact:
+                quest_ids.update(run.quest_ids)
+        quests = quest_catalog_cache.get_quests(self.db, quest_ids)
+
+        for row in rows:
+            quest = quests.get(row.quest_id)
+            if quest is None:
+                continue
+            result[row.daily_run_id].append(CompletionView(
+                completion_id=row.id,
+                quest=quest,
+                completed=row.completed,
+                xp_earned=row.xp_earned,
+                completed_at=row.completed_at
+            ))
+
+        for run in runs:
+            if run.is_compact:
+                result[run.id] = self._decode_compact(run, quests)
+
+        return result
+
+    def toggle_completion(self, run: models.DailyRun, completion_id: uuid.UUID) -> Optional[CompletionView]:
+        """Flip one quest slot and recompute run totals; None if not found"""
+        if isinstance(completion_id, str):
+            try:
+                completion_id = uuid.UUID(completion_id)
+            except ValueError:
+                return None
+
+        if run.is_compact:
+            view = self._toggle_compact(run, completion_id)
+        else:
+            view = self._toggle_row(run, completion_id)
+
+        if view is not None:
+            self.recalculate_run(run)
+        return view
+
+    def recalculate_run(self, run: models.DailyRun) -> None:
+        """Recalculate daily run total XP and perfect status"""
+        completions = self.get_completions(run)
+        run.total_xp = sum(c.xp_earned for c in completions)
+        run.is_perfect = all(c.completed for c in completions) if completions else False
+
+    def core_quests_completed(self, run: models.DailyRun) -> bool:
+        """True when every core quest in the run is completed"""
+        return all(c.completed for c in self.get_completions(run) if c.quest.is_core)
+
+    def get_recently_completed_quest_ids(self, user_id: uuid.UUID, before_date: date, days: int) -> Set[uuid.UUID]:
+        """Quests completed by the user in the `days` days before `before_date`"""
+        if days <= 0:
+            return set()
+
+        start_date = before_date - timedelta(days=days)
+
+        rows = self.db.query(models.DailyQuestCompletion.quest_id).join(
+            models.DailyRun,
+            and_(
+                models.DailyQuestCompletion.daily_run_id == models.DailyRun.id,
+                models.DailyQuestCompletion.run_date == models.DailyRun.date
+            )
+        ).filter(
+            models.DailyRun.user_id == user_id,
+            models.DailyRun.date >= start_date,
+            models.DailyRun.date < before_date,
+            models.DailyQuestCompletion.run_date >= start_date,
+            models.DailyQuestCompletion.run_date < before_date,
+            models.DailyQuestCompletion.completed == True
+        ).distinct().all()
+        quest_ids = {quest_id for (quest_id,) in rows}
+
+        compact_runs = self.db.query(
+            models.DailyRun.quest_ids,
+            models.DailyRun.completion_bits
+        ).filter(
+            models.DailyRun.user_id == user_id,
+            models.DailyRun.date >= start_date,
+            models.DailyRun.date < before_date,
+            models.DailyRun.is_compact
+        ).all()
+        for run_quest_ids, bits in compact_runs:
+            flags = self.decode_bits(bits, len(run_quest_ids))
+            quest_ids.update(q for q, done in zip(run_quest_ids, flags) if done)
+
+        return quest_ids
+
+    # ---- Layout conversion ----
+
+    def compact_run(self, run: models.DailyRun) -> bool:
+        """Move a row-layout run into the compact columns; False if already compact"""
+        if run.is_compact:
+            return False
+
+        rows = self.db.query(models.DailyQuestCompletion).filter(
+            models.DailyQuestCompletion.daily_run_id == run.id,
+            models.DailyQuestCompletion.run_date == run.date
+        ).all()
+
+        run.quest_ids = [row.quest_id for row in rows]
+        run.completion_bits = self.encode_bits([row.completed for row in rows])
+        run.completion_times = [row.completed_at for row in rows]
+        run.completion_xp = [row.xp_earned for row in rows]
+
+        for row in rows:
+            self.db.delete(row)
+        return True
+
+    def materialize_run(self, run: models.DailyRun) -> bool:
+        """Write completion rows for a compact run and clear its compact columns"""
+        if not run.is_compact:
+            return False
+
+        quests = quest_catalog_cache.get_quests(self.db, run.quest_ids)
+        for view in self._decode_compact(run, quests):
+            self.db.add(models.DailyQuestCompletion(
+                id=view.completion_id,
+                daily_run_id=run.id,
+                run_date=run.date,
+                quest_id=view.quest.id,
+                completed=view.completed,
+                xp_earned=view.xp_earned,
+                completed_at=view.completed_at
+            ))
+
+        run.quest_ids = None
+        run.completion_bits = None
+        run.completion_times = None
+        run.completion_xp = None
+        return True
+
+    # ---- Internals ----
+
+    def _decode_compact(self, run: models.DailyRun, quests: Dict[uuid.UUID, CatalogQuest]) -> List[CompletionView]:
+        quest_ids = run.quest_ids
+        flags = self.decode_bits(run.completion_bits, len(quest_ids))
+        times = run.completion_times or [None] * len(quest_ids)
+        slot_xp = self._slot_xp(run)
+
+        views = []
+        for quest_id, completed, completed_at, xp_earned in zip(quest_ids, flags, times, slot_xp):
+            quest = quests.get(quest_id)
+            if quest is None:
+                continue
+            views.append(CompletionView(
+                completion_id=self.completion_id_for(run.id, quest_id),
+                quest=quest,
+                completed=completed,
+                xp_earned=xp_earned,
+                completed_at=completed_at
+            ))
+        return views
+
+    @staticmethod
+    def _slot_xp(run: models.DailyRun) -> List[int]:
+        """
+        Stored XP per slot. Every compact run has it: new ones are written
+        with it and migration d4a8e2c6b1f3 backfilled the older ones.
+        """
+        if run.completion_xp is None:
+            raise ValueError(
+                f"Compact daily run {run.id} ({run.date}) has no completion_xp; "
+                "apply migration d4a8e2c6b1f3 to backfill it"
+            )
+        return list(run.completion_xp)
+
+    def _toggle_compact(self, run: models.DailyRun, completion_id: uuid.UUID) -> Optional[CompletionView]:
+        quest_ids = list(run.quest_ids)
+        index = next(
+            (i for i, quest_id in enumerate(quest_ids)
+             if self.completion_id_for(run.id, quest_id) == completion_id),
+            None
+        )
+        if index is None:
+            return None
+
+        quest = quest_catalog_cache.get_quests(self.db, [quest_ids[index]]).get(quest_ids[index])
+        if quest is None:
+            return None
+
+        flags = self.decode_bits(run.completion_bits, len(quest_ids))
+        times = list(run.completion_times or [None] * len(quest_ids))
+        slot_xp = self._slot_xp(run)
+
+        flags[index] = not flags[index]
+        times[index] = datetime.utcnow() if flags[index] else None
+        slot_xp[index] = quest.base_xp if flags[index] else 0
+
+        # Assign new objects so SQLAlchemy sees the change
+        run.completion_bits = self.encode_bits(flags)
+        run.completion_times = times
+        run.completion_xp = slot_xp
+
+        return CompletionView(
+            completion_id=completion_id,
+            quest=quest,
+            completed=flags[index],
+            xp_earned=slot_xp[index],
+            completed_at=times[index]
+        )
+
+    def _toggle_row(self, run: models.DailyRun, completion_id: uuid.UUID) -> Optional[CompletionView]:
+        completion = self.db.query(models.DailyQuestCompletion).filter(
+            models.DailyQuestCompletion.id == completion_id,
+            models.DailyQuestCompletion.daily_run_id == run.id,
+            models.DailyQuestCompletion.run_date == run.date
+        ).first()
+        if not completion:
+            return None
+
+        quest = quest_catalog_cache.get_quests(self.db, [completion.quest_id]).get(completion.quest_id)
+        if quest is None:
+            return None
+
+        completion.completed = not completion.completed
+        completion.xp_earned = quest.base_xp if completion.completed else 0
+        completion.completed_at = datetime.utcnow() if completion.completed else None
+
+        return CompletionView(
+            completion_id=completion.id,
+            quest=quest,
+            completed=completion.completed,
+            xp_earned=completion.xp_earned,
+            completed_at=completion.completed_at
+        )
@@ -0,0 +1,252 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from datetime import date, timedelta
+import uuid
+
+import numpy as np
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.services import sync_service
+from app.services.sync_service import SyncService
+
+_EPOCH = date(1970, 1, 1)
+
+# Distinct days each (user, core quest) was completed, from both run
+# layouts, as day numbers sorted by (user, quest, day). `grp` numbers the
+# (user, quest) pairs 0..n-1 in the same order.
+_COMPLETED_DAYS_SQL = text("""
+    SELECT user_id, quest_id, day, dense_rank() OVER (ORDER BY user_id, quest_id) - 1 AS grp
+    FROM (
+        SELECT r.user_id, c.quest_id, r.date - DATE '1970-01-01' AS day
+        FROM daily_quest_completions c
+        JOIN daily_runs r ON r.id = c.daily_run_id AND r.date = c.run_date
+        JOIN quests q ON q.id = c.quest_id
+        WHERE r.user_id = ANY(CAST(:user_ids AS uuid[])) AND c.completed AND q.is_core
+        UNION
+        SELECT r.user_id, s.quest_id, r.date - DATE '1970-01-01'
+        FROM daily_runs r
+        CROSS JOIN LATERAL unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+        JOIN quests q ON q.id = s.quest_id
+        WHERE r.user_id = ANY(CAST(:user_ids AS uuid[])) AND r.quest_ids IS NOT NULL AND q.is_core
+          AND get_bit(r.completion_bits, (s.ord - 1)::int) = 1
+    ) completed
+    ORDER BY user_id, quest_id, day
+""")
+
+# (current_streak, longest_streak, last_completed_date) of one streak row
+StreakState = Tuple[int, int, Optional[date]]
+
+
+class StreakRebuildService:
+    """
+    Recomputes streaks from completion history instead of replaying them.
+
+    `StreakService.record_completion` only ever extends a streak, so a row
+    that went wrong (a bug, a manual data fix, a completion toggled off)
+    stays wrong. The rebuild pulls every completed core-quest day for a
+    chunk of users in one query and derives current and longest streaks by
+    run-length encoding the sorted day numbers with NumPy, then upserts
+    only the rows that differ.
+
+    Compacted months have no daily detail. For users with monthly
+    summaries, a stored streak longer than the raw history shows is kept,
+    since it may run back into archived months.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- Streak math ----
+
+    @staticmethod
+    def compute_streaks(groups: np.ndarray, days: np.ndarray, today_day: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Current streak, longest streak and last day for each group.
+
+        `groups` numbers groups 0..n-1 and `days` holds day numbers, both
+        sorted by (group, day) without duplicates. A run of consecutive
+        days starts wherever the group changes or a day is skipped; a
+        group's current streak is its last run if that ended today or
+        yesterday, else 0.
+        """
+        if len(days) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+
+        starts = np.ones(len(days), dtype=bool)
+        starts[1:] = (groups[1:] != groups[:-1]) | (days[1:] != days[:-1] + 1)
+        run_starts = np.flatnonzero(starts)
+        run_lengths = np.diff(np.append(run_starts, len(days)))
+
+        run_groups = groups[run_starts]
+        first_runs = np.flatnonzero(np.r_[True, run_groups[1:] != run_groups[:-1]])
+        last_runs = np.r_[first_runs[1:], len(run_starts)] - 1
+
+        longest = np.maximum.reduceat(run_lengths, first_runs)
+        last_day = days[run_starts[last_runs] + run_lengths[last_runs] - 1]
+        current = np.where(last_day >= today_day - 1, run_lengths[last_runs], 0)
+        return current, longest, last_day
+
+    # ---- Rebuilds ----
+
+    def rebuild_user(self, user_id: uuid.UUID, today: Optional[date] = None) -> Dict[str, int]:
+        """Rebuild one user's streaks and commit"""
+        return self._rebuild_chunk([user_id], today or date.today())
+
+    def rebuild_all(
+        self,
+        today: Optional[date] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Rebuild every user's streaks, `chunk_size` users per transaction,
+        with `workers` chunks in flight at once (each in its own session).
+        """
+        today = today or date.today()
+        chunk_size = chunk_size or settings.STREAK_REBUILD_CHUNK_SIZE
+        workers = workers or settings.STREAK_REBUILD_WORKERS
+
+        total_users = self.db.query(func.count(models.User.id)).scalar()
+        stats = {"users": 0, "streaks_checked": 0, "streaks_updated": 0, "chunks": 0}
+
+        def collect(done: Set[Future]) -> None:
+            for future in done:
+                for key, value in future.result().items():
+                    stats[key] += value
+                stats["chunks"] += 1
+            if progress is not None:
+                progress(stats["users"], total_users)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="streak-rebuild") as pool:
+            pending: Set[Future] = set()
+            for user_ids in self._user_chunks(chunk_size):
+                pending.add(pool.submit(self._rebuild_chunk_in_session, user_ids, today))
+                # Keep the queue short: chunks are read lazily, not all up front
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(wait(pending)[0])
+
+        return {"today": today.isoformat(), **stats}
+
+    def diff_chunk(self, user_ids: List[uuid.UUID], today: date) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Streak rows of these users that differ from their history, as
+        upsert rows with the stored state under "stored", and the number
+        of streaks checked. Writes nothing.
+        """
+        rows = self.db.execute(_COMPLETED_DAYS_SQL, {"user_ids": [str(user_id) for user_id in user_ids]}).all()
+        groups = np.fromiter((row.grp for row in rows), dtype=np.int64, count=len(rows))
+        days = np.fromiter((row.day for row in rows), dtype=np.int64, count=len(rows))
+
+        current, longest, last_day = self.compute_streaks(groups, days, (today - _EPOCH).days)
+        group_rows = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(rows) else []
+
+        rebuilt: Dict[Tuple[uuid.UUID, uuid.UUID], StreakState] = {
+            (rows[i].user_id, rows[i].quest_id): (int(c), int(l), _EPOCH + timedelta(days=int(d)))
+            for i, c, l, d in zip(group_rows, current, longest, last_day)
+        }
+
+        stored: Dict[Tuple[uuid.UUID, uuid.UUID], StreakState] = {
+            (row.user_id, row.quest_id): (row.current_streak, row.longest_streak, row.last_completed_date)
+            for row in self.db.query(
+                models.Streak.user_id,
+                models.Streak.quest_id,
+                models.Streak.current_streak,
+                models.Streak.longest_streak,
+                models.Streak.last_completed_date
+            ).filter(models.Streak.user_id.in_(user_ids))
+        }
+        archived = {
+            user_id for (user_id,) in self.db.query(models.UserMonthlySummary.user_id).filter(
+                models.UserMonthlySummary.user_id.in_(user_ids)
+            ).distinct()
+        }
+
+        keys = rebuilt.keys() | stored.keys()
+        changed = []
+        for key in keys:
+            target = self._reconcile(rebuilt.get(key), stored.get(key), key[0] in archived)
+            if target != stored.get(key):
+                changed.append({
+                    "user_id": key[0],
+                    "quest_id": key[1],
+                    "current_streak": target[0],
+                    "longest_streak": target[1],
+                    "last_completed_date": target[2],
+                    "stored": stored.get(key)
+                })
+        return changed, len(keys)
+
+    def apply_changes(self, changed: List[Dict[str, Any]]) -> int:
+        """Upsert rows from `diff_chunk` and stamp them for sync; the caller commits"""
+        if not changed:
+            return 0
+
+        statement = insert(models.Streak).values([
+            {**{key: value for key, value in row.items() if key != "stored"}, "id": uuid.uuid4()}
+            for row in changed
+        ])
+        written = self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "quest_id"],
+                set_={
+                    "current_streak": statement.excluded.current_streak,
+                    "longest_streak": statement.excluded.longest_streak,
+                    "last_completed_date": statement.excluded.last_completed_date,
+                    "updated_at": func.now()
+                }
+            ).returning(models.Streak.id, models.Streak.user_id)
+        ).all()
+        SyncService(self.db).record_bulk_changes(sync_service.STREAK, [(row.user_id, row.id) for row in written])
+        return len(written)
+
+    # ---- Internals ----
+
+    def _user_chunks(self, chunk_size: int) -> Iterator[List[uuid.UUID]]:
+        last_id = None
+        while True:
+            query = self.db.query(models.User.id)
+            if last_id is not None:
+                query = query.filter(models.User.id > last_id)
+            user_ids = [user_id for (user_id,) in query.order_by(models.User.id).limit(chunk_size)]
+            self.db.commit()
+            if not user_ids:
+                return
+            yield user_ids
+            last_id = user_ids[-1]
+
+    @staticmethod
+    def _rebuild_chunk_in_session(user_ids: List[uuid.UUID], today: date) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return StreakRebuildService(db)._rebuild_chunk(user_ids, today)
+        finally:
+            db.close()
+
+    def _rebuild_chunk(self, user_ids: List[uuid.UUID], today: date) -> Dict[str, int]:
+        changed, checked = self.diff_chunk(user_ids, today)
+        self.apply_changes(changed)
+        self.db.commit()
+        return {"users": len(user_ids), "streaks_checked": checked, "streaks_updated": len(changed)}
+
+    @staticmethod
+    def _reconcile(rebuilt: Optional[StreakState], stored: Optional[StreakState], archived: bool) -> StreakState:
+        if rebuilt is None:
+            rebuilt = (0, 0, None)
+        if not archived or stored is None:
+            return rebuilt
+
+        current, longest, last_completed = rebuilt
+        if last_completed is None or last_completed == stored[2]:
+            # Same streak end: the part before raw history may be archived
+            current = max(current, stored[0])
+            last_completed = stored[2]
+        return current, max(longest, stored[1]), last_completed
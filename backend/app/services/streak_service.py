@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update
 from typing import List, Dict, Optional
-from datetime import date
+from datetime import date, timedelta
 from app import models
+from app.game_logic import StreakCalculator
+from app.services import sync_service
+from app.services.sync_service import SyncService
 import uuid
 
 class StreakService:
@@ -49,6 +53,36 @@ class StreakService:
             "longest_individual_streak": max_streak
         }
     
+    def record_completion(self, user_id: uuid.UUID, quest_id: uuid.UUID, completion_date: date) -> models.Streak:
+        """Extend (or start) a core quest streak; recording the same day twice is a no-op"""
+        streak = self.db.query(models.Streak).filter(
+            models.Streak.user_id == user_id,
+            models.Streak.quest_id == quest_id
+        ).first()
+        
+        if streak:
+            # A completion older than the streak's last one is already counted
+            if streak.last_completed_date and completion_date < streak.last_completed_date:
+                return streak
+            
+            streak.current_streak, streak.longest_streak = StreakCalculator.update_streak(
+                streak.current_streak,
+                streak.longest_streak,
+                streak.last_completed_date,
+                completion_date
+            )
+            streak.last_completed_date = completion_date
+        else:
+            streak = models.Streak(
+                user_id=user_id,
+                quest_id=quest_id,
+                current_streak=1,
+                longest_streak=1,
+                last_completed_date=completion_date
+            )
+            self.db.add(streak)
+        return streak
+    
     def _is_streak_active(self, last_completed_date: Optional[date]) -> bool:
         """Check if a streak is still alive based on the current date"""
         if not last_completed_date:
@@ -57,14 +91,36 @@ class StreakService:
         return days_since <= 1
 
     async def reset_broken_streaks(self, user_id: uuid.UUID):
-        """Reset streaks to zero if a day was missed; intended for cron jobs"""
-        streaks = self.db.query(models.Streak).filter(
-            models.Streak.user_id == user_id,
-            models.Streak.current_streak > 0
-        ).all()
+        """Reset streaks to zero if a day was missed"""
+        self.reset_all_broken_streaks(user_id=user_id)
+    
+    def reset_all_broken_streaks(self, today: Optional[date] = None, user_id: Optional[uuid.UUID] = None) -> Dict:
+        """
+        Zero every streak whose last completion is before yesterday, in one
+        UPDATE (nightly streak_reset job). Only live streaks are scanned,
+        through the partial idx_streak_live index.
+        """
+        today = today or date.today()
+        cutoff = today - timedelta(days=1)
         
-        for s in streaks:
-            if not self._is_streak_active(s.last_completed_date):
-                s.current_streak = 0
+        conditions = [
+            models.Streak.current_streak > 0,
+            models.Streak.last_completed_date < cutoff
+        ]
+        if user_id is not None:
+            conditions.append(models.Streak.user_id == user_id)
+        
+        reset = self.db.execute(
+            update(models.Streak)
+            .where(*conditions)
+            .values(current_streak=0)
+            .returning(models.Streak.id, models.Streak.user_id)
+        ).all()
+        SyncService(self.db).record_bulk_changes(sync_service.STREAK, [(row.user_id, row.id) for row in reset])
+        self.db.commit()
         
-        self.db.commit()
\ No newline at end of file
+        return {
+            "cutoff": cutoff.isoformat(),
+            "streaks_reset": len(reset),
+            "users_affected": len({row.user_id for row in reset})
+        }
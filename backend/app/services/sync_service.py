@@ -0,0 +1,190 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import event, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Iterable, List, Optional, Tuple
+import uuid
+
+from app import models
+
+
+# Entity types a client can sync; completions travel inside their run and
+# milestones inside their goal
+RUN = "run"
+GOAL = "goal"
+STREAK = "streak"
+CHALLENGE_COMPLETION = "challenge_completion"
+
+
+# Stamps entities changed by a set-based statement: one version bump per user
+_STAMP_BULK_SQL = text("""
+    WITH changed AS (
+        SELECT DISTINCT * FROM unnest(CAST(:user_ids AS uuid[]), CAST(:entity_ids AS uuid[])) AS c(user_id, entity_id)
+    ), bumped AS (
+        UPDATE users u SET sync_version = u.sync_version + 1
+        FROM (SELECT DISTINCT user_id FROM changed) c
+        WHERE u.id = c.user_id
+        RETURNING u.id, u.sync_version
+    )
+    INSERT INTO sync_changes (id, user_id, entity_type, entity_id, version, is_deleted)
+    SELECT gen_random_uuid(), changed.user_id, :entity_type, changed.entity_id, bumped.sync_version, false
+    FROM changed JOIN bumped ON bumped.id = changed.user_id
+    ON CONFLICT (user_id, entity_type, entity_id)
+    DO UPDATE SET version = EXCLUDED.version, is_deleted = false, changed_at = now()
+""")
+
+
+class SyncService:
+    """
+    Per-user change feed for offline-capable clients.
+
+    Every flush that touches a user's runs, completions, goals, milestones,
+    streaks or challenge completions bumps `users.sync_version` once and
+    stamps the touched entities in `sync_changes` with the new version
+    (deletions become tombstones). A client passes the highest version it
+    has seen and gets back only entities stamped after it.
+
+    Rows removed by set-based maintenance (history compaction) are not
+    tracked: clients keep archived runs they already have.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_changes(self, user_id: uuid.UUID, since: int, limit: int) -> Tuple[List[models.SyncChange], int, bool]:
+        """
+        Changes after `since`, oldest first, as (changes, cursor, has_more).
+        A page never splits one version, so the cursor is always safe to resume from.
+        """
+        changes = self.db.query(models.SyncChange).filter(
+            models.SyncChange.user_id == user_id,
+            models.SyncChange.version > since
+        ).order_by(models.SyncChange.version).limit(limit + 1).all()
+
+        has_more = len(changes) > limit
+        if has_more:
+            changes = changes[:limit]
+            last_version = changes[-1].version
+            seen = {change.id for change in changes}
+            changes += [
+                change for change in self.db.query(models.SyncChange).filter(
+                    models.SyncChange.user_id == user_id,
+                    models.SyncChange.version == last_version
+                ).all()
+                if change.id not in seen
+            ]
+
+        if changes:
+            cursor = changes[-1].version
+        else:
+            cursor = self.db.query(models.User.sync_version).filter(models.User.id == user_id).scalar() or since
+        return changes, max(cursor, since), has_more
+
+    def record_bulk_changes(self, entity_type: str, changes: Iterable[Tuple[uuid.UUID, uuid.UUID]]) -> int:
+        """
+        Stamp (user_id, entity_id) pairs changed by a set-based statement
+        the flush hook cannot see, in the caller's transaction.
+        """
+        changes = list(changes)
+        if not changes:
+            return 0
+        return self.db.execute(_STAMP_BULK_SQL, {
+            "entity_type": entity_type,
+            "user_ids": [str(user_id) for user_id, _ in changes],
+            "entity_ids": [str(entity_id) for _, entity_id in changes]
+        }).rowcount
+
+
+# ---- Change capture ----
+
+def _lookup_owner(session: Session, model, key, column) -> Optional[uuid.UUID]:
+    """Owner of a parent row, from the identity map when it is loaded"""
+    parent = session.identity_map.get(identity_key(model, key))
+    if parent is not None:
+        return parent.user_id
+
+    table = model.__table__
+    conditions = [table.c[name] == value for name, value in zip(column, key if isinstance(key, tuple) else (key,))]
+    return session.connection().execute(select(table.c.user_id).where(*conditions)).scalar()
+
+
+def _entity_for(session: Session, obj) -> Optional[Tuple[uuid.UUID, str, uuid.UUID]]:
+    """(user_id, entity type, entity id) a changed object belongs to"""
+    if isinstance(obj, models.DailyRun):
+        return obj.user_id, RUN, obj.id
+    if isinstance(obj, models.DailyQuestCompletion):
+        owner = _lookup_owner(session, models.DailyRun, (obj.daily_run_id, obj.run_date), ("id", "date"))
+        return (owner, RUN, obj.daily_run_id) if owner else None
+    if isinstance(obj, models.Goal):
+        return obj.user_id, GOAL, obj.id
+    if isinstance(obj, models.Milestone):
+        owner = _lookup_owner(session, models.Goal, obj.goal_id, ("id",))
+        return (owner, GOAL, obj.goal_id) if owner else None
+    if isinstance(obj, models.Streak):
+        return obj.user_id, STREAK, obj.id
+    if isinstance(obj, models.WeeklyChallengeCompletion):
+        return obj.user_id, CHALLENGE_COMPLETION, obj.id
+    return None
+
+
+# Objects whose deletion is a tombstone; deleting a child only changes its parent
+_TOMBSTONE_TYPES = (models.DailyRun, models.Goal, models.Streak, models.WeeklyChallengeCompletion)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_sync_changes(session: Session, flush_context) -> None:
+    # (user_id) -> {(entity type, entity id): is_deleted}
+    touched: Dict[uuid.UUID, Dict[Tuple[str, uuid.UUID], bool]] = {}
+
+    def touch(obj, deleted: bool) -> None:
+        entity = _entity_for(session, obj)
+        if entity is None:
+            return
+        user_id, entity_type, entity_id = entity
+        entities = touched.setdefault(user_id, {})
+        # A tombstone wins over a change to the same entity in the same flush
+        entities[(entity_type, entity_id)] = entities.get((entity_type, entity_id), False) or deleted
+
+    for obj in session.new:
+        touch(obj, False)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            touch(obj, False)
+    for obj in session.deleted:
+        touch(obj, isinstance(obj, _TOMBSTONE_TYPES))
+
+    if not touched:
+        return
+
+    connection = session.connection()
+    users = models.User.__table__
+    for user_id, entities in touched.items():
+        # Row-locks the user until commit, so versions commit in order
+        version = connection.execute(
+            update(users)
+            .where(users.c.id == user_id)
+            .values(sync_version=users.c.sync_version + 1, updated_at=users.c.updated_at)
+            .returning(users.c.sync_version)
+        ).scalar()
+        if version is None:
+            continue
+
+        statement = insert(models.SyncChange.__table__).values([
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "version": version,
+                "is_deleted": deleted
+            }
+            for (entity_type, entity_id), deleted in entities.items()
+        ])
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "entity_type", "entity_id"],
+            set_={
+                "version": statement.excluded.version,
+                "is_deleted": statement.excluded.is_deleted,
+                "changed_at": statement.excluded.changed_at
+            }
+        ))
@@ -0,0 +1,236 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from typing import Any, Callable, Dict, Optional, Set
+from datetime import datetime
+import asyncio
+import json
+import logging
+import select
+import threading
+import uuid
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Events are plain JSON-ready dicts: {"type", "user_id", "data", "published_at"}
+UserEvent = Dict[str, Any]
+
+# Event types
+QUEST_TOGGLED = "quest_toggled"
+RUN_LOCKED = "run_locked"
+CHALLENGE_COMPLETED = "challenge_completed"
+CHALLENGE_UNLOCKED = "challenge_unlocked"
+GOAL_COMPLETED = "goal_completed"
+XP_DECAYED = "xp_decayed"
+
+
+class EventBroker:
+    """
+    Carries published events to every worker's hub.
+
+    `publish` hands an event to the broker; whatever the broker receives is
+    passed to the callback given to `start`. An unstarted broker drops
+    what it receives (scripts and cron jobs only publish).
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[UserEvent], None]] = None
+
+    def start(self, deliver: Callable[[UserEvent], None]) -> None:
+        self._deliver = deliver
+
+    def stop(self) -> None:
+        self._deliver = None
+
+    def publish(self, user_event: UserEvent) -> None:
+        if self._deliver is not None:
+            self._deliver(user_event)
+
+
+class LocalEventBroker(EventBroker):
+    """Single-worker deployments and tests: events never leave the process"""
+
+
+class PostgresEventBroker(EventBroker):
+    """
+    Multi-worker deployments: events go through Postgres NOTIFY, and a
+    listener thread per worker LISTENs on the channel and delivers them.
+
+    A publisher does not need a listener, so events from the decay cron
+    or another process reach clients connected to any API worker.
+    """
+
+    CHANNEL = "user_events"
+    POLL_SECONDS = 5.0
+
+    def __init__(self, bind: Engine):
+        super().__init__()
+        self.bind = bind
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[UserEvent], None]) -> None:
+        super().start(deliver)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="user-event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.POLL_SECONDS + 1)
+            self._thread = None
+        super().stop()
+
+    def publish(self, user_event: UserEvent) -> None:
+        with self.bind.connect() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.CHANNEL, "payload": json.dumps(user_event)}
+            )
+            connection.commit()
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            pooled = None
+            try:
+                pooled = self.bind.raw_connection()
+                connection = pooled.driver_connection
+                connection.autocommit = True
+                connection.cursor().execute(f"LISTEN {self.CHANNEL}")
+
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], self.POLL_SECONDS) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        if self._deliver is not None:
+                            self._deliver(json.loads(notification.payload))
+            except Exception:
+                logger.exception("User event listener failed; reconnecting")
+                self._stopping.wait(self.POLL_SECONDS)
+            finally:
+                if pooled is not None:
+                    # Still LISTENing in autocommit mode: never hand it back to the pool
+                    pooled.invalidate()
+
+
+class Subscription:
+    """One open stream: a bounded queue owned by the stream's event loop"""
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, user_event: UserEvent) -> None:
+        # A client that stopped reading loses its oldest events, not the newest
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(user_event)
+
+
+class UserEventHub:
+    """
+    Per-user fan-out of state-change events to open streams.
+
+    Services call `publish_after_commit` inside their transaction; the
+    events go to the broker when it commits (and are dropped on rollback),
+    and the broker delivers them to the hub of every worker, which pushes
+    them onto that user's subscriptions. Delivery may come from any
+    thread, so each push is scheduled on the subscriber's own loop.
+    """
+
+    def __init__(self, broker: EventBroker, queue_size: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    # ---- Lifecycle ----
+
+    def start(self) -> None:
+        self.broker.start(self.deliver)
+
+    def stop(self) -> None:
+        self.broker.stop()
+
+    # ---- Subscribers ----
+
+    def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        """Open a subscription; must be called from the stream's event loop"""
+        subscription = Subscription(str(user_id), self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(subscription.user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    # ---- Publishing ----
+
+    def publish_after_commit(self, db: Session, user_id: uuid.UUID, event_type: str, data: Dict[str, Any]) -> None:
+        """Publish once `db` commits; immediately if it has no open transaction"""
+        user_event = {
+            "type": event_type,
+            "user_id": str(user_id),
+            "data": json.loads(json.dumps(data, default=str)),
+            "published_at": datetime.utcnow().isoformat()
+        }
+        if db.in_transaction():
+            db.info.setdefault(_PENDING_KEY, []).append(user_event)
+        else:
+            self.broker.publish(user_event)
+
+    def deliver(self, user_event: UserEvent) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_event["user_id"], ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, user_event)
+            except RuntimeError:
+                # The stream's loop has already closed
+                self.unsubscribe(subscription)
+
+
+def _create_broker() -> EventBroker:
+    if settings.EVENT_BROKER_BACKEND == "local":
+        return LocalEventBroker()
+    return PostgresEventBroker(engine)
+
+
+# Global hub instance
+user_events = UserEventHub(_create_broker(), settings.EVENT_STREAM_QUEUE_SIZE)
+
+
+# ---- Publish only what actually committed ----
+
+_PENDING_KEY = "user_events_pending"
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for user_event in session.info.pop(_PENDING_KEY, ()):
+        try:
+            user_events.broker.publish(user_event)
+        except Exception:
+            # The change is committed; a lost notification only delays the client
+            logger.exception("Could not publish %s event", user_event["type"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
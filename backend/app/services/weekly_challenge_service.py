@@ -1,9 +1,65 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import text
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import uuid
 
 from app import models
+from app.database import SessionLocal
+from app.services.run_storage_service import RunStorageService
+from app.utils.single_flight import shared_reads
+
+
+# check_and_unlock_challenge for many users at once: a user unlocks when
+# they have a locked run on each of Monday-Friday with no core quest left
+# incomplete (either completion layout). Returns the newly unlocked rows.
+_UNLOCK_BATCH_SQL = text("""
+    WITH week_runs AS (
+        SELECT id, user_id, date, quest_ids, completion_bits
+        FROM daily_runs
+        WHERE user_id = ANY(CAST(:user_ids AS uuid[])) AND date BETWEEN :monday AND :friday AND is_locked
+    ), missed AS (
+        SELECT r.user_id, r.date
+        FROM week_runs r
+        JOIN daily_quest_completions c ON c.daily_run_id = r.id AND c.run_date = r.date
+        JOIN quests q ON q.id = c.quest_id
+        WHERE q.is_core AND NOT c.completed
+        UNION
+        SELECT r.user_id, r.date
+        FROM week_runs r
+        CROSS JOIN LATERAL unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+        JOIN quests q ON q.id = s.quest_id
+        WHERE r.quest_ids IS NOT NULL AND q.is_core AND get_bit(r.completion_bits, (s.ord - 1)::int) = 0
+    ), qualifying AS (
+        SELECT r.user_id
+        FROM week_runs r
+        LEFT JOIN missed m ON m.user_id = r.user_id AND m.date = r.date
+        WHERE m.user_id IS NULL
+        GROUP BY r.user_id
+        HAVING count(*) = 5
+    )
+    INSERT INTO weekly_challenge_completions
+        (id, user_id, challenge_id, is_unlocked, is_completed, xp_earned, unlocked_at)
+    SELECT gen_random_uuid(), user_id, :challenge_id, true, false, 0, now()
+    FROM qualifying
+    ON CONFLICT (user_id, challenge_id) DO UPDATE SET is_unlocked = true, unlocked_at = now()
+    WHERE NOT weekly_challenge_completions.is_unlocked
+    RETURNING id, user_id
+""")
+
+
+@dataclass(frozen=True)
+class WeeklyChallengeInfo:
+    """Read-only copy of a week's challenge, safe to share between requests"""
+    id: uuid.UUID
+    week_start_date: date
+    week_end_date: date
+    title: str
+    description: str
+    xp_reward: int
+    is_active: bool
 
 
 class WeeklyChallengeService:
@@ -20,39 +76,65 @@ class WeeklyChallengeService:
         sunday = monday + timedelta(days=6)
         return monday, sunday
     
-    async def get_or_create_weekly_challenge(self, target_date: date = None) -> models.WeeklyChallenge:
+    async def get_or_create_weekly_challenge(self, target_date: date = None) -> WeeklyChallengeInfo:
         """Get or create this week's challenge"""
         if target_date is None:
             target_date = date.today()
         
         monday, sunday = self._get_week_dates(target_date)
         
-        # Check if challenge exists
-        challenge = self.db.query(models.WeeklyChallenge).filter(
-            models.WeeklyChallenge.week_start_date == monday
-        ).first()
-        
-        if challenge:
-            return challenge
-        
-        # Create new challenge
-        challenge = models.WeeklyChallenge(
-            week_start_date=monday,
-            week_end_date=sunday,
-            title=f"Weekly Boss Battle: {monday.strftime('%b %d')} - {sunday.strftime('%b %d')}",
-            description="Complete ALL core quests Monday-Friday to unlock this epic challenge! Massive XP awaits.",
-            xp_reward=1000
+        # Identical for every caller: concurrent requests share one lookup,
+        # awaited without blocking the event loop
+        return await shared_reads.do_async(
+            ("weekly_challenge", monday),
+            lambda: self._load_or_create_challenge(monday, sunday)
         )
-        self.db.add(challenge)
-        self.db.commit()
-        self.db.refresh(challenge)
-        
-        return challenge
     
-    async def check_and_unlock_challenge(self, user_id: uuid.UUID, target_date: date = None) -> Dict:
+    @staticmethod
+    def _load_or_create_challenge(monday: date, sunday: date) -> WeeklyChallengeInfo:
+        """
+        Runs in the threadpool with a short session of its own, so it never
+        commits or rolls back the caller's. Creating the row is idempotent:
+        workers racing to create the week's challenge insert it only once.
+        """
+        db = SessionLocal()
+        try:
+            challenge = db.query(models.WeeklyChallenge).filter(
+                models.WeeklyChallenge.week_start_date == monday
+            ).first()
+            
+            if not challenge:
+                db.execute(insert(models.WeeklyChallenge).values(
+                    week_start_date=monday,
+                    week_end_date=sunday,
+                    title=f"Weekly Boss Battle: {monday.strftime('%b %d')} - {sunday.strftime('%b %d')}",
+                    description="Complete ALL core quests Monday-Friday to unlock this epic challenge! Massive XP awaits.",
+                    xp_reward=1000
+                ).on_conflict_do_nothing(index_elements=["week_start_date"]))
+                db.commit()
+                challenge = db.query(models.WeeklyChallenge).filter(
+                    models.WeeklyChallenge.week_start_date == monday
+                ).one()
+            
+            return WeeklyChallengeInfo(
+                id=challenge.id,
+                week_start_date=challenge.week_start_date,
+                week_end_date=challenge.week_end_date,
+                title=challenge.title,
+                description=challenge.description,
+                xp_reward=challenge.xp_reward,
+                is_active=challenge.is_active
+            )
+        finally:
+            db.close()
+    
+    async def check_and_unlock_challenge(self, user_id: uuid.UUID, target_date: date = None, commit: bool = True) -> Dict:
         """
         Check if user has completed all core quests M-F and unlock challenge.
         Returns unlock status and details.
+        
+        With commit=False the unlock is only flushed, for callers that
+        commit it together with their own writes.
         """
         if target_date is None:
             target_date = date.today()
@@ -89,6 +171,7 @@ class WeeklyChallengeService:
         
         # Check if all M-F core quests are completed
         weekdays = [monday + timedelta(days=i) for i in range(5)]  # Mon-Fri
+        storage = RunStorageService(self.db)
         
         all_core_completed = True
         for day in weekdays:
@@ -103,14 +186,7 @@ class WeeklyChallengeService:
                 break
             
             # Check if all CORE quests in this run are completed
-            core_completions = self.db.query(models.DailyQuestCompletion).join(
-                models.Quest
-            ).filter(
-                models.DailyQuestCompletion.daily_run_id == daily_run.id,
-                models.Quest.is_core == True
-            ).all()
-            
-            if not all(c.completed for c in core_completions):
+            if not storage.core_quests_completed(daily_run):
                 all_core_completed = False
                 break
         
@@ -118,7 +194,10 @@ class WeeklyChallengeService:
         if all_core_completed:
             completion.is_unlocked = True
             completion.unlocked_at = datetime.utcnow()
-            self.db.commit()
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
             
             return {
                 "is_unlocked": True,
@@ -137,14 +216,7 @@ class WeeklyChallengeService:
             ).first()
             
             if daily_run and daily_run.is_locked:
-                core_completions = self.db.query(models.DailyQuestCompletion).join(
-                    models.Quest
-                ).filter(
-                    models.DailyQuestCompletion.daily_run_id == daily_run.id,
-                    models.Quest.is_core == True
-                ).all()
-                
-                if all(c.completed for c in core_completions):
+                if storage.core_quests_completed(daily_run):
                     completed_days += 1
         
         return {
@@ -155,6 +227,32 @@ class WeeklyChallengeService:
             "days_required": 5
         }
     
+    async def unlock_batch(
+        self,
+        user_ids: List[uuid.UUID],
+        target_date: date = None
+    ) -> Tuple[WeeklyChallengeInfo, List[Tuple[uuid.UUID, uuid.UUID]]]:
+        """
+        Unlock the week's challenge for every one of these users who has
+        earned it, in one statement. Returns the challenge and the newly
+        unlocked (user_id, completion_id) pairs; the caller commits.
+        """
+        if target_date is None:
+            target_date = date.today()
+        
+        monday, _ = self._get_week_dates(target_date)
+        challenge = await self.get_or_create_weekly_challenge(target_date)
+        if not user_ids:
+            return challenge, []
+        
+        rows = self.db.execute(_UNLOCK_BATCH_SQL, {
+            "user_ids": [str(user_id) for user_id in user_ids],
+            "monday": monday,
+            "friday": monday + timedelta(days=4),
+            "challenge_id": str(challenge.id)
+        }).all()
+        return challenge, [(row.user_id, row.id) for row in rows]
+    
     async def complete_challenge(self, user_id: uuid.UUID, challenge_id: uuid.UUID) -> Dict:
         """Complete the weekly challenge and award XP"""
         completion = self.db.query(models.WeeklyChallengeCompletion).filter(
@@ -182,6 +280,16 @@ class WeeklyChallengeService:
             user.total_xp += completion.xp_earned
             from app.game_logic import GameLogic
             user.current_level = GameLogic.calculate_level(user.total_xp)
+            # Period leaderboards and notifications are handled by the outbox worker
+            from app.services.outbox_service import OutboxService, CHALLENGE_COMPLETED
+            OutboxService(self.db).record(CHALLENGE_COMPLETED, user_id, {
+                "challenge_id": completion.challenge_id,
+                "xp_earned": completion.xp_earned,
+                "completed_at": completion.completed_at,
+                "total_xp": user.total_xp,
+                "current_level": user.current_level,
+                "occurred_on": date.today()
+            })
         
         self.db.commit()
         
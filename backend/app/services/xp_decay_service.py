@@ -1,14 +1,110 @@
 from sqlalchemy.orm import Session
-from datetime import date, timedelta
-from typing import List, Dict
+from sqlalchemy import func, text
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Callable, Iterable, List, Dict, NamedTuple, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, available_timezones
+import time
 import uuid
 
+import numpy as np
+
 from app import models
+from app.config import settings
 from app.game_logic import GameLogic
+from app.services import user_event_service
+from app.services.user_event_service import user_events
+
+
+# Collapses each user's decay rows older than the cutoff into one range row
+# per inactive stretch. Rows of one stretch share decay_date - days_inactive
+# (the last active day), and a range keeps its first day's days_inactive, so
+# a later run merges newer rows into the existing range.
+_COMPACT_HISTORY_SQL = text("""
+    WITH stretches AS (
+        SELECT user_id,
+               decay_date - days_inactive AS last_active,
+               min(decay_date) AS start_date,
+               max(coalesce(end_date, decay_date)) AS end_date,
+               sum(xp_lost) AS xp_lost,
+               (array_agg(days_inactive ORDER BY decay_date))[1] AS days_inactive,
+               (array_agg(xp_before ORDER BY decay_date))[1] AS xp_before,
+               (array_agg(xp_after ORDER BY decay_date DESC))[1] AS xp_after,
+               (array_agg(level_before ORDER BY decay_date))[1] AS level_before,
+               (array_agg(level_after ORDER BY decay_date DESC))[1] AS level_after
+        FROM xp_decay_history
+        WHERE user_id = ANY(CAST(:user_ids AS uuid[])) AND decay_date < :cutoff
+        GROUP BY user_id, decay_date - days_inactive
+        HAVING count(*) > 1
+    ), removed AS (
+        DELETE FROM xp_decay_history h
+        USING stretches s
+        WHERE h.user_id = s.user_id
+          AND h.decay_date - h.days_inactive = s.last_active
+          AND h.decay_date < :cutoff
+        RETURNING h.id
+    ), ranges AS (
+        INSERT INTO xp_decay_history
+            (id, user_id, decay_date, end_date, days_inactive, xp_before, xp_lost, xp_after, level_before, level_after)
+        SELECT gen_random_uuid(), user_id, start_date, end_date, days_inactive,
+               xp_before, xp_lost, xp_after, level_before, level_after
+        FROM stretches
+        RETURNING id
+    )
+    SELECT (SELECT count(*) FROM removed) AS removed, (SELECT count(*) FROM ranges) AS ranges
+""")
+
+
+_MINUTES_PER_DAY = 24 * 60
+_MIN_UUID = str(uuid.UUID(int=0))
+
+# Users due for decay today (inactive past the grace period, not yet
+# decayed today) with their bucket: the slot of their time zone's
+# midnight, or without a known time zone, the last two bytes of their
+# (random) id mod the bucket count
+_DUE_USERS_CTE = """
+    WITH due AS (
+        SELECT u.id,
+               coalesce(z.bucket, (get_byte(uuid_send(u.id), 14) * 256 + get_byte(uuid_send(u.id), 15)) % :buckets)
+                   AS bucket
+        FROM users u
+        LEFT JOIN unnest(CAST(:zones AS text[]), CAST(:zone_buckets AS int[])) AS z(timezone, bucket)
+               ON z.timezone = u.timezone
+        WHERE u.last_activity_date < :active_since
+          AND NOT EXISTS (
+              SELECT 1 FROM xp_decay_history h WHERE h.user_id = u.id AND h.decay_date = :today
+          )
+    )
+"""
+
+# One batch of a bucket's due users, keyset-paginated by id
+_DUE_USERS_SQL = text(_DUE_USERS_CTE + """
+    SELECT id FROM due
+    WHERE bucket = :bucket AND id > CAST(:after AS uuid)
+    ORDER BY id
+    LIMIT :limit
+""")
+
+_COUNT_DUE_USERS_SQL = text(_DUE_USERS_CTE + """
+    SELECT count(*) FROM due WHERE bucket = ANY(CAST(:bucket_list AS int[]))
+""")
+
+
+class DecaySnapshot(NamedTuple):
+    """The user columns decay depends on, e.g. from a cache"""
+    total_xp: int
+    current_level: int
+    last_activity_date: date
 
 
 class XPDecayService:
-    """Service for handling XP decay due to inactivity"""
+    """
+    Service for handling XP decay due to inactivity.
+    
+    Decay is staggered over the day instead of hitting every user at
+    midnight: users are split into DECAY_BUCKETS buckets, each with its own
+    slot. A user with a time zone falls in the slot holding their local
+    midnight; the rest are spread evenly by a hash of their id.
+    """
     
     DECAY_RATE = 0.05  # 5% per day
     GRACE_PERIOD_DAYS = 0  # No grace period - decay starts after 1 day
@@ -16,61 +112,211 @@ class XPDecayService:
     def __init__(self, db: Session):
         self.db = db
     
-    async def process_decay_for_all_users(self) -> Dict[str, int]:
+    async def process_due_buckets(
+        self,
+        now: Optional[datetime] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Run decay for every bucket whose slot has started today and that no
+        successful run today has covered yet: normally just the current
+        slot, plus any the scheduler missed. Run by the xp_decay job.
+        """
+        now = now or datetime.now()
+        done = self.get_bucket_stats(now.date())
+        due = [bucket for bucket in range(self.bucket_for_time(now) + 1) if bucket not in done]
+        return await self.process_decay_buckets(due, now.date(), progress=progress)
+    
+    async def process_decay_for_all_users(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Run today's decay for every bucket at once, regardless of slots"""
+        return await self.process_decay_buckets(range(settings.DECAY_BUCKETS), progress=progress)
+    
+    async def process_decay_buckets(
+        self,
+        buckets: Iterable[int],
+        today: Optional[date] = None,
+        batch_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
         """
-        Run daily decay process for all users.
-        Called by cron job at midnight.
+        Decay the inactive users of each bucket, `batch_size` users per
+        transaction. Users already decayed today are skipped, so a retried
+        or overlapping run never decays anyone twice.
+        
+        Args:
+            progress: Optional callback receiving (users processed, users due)
         
         Returns:
-            Dict with processing stats
+            Dict with processing stats, and stats and timings per bucket
         """
-        today = date.today()
-        users = self.db.query(models.User).all()
+        today = today or date.today()
+        batch_size = batch_size or settings.DECAY_BATCH_SIZE
+        buckets = list(buckets)
+        zones, zone_buckets = self.timezone_buckets()
+        params = {
+            "zones": zones,
+            "zone_buckets": zone_buckets,
+            "buckets": settings.DECAY_BUCKETS,
+            "today": today,
+            "active_since": today - timedelta(days=self.GRACE_PERIOD_DAYS)
+        }
+        
+        total_users = self.db.execute(_COUNT_DUE_USERS_SQL, {**params, "bucket_list": buckets}).scalar()
+        self.db.commit()
         
         stats = {
-            "total_users": len(users),
+            "date": today.isoformat(),
+            "total_users": 0,
             "users_decayed": 0,
             "total_xp_lost": 0,
-            "levels_dropped": 0
+            "levels_dropped": 0,
+            "buckets": []
         }
         
-        for user in users:
-            decay_result = await self._process_user_decay(user, today)
-            if decay_result:
+        for bucket in buckets:
+            started = time.perf_counter()
+            bucket_stats = {"bucket": bucket, "slot": self.slot_start(bucket).strftime("%H:%M"),
+                            "users_decayed": 0, "xp_lost": 0, "levels_dropped": 0, "batches": 0}
+            last_user_id = _MIN_UUID
+            while True:
+                user_ids = [row.id for row in self.db.execute(_DUE_USERS_SQL, {
+                    **params, "bucket": bucket, "after": last_user_id, "limit": batch_size
+                })]
+                if not user_ids:
+                    break
+                
+                # Locked so XP awarded concurrently (e.g. the auto-lock) is not overwritten
+                users = self.db.query(models.User).filter(
+                    models.User.id.in_(user_ids)
+                ).order_by(models.User.id).with_for_update().all()
+                batch = await self._decay_users(users, today)
+                self.db.commit()
+                
+                bucket_stats["users_decayed"] += batch["users_decayed"]
+                bucket_stats["xp_lost"] += batch["total_xp_lost"]
+                bucket_stats["levels_dropped"] += batch["levels_dropped"]
+                bucket_stats["batches"] += 1
+                stats["total_users"] += len(user_ids)
+                if progress:
+                    progress(stats["total_users"], max(total_users, stats["total_users"]))
+                last_user_id = str(user_ids[-1])
+            
+            bucket_stats["seconds"] = round(time.perf_counter() - started, 3)
+            stats["buckets"].append(bucket_stats)
+            stats["users_decayed"] += bucket_stats["users_decayed"]
+            stats["total_xp_lost"] += bucket_stats["xp_lost"]
+            stats["levels_dropped"] += bucket_stats["levels_dropped"]
+        
+        return stats
+    
+    def get_bucket_stats(self, day: Optional[date] = None) -> Dict[int, Dict]:
+        """Stats and timings of each bucket a successful xp_decay run covered on `day`"""
+        day = day or date.today()
+        runs = self.db.query(models.JobRun).filter(
+            models.JobRun.job_name == "xp_decay",
+            models.JobRun.status == "succeeded",
+            models.JobRun.created_at >= datetime.combine(day, dt_time.min).astimezone(),
+            models.JobRun.created_at < datetime.combine(day + timedelta(days=1), dt_time.min).astimezone()
+        ).order_by(models.JobRun.created_at)
+        
+        stats = {}
+        for job_run in runs:
+            result = job_run.result or {}
+            if result.get("date") == day.isoformat():
+                stats.update((bucket["bucket"], bucket) for bucket in result.get("buckets", []))
+        return stats
+    
+    @staticmethod
+    def bucket_for_time(moment: datetime) -> int:
+        """The bucket whose slot contains `moment` (server local time)"""
+        minutes = moment.hour * 60 + moment.minute
+        return minutes * settings.DECAY_BUCKETS // _MINUTES_PER_DAY
+    
+    @staticmethod
+    def slot_start(bucket: int) -> dt_time:
+        minutes = -(-bucket * _MINUTES_PER_DAY // settings.DECAY_BUCKETS)
+        return dt_time(minutes // 60, minutes % 60)
+    
+    @staticmethod
+    def timezone_buckets(moment: Optional[datetime] = None) -> Tuple[List[str], List[int]]:
+        """
+        Every known time zone and the bucket whose slot holds its local
+        midnight, as parallel lists. Users without a (known) time zone are
+        bucketed by a hash of their id instead.
+        """
+        moment = (moment or datetime.now()).astimezone()
+        server_offset = moment.utcoffset()
+        zones = sorted(available_timezones())
+        zone_buckets = []
+        for zone in zones:
+            midnight = (server_offset - moment.astimezone(ZoneInfo(zone)).utcoffset()) % timedelta(days=1)
+            zone_buckets.append(int(midnight.total_seconds() // 60) * settings.DECAY_BUCKETS // _MINUTES_PER_DAY)
+        return zones, zone_buckets
+    
+    async def _decay_users(self, users: List[models.User], today: date) -> Dict[str, int]:
+        """Apply today's decay to these users; the caller commits"""
+        stats = {"users_decayed": 0, "total_xp_lost": 0, "levels_dropped": 0}
+        
+        # Decay math for the whole batch at once; only the writes are per user
+        xp_before = np.fromiter((user.total_xp for user in users), dtype=np.int64, count=len(users))
+        days_inactive = np.fromiter(
+            ((today - user.last_activity_date).days for user in users), dtype=np.int64, count=len(users)
+        )
+        xp_lost = self.calculate_xp_lost_batch(xp_before, days_inactive)
+        levels_after = GameLogic.calculate_level_batch(np.maximum(0, xp_before - xp_lost))
+        
+        for i, user in enumerate(users):
+            # No decay if user was active today or within grace period
+            if days_inactive[i] > self.GRACE_PERIOD_DAYS:
+                decay_result = await self._process_user_decay(
+                    user, today, int(days_inactive[i]), int(xp_lost[i]), int(levels_after[i])
+                )
                 stats["users_decayed"] += 1
                 stats["total_xp_lost"] += decay_result["xp_lost"]
                 if decay_result["level_dropped"]:
                     stats["levels_dropped"] += 1
         
-        self.db.commit()
         return stats
     
-    async def _process_user_decay(self, user: models.User, today: date) -> Dict | None:
+    @classmethod
+    def calculate_xp_lost(cls, total_xp: int, days_inactive: int) -> int:
+        """XP lost to `days_inactive` days of decay (5% per day, compounding)"""
+        decay_multiplier = (1 - cls.DECAY_RATE) ** days_inactive
+        return int(total_xp * (1 - decay_multiplier))
+    
+    @classmethod
+    def calculate_xp_lost_batch(
+        cls,
+        total_xp: np.ndarray,
+        days_inactive: np.ndarray,
+        decay_rate: Optional[float] = None
+    ) -> np.ndarray:
+        """calculate_xp_lost for arrays of XP totals and days inactive (optionally at another rate)"""
+        if decay_rate is None:
+            decay_rate = cls.DECAY_RATE
+        decay_multiplier = np.power(1 - decay_rate, np.asarray(days_inactive, dtype=np.float64))
+        return (np.asarray(total_xp, dtype=np.int64) * (1 - decay_multiplier)).astype(np.int64)
+    
+    async def _process_user_decay(
+        self,
+        user: models.User,
+        today: date,
+        days_inactive: int,
+        xp_lost: int,
+        level_after: int
+    ) -> Dict:
         """
-        Process decay for a single user.
+        Apply one user's decay, computed by the caller, and record it.
         
         Returns:
-            Dict with decay info if decay occurred, None otherwise
+            Dict with decay info
         """
-        days_inactive = (today - user.last_activity_date).days
-        
-        # No decay if user was active today or within grace period
-        if days_inactive <= self.GRACE_PERIOD_DAYS:
-            return None
-        
-        # Calculate decay
         xp_before = user.total_xp
         level_before = user.current_level
         
-        # Lose 5% per day of inactivity
-        decay_multiplier = (1 - self.DECAY_RATE) ** days_inactive
-        xp_lost = int(xp_before * (1 - decay_multiplier))
-        
         # Apply decay
         user.total_xp = max(0, xp_before - xp_lost)
-        user.current_level = GameLogic.calculate_level(user.total_xp)
-        
-        level_after = user.current_level
+        user.current_level = level_after
         
         # Record decay history
         decay_record = models.XPDecayHistory(
@@ -85,6 +331,14 @@ class XPDecayService:
         )
         self.db.add(decay_record)
         
+        user_events.publish_after_commit(self.db, user.id, user_event_service.XP_DECAYED, {
+            "days_inactive": days_inactive,
+            "xp_lost": xp_lost,
+            "total_xp": user.total_xp,
+            "level_before": level_before,
+            "current_level": level_after
+        })
+        
         return {
             "xp_lost": xp_lost,
             "level_dropped": level_before > level_after,
@@ -103,11 +357,58 @@ class XPDecayService:
             self.db.commit()
     
     async def get_user_decay_history(self, user_id: uuid.UUID, limit: int = 30) -> List[models.XPDecayHistory]:
-        """Get user's decay history"""
+        """Get user's decay history, newest first; old stretches come as one range each"""
         return self.db.query(models.XPDecayHistory).filter(
             models.XPDecayHistory.user_id == user_id
         ).order_by(models.XPDecayHistory.decay_date.desc()).limit(limit).all()
     
+    def compact_history(
+        self,
+        detail_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        today: Optional[date] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Collapse decay rows older than `detail_days` into one range row per
+        inactive stretch, `batch_size` users per transaction. Total XP lost
+        per user is unchanged.
+        """
+        if detail_days is None:
+            detail_days = settings.XP_DECAY_HISTORY_DETAIL_DAYS
+        batch_size = batch_size or settings.XP_DECAY_HISTORY_BATCH_SIZE
+        cutoff = (today or date.today()) - timedelta(days=detail_days)
+        
+        old_rows = self.db.query(models.XPDecayHistory.user_id).filter(
+            models.XPDecayHistory.decay_date < cutoff
+        )
+        total_users = old_rows.with_entities(func.count(models.XPDecayHistory.user_id.distinct())).scalar()
+        stats = {"cutoff": cutoff.isoformat(), "users": 0, "rows_removed": 0, "ranges_written": 0}
+        
+        last_user_id = None
+        while True:
+            query = old_rows
+            if last_user_id is not None:
+                query = query.filter(models.XPDecayHistory.user_id > last_user_id)
+            user_ids = [user_id for (user_id,) in query.distinct().order_by(models.XPDecayHistory.user_id).limit(batch_size)]
+            if not user_ids:
+                break
+            
+            result = self.db.execute(_COMPACT_HISTORY_SQL, {
+                "user_ids": [str(user_id) for user_id in user_ids],
+                "cutoff": cutoff
+            }).one()
+            self.db.commit()
+            
+            stats["users"] += len(user_ids)
+            stats["rows_removed"] += result.removed
+            stats["ranges_written"] += result.ranges
+            if progress:
+                progress(stats["users"], total_users)
+            last_user_id = user_ids[-1]
+        
+        return stats
+    
     async def get_days_until_decay(self, user_id: uuid.UUID) -> int:
         """
         Calculate how many days until decay starts.
@@ -116,11 +417,7 @@ class XPDecayService:
         user = self.db.query(models.User).filter(models.User.id == user_id).first()
         if not user:
             return 0
-        
-        days_inactive = (date.today() - user.last_activity_date).days
-        days_safe = self.GRACE_PERIOD_DAYS - days_inactive
-        
-        return max(0, days_safe)
+        return self.get_decay_status(user)["days_until_decay"]
     
     async def calculate_potential_decay(self, user_id: uuid.UUID) -> Dict:
         """
@@ -130,28 +427,41 @@ class XPDecayService:
         user = self.db.query(models.User).filter(models.User.id == user_id).first()
         if not user:
             return {"will_decay": False}
+        return self.get_decay_status(user)["potential_decay"]
+    
+    @classmethod
+    def get_decay_status(cls, user: Union[models.User, DecaySnapshot], today: Optional[date] = None) -> Dict:
+        """
+        Days until decay and what tonight's decay would take, from an
+        already-loaded user (or a snapshot of one). Makes no queries.
+        """
+        days_inactive = ((today or date.today()) - user.last_activity_date).days
+        days_until_decay = max(0, cls.GRACE_PERIOD_DAYS - days_inactive)
         
-        days_inactive = (date.today() - user.last_activity_date).days
-        
-        if days_inactive <= self.GRACE_PERIOD_DAYS:
+        if days_inactive <= cls.GRACE_PERIOD_DAYS:
             return {
-                "will_decay": False,
-                "days_safe": self.GRACE_PERIOD_DAYS - days_inactive + 1
+                "days_until_decay": days_until_decay,
+                "potential_decay": {
+                    "will_decay": False,
+                    "days_safe": cls.GRACE_PERIOD_DAYS - days_inactive + 1
+                }
             }
         
         # Calculate potential loss
-        decay_multiplier = (1 - self.DECAY_RATE) ** days_inactive
-        xp_lost = int(user.total_xp * (1 - decay_multiplier))
+        xp_lost = cls.calculate_xp_lost(user.total_xp, days_inactive)
         new_xp = max(0, user.total_xp - xp_lost)
         new_level = GameLogic.calculate_level(new_xp)
         
         return {
-            "will_decay": True,
-            "days_inactive": days_inactive,
-            "current_xp": user.total_xp,
-            "xp_will_lose": xp_lost,
-            "xp_after_decay": new_xp,
-            "current_level": user.current_level,
-            "level_after_decay": new_level,
-            "will_drop_level": new_level < user.current_level
-        }
\ No newline at end of file
+            "days_until_decay": days_until_decay,
+            "potential_decay": {
+                "will_decay": True,
+                "days_inactive": days_inactive,
+                "current_xp": user.total_xp,
+                "xp_will_lose": xp_lost,
+                "xp_after_decay": new_xp,
+                "current_level": user.current_level,
+                "level_after_decay": new_level,
+                "will_drop_level": new_level < user.current_level
+            }
+        }
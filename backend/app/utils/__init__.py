@@ -1,3 +1,7 @@
-from app.utils.game_logic import GameLogic, StreakCalculator, AntiCheat
+from app.utils.sampling import AliasTable
+from app.utils.fenwick import FenwickTree
+from app.utils.single_flight import SingleFlight
+from app.utils.cron import CronSchedule
+from app.utils.level_curve import LevelCurve
 
-__all__ = ["GameLogic", "StreakCalculator", "AntiCheat"]
\ No newline at end of file
+__all__ = ["AliasTable", "FenwickTree", "SingleFlight", "CronSchedule", "LevelCurve"]
\ No newline at end of file
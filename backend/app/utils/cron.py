@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from typing import FrozenSet, Tuple
+
+
+class CronSchedule:
+    """
+    Standard five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields accept `*`, numbers, ranges (`1-5`), lists (`1,15`) and steps
+    (`*/15`, `0-30/10`). Day of week is 0-6 from Sunday (7 is also Sunday).
+    As in cron, when both day fields are restricted a day matching either
+    one fires.
+    """
+
+    _BOUNDS: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    # Give up looking for a next run after this long (e.g. "0 0 30 2 *")
+    _HORIZON = timedelta(days=366 * 4)
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: {expression!r}")
+
+        self.expression = expression
+        parsed = [self._parse(field, low, high) for field, (low, high) in zip(fields, self._BOUNDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def matches_day(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        # Python counts weekdays from Monday, cron from Sunday
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First minute strictly after `moment` that the schedule fires"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + self._HORIZON
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self.matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> FrozenSet[int]:
+        values = set()
+        for part in field.split(","):
+            spec, _, step_text = part.partition("/")
+            step = int(step_text) if step_text else 1
+
+            if spec == "*":
+                start, end = low, high
+            elif "-" in spec:
+                start_text, end_text = spec.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(spec)
+                end = high if step_text else start
+
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f"Invalid cron field {field!r} (allowed {low}-{high})")
+            values.update(range(start, end + 1, step))
+
+        return frozenset(values)
@@ -0,0 +1,76 @@
+from typing import List
+
+
+class FenwickTree:
+    """
+    Binary indexed tree of non-negative counts over slots 0..size-1
+
+    Point updates, prefix sums and "find the slot holding the k-th item"
+    all cost O(log n). The tree grows on demand when a slot past the end
+    is touched.
+    """
+
+    def __init__(self, size: int = 1):
+        self._size = 1
+        while self._size < size:
+            self._size *= 2
+        self._tree: List[int] = [0] * (self._size + 1)
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, slot: int, delta: int) -> None:
+        if slot < 0:
+            raise IndexError("Fenwick slots are non-negative")
+        if slot >= self._size:
+            self._grow(slot + 1)
+
+        self.total += delta
+        i = slot + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, slot: int) -> int:
+        """Sum of slots 0..slot inclusive"""
+        i = min(slot + 1, self._size)
+        result = 0
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, k: int) -> int:
+        """Smallest slot whose prefix sum reaches k (1-based k)"""
+        if k < 1 or k > self.total:
+            raise IndexError("k out of range")
+
+        position = 0
+        step = self._size
+        while step:
+            nxt = position + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step //= 2
+        return position
+
+    def _grow(self, size: int) -> None:
+        new_size = self._size
+        while new_size < size:
+            new_size *= 2
+
+        # Rebuild from the current slot values
+        values = [self.prefix_sum(i) - self.prefix_sum(i - 1) for i in range(self._size)]
+        values += [0] * (new_size - self._size)
+
+        tree = [0] * (new_size + 1)
+        for i, value in enumerate(values, start=1):
+            tree[i] += value
+            parent = i + (i & -i)
+            if parent <= new_size:
+                tree[parent] += tree[i]
+
+        self._size = new_size
+        self._tree = tree
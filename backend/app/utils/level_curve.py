@@ -0,0 +1,121 @@
+from bisect import bisect_right
+from typing import Callable, List, Sequence
+import math
+
+import numpy as np
+
+# users.total_xp is a 32-bit integer: no level can need more
+MAX_TOTAL_XP = 2 ** 31 - 1
+
+
+class LevelCurve:
+    """
+    Total XP needed for each level, precomputed as exact integers
+
+    `thresholds[i]` is the XP that reaches level i + 1, so thresholds[0] is
+    0 and the list is strictly increasing. A total's level is the number
+    of thresholds at or below it (a bisect, or `searchsorted` for arrays),
+    so levels never depend on floating-point rounding. Levels stop at the
+    last threshold: the level after it needs the int32 XP ceiling (so XP
+    still needed is never negative) and progress there stays at 100%.
+    """
+
+    def __init__(self, thresholds: Sequence[int]):
+        if not thresholds or thresholds[0] != 0:
+            raise ValueError("Level thresholds must start at 0 XP for level 1")
+        if any(later <= earlier for earlier, later in zip(thresholds, thresholds[1:])):
+            raise ValueError("Level thresholds must be strictly increasing")
+
+        self.thresholds: List[int] = [int(xp) for xp in thresholds]
+        self._array = np.asarray(self.thresholds, dtype=np.int64)
+        self.max_level = len(self.thresholds)
+
+    def __repr__(self) -> str:
+        return f"LevelCurve(max_level={self.max_level}, top={self.thresholds[-1]})"
+
+    # ---- Curves ----
+
+    @classmethod
+    def power(cls, base: int, exponent: float, max_level: int) -> "LevelCurve":
+        """level = floor((xp / base) ^ exponent) + 1; exponent 0.5 is the square curve"""
+        inverse = 1 / exponent
+        if inverse.is_integer():
+            return cls.from_function(lambda level: base * (level - 1) ** int(inverse), max_level)
+        return cls.from_function(lambda level: math.ceil(base * (level - 1) ** inverse), max_level)
+
+    @classmethod
+    def exponential(cls, base: int, growth: float, max_level: int) -> "LevelCurve":
+        """Level 2 costs `base` XP and each level after costs `growth` times the one before"""
+        return cls.from_function(
+            lambda level: round(base * (growth ** (level - 1) - 1) / (growth - 1)),
+            max_level
+        )
+
+    @classmethod
+    def table(cls, xp_to_reach: Sequence[int], max_level: int) -> "LevelCurve":
+        """Explicit totals to reach level 2, 3, ..."""
+        return cls.from_function(
+            lambda level: xp_to_reach[level - 2] if level - 2 < len(xp_to_reach) else None,
+            max_level
+        )
+
+    @classmethod
+    def from_function(cls, xp_to_reach: Callable[[int], int], max_level: int) -> "LevelCurve":
+        """Thresholds for levels 2..max_level, stopping early where XP would overflow"""
+        thresholds = [0]
+        for level in range(2, max_level + 1):
+            xp = xp_to_reach(level)
+            if xp is None or xp > MAX_TOTAL_XP:
+                break
+            thresholds.append(xp)
+        return cls(thresholds)
+
+    # ---- Scalar lookups ----
+
+    def level(self, total_xp: int) -> int:
+        return max(1, bisect_right(self.thresholds, total_xp))
+
+    def xp_for_level(self, level: int) -> int:
+        """Total XP that reaches `level` (MAX_TOTAL_XP for anything past the top)"""
+        if level <= 1:
+            return 0
+        if level > self.max_level:
+            return MAX_TOTAL_XP
+        return self.thresholds[level - 1]
+
+    def progress(self, total_xp: int) -> float:
+        """Percent of the way from the current level to the next (0-100)"""
+        level = self.level(total_xp)
+        if level >= self.max_level:
+            return 100.0
+        current_level_xp = self.xp_for_level(level)
+        level_xp_range = self.xp_for_level(level + 1) - current_level_xp
+        return round(((total_xp - current_level_xp) / level_xp_range) * 100, 2)
+
+    # ---- Batch lookups (same table, same results) ----
+
+    def level_batch(self, total_xp: np.ndarray) -> np.ndarray:
+        return np.maximum(np.searchsorted(self._array, np.asarray(total_xp, dtype=np.int64), side="right"), 1)
+
+    def xp_for_level_batch(self, levels: np.ndarray) -> np.ndarray:
+        levels = np.asarray(levels, dtype=np.int64)
+        xp = np.where(levels <= 1, 0, self._array[np.clip(levels, 1, self.max_level) - 1])
+        return np.where(levels > self.max_level, MAX_TOTAL_XP, xp)
+
+    def progress_batch(self, total_xp: np.ndarray) -> np.ndarray:
+        total_xp = np.asarray(total_xp, dtype=np.int64)
+        levels = self.level_batch(total_xp)
+        current_level_xp = self.xp_for_level_batch(levels)
+        level_xp_range = self.xp_for_level_batch(levels + 1) - current_level_xp
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            raw = ((total_xp - current_level_xp) / level_xp_range) * 100
+        progress = np.round(raw, 2)
+
+        # np.round scales by 100 first, which can tip a value sitting on a
+        # half-cent boundary the other way than round(); redo those few
+        scaled = raw * 100
+        near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+        progress[near_half] = [round(value, 2) for value in raw[near_half].tolist()]
+
+        return np.where(levels >= self.max_level, 100.0, progress)
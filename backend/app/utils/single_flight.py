@@ -0,0 +1,124 @@
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+import asyncio
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads and caches the result briefly
+
+    Keys are tuples whose first element names the kind of read (used for
+    the counters and for invalidation). The first caller for a key runs
+    the computation; callers arriving while it is in flight wait for the
+    same result, and callers within `ttl_seconds` afterwards get it from
+    the cache. Errors are passed to every waiter and never cached.
+
+    Results are shared between requests, so they must be immutable or at
+    least never mutated (no ORM instances bound to a session).
+    """
+
+    # Expired entries are swept once the cache grows past this
+    MAX_ENTRIES = 1024
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+        self._counters: Dict[Hashable, Dict[str, int]] = {}
+
+    def do(self, key: Tuple, fn: Callable[[], T]) -> T:
+        hit, future, leader = self._begin(key)
+        if hit:
+            return future
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def do_async(self, key: Tuple, fn: Callable[[], T]) -> T:
+        """`do` for async callers; `fn` is sync and runs in the threadpool"""
+        hit, future, leader = self._begin(key)
+        if hit:
+            return future
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value = await run_in_threadpool(fn)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    def _begin(self, key: Tuple) -> Tuple[bool, Any, bool]:
+        """(True, cached value, _) on a cache hit, else (False, future, whether this caller leads)"""
+        with self._lock:
+            counters = self._counters.setdefault(key[0], {"executions": 0, "cache_hits": 0, "coalesced": 0})
+
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                counters["cache_hits"] += 1
+                return True, cached[1], False
+
+            future = self._inflight.get(key)
+            if future is not None:
+                counters["coalesced"] += 1
+                return False, future, False
+
+            future = Future()
+            self._inflight[key] = future
+            counters["executions"] += 1
+            return False, future, True
+
+    def _fail(self, key: Tuple, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_exception(error)
+
+    def _finish(self, key: Tuple, future: Future, value: Any) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self.ttl_seconds > 0:
+                now = time.monotonic()
+                if len(self._cache) >= self.MAX_ENTRIES:
+                    for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                        del self._cache[stale]
+                self._cache[key] = (now + self.ttl_seconds, value)
+        future.set_result(value)
+
+    def invalidate(self, kind: Optional[Hashable] = None) -> None:
+        """Drop cached results of one kind of read (or all of them)"""
+        with self._lock:
+            if kind is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == kind]:
+                    del self._cache[key]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-kind counters; `saved` is executions avoided by coalescing or caching"""
+        with self._lock:
+            return {
+                str(kind): {**counters, "saved": counters["cache_hits"] + counters["coalesced"]}
+                for kind, counters in self._counters.items()
+            }
+
+
+# Global instance for reads that are identical for every caller
+shared_reads = SingleFlight(settings.SHARED_READ_TTL_SECONDS)
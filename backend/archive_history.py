@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compact cold run history into per-user monthly summaries
+Run this from the backend directory:
+
+    python archive_history.py [--horizon-days N]
+
+Every whole month older than the horizon (HISTORY_COMPACTION_HORIZON_DAYS by
+default) is rolled up into user_monthly_summaries and its runs are removed.
+With partitioned tables the month's partitions are detached and left behind
+as plain tables; dump or drop them once they are archived.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact cold run history")
+    parser.add_argument("--horizon-days", type=int, default=None)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.services.history_compaction_service import HistoryCompactionService
+
+    db = SessionLocal()
+    try:
+        print("🗄  Compacting run history...")
+        stats = HistoryCompactionService(db).compact(horizon_days=args.horizon_days)
+
+        print(f"  ✓ Months before {stats['cutoff']} compacted: {stats['months_compacted']}")
+        print(f"  ✓ Summaries written: {stats['summaries_written']}")
+        print(f"  ✓ Runs deleted: {stats['runs_deleted']}")
+        for name in stats["partitions_detached"]:
+            print(f"  ✓ Detached {name}")
+
+        print("\n✅ History compaction complete")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Error: {e}")
+        print("\n💡 Make sure your DATABASE_URL in .env is correct")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
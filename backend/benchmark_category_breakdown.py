@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /stats/progress category breakdown across history sizes
+Run this from the backend directory:
+
+    python benchmark_category_breakdown.py [--days 30 90 365 1095] [--quests 20] [--repeat 20]
+
+For each history size a throwaway user with that many days of runs is
+seeded inside a transaction that is rolled back at the end. Three ways of
+computing the breakdown for the whole history are timed:
+
+    orm       hydrate every completion and count in Python (the old endpoint)
+    group-by  one GROUP BY quest.category with COUNT(*) FILTER (WHERE completed)
+    rollup    GROUP BY over user_daily_stats (what the endpoint serves)
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _seed(db, user_id, days: int, quests: int) -> date:
+    from sqlalchemy import text
+
+    start = date.today() - timedelta(days=days)
+    db.execute(text(
+        "INSERT INTO users (id, username, email, hashed_password, goal_categories) "
+        "VALUES (:id, :name, :email, 'x', '[]')"
+    ), {"id": user_id, "name": f"bench_{user_id.hex[:12]}", "email": f"{user_id.hex}@bench.local"})
+
+    db.execute(text("""
+        INSERT INTO daily_runs (id, user_id, date, total_xp, is_perfect, is_locked)
+        SELECT gen_random_uuid(), :user_id, d::date, 0, false, true
+        FROM generate_series(CAST(:start AS date), CAST(:end AS date) - 1, interval '1 day') d
+    """), {"user_id": user_id, "start": start, "end": date.today()})
+
+    db.execute(text("""
+        INSERT INTO daily_quest_completions (id, daily_run_id, run_date, quest_id, completed, xp_earned)
+        SELECT gen_random_uuid(), r.id, r.date, q.id, random() < 0.6, 0
+        FROM daily_runs r
+        CROSS JOIN LATERAL (
+            SELECT id FROM quests WHERE is_active ORDER BY random() LIMIT :quests
+        ) q
+        WHERE r.user_id = :user_id
+    """), {"user_id": user_id, "quests": quests})
+    return start
+
+
+def _orm_breakdown(db, user_id, start_date, end_date):
+    from sqlalchemy import and_
+    from app import models
+
+    completions = db.query(
+        models.DailyQuestCompletion,
+        models.Quest.category
+    ).join(
+        models.DailyRun,
+        and_(
+            models.DailyQuestCompletion.daily_run_id == models.DailyRun.id,
+            models.DailyQuestCompletion.run_date == models.DailyRun.date
+        )
+    ).join(
+        models.Quest,
+        models.DailyQuestCompletion.quest_id == models.Quest.id
+    ).filter(
+        models.DailyRun.user_id == user_id,
+        models.DailyRun.date >= start_date,
+        models.DailyRun.date <= end_date,
+        models.DailyQuestCompletion.run_date >= start_date,
+        models.DailyQuestCompletion.run_date <= end_date
+    ).all()
+
+    totals = {}
+    for completion, category in completions:
+        entry = totals.setdefault(category, {"total": 0, "completed": 0})
+        entry["total"] += 1
+        entry["completed"] += int(completion.completed)
+    return totals
+
+
+def _time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(days_list, quests: int, repeat: int):
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.services.daily_stats_service import DailyStatsService
+
+    db = SessionLocal()
+    try:
+        if not db.execute(text("SELECT count(*) FROM quests WHERE is_active")).scalar():
+            print("❌ No active quests; seed the quest catalog first")
+            return
+
+        print(f"{'days':>6} {'slots':>8} {'orm ms':>10} {'group-by ms':>12} {'rollup ms':>10}")
+        for days in days_list:
+            user_id = uuid.uuid4()
+            start = _seed(db, user_id, days, quests)
+            end = date.today()
+
+            stats = DailyStatsService(db)
+            stats.rebuild(user_id=user_id)
+            db.execute(text("ANALYZE daily_quest_completions"))
+            db.execute(text("ANALYZE user_daily_stats"))
+
+            expected = stats.get_category_totals_from_runs(user_id, start, end)
+            if _orm_breakdown(db, user_id, start, end) != expected or stats.get_category_totals(user_id, start, end) != expected:
+                print(f"❌ Breakdowns disagree at {days} days")
+                return
+
+            orm_ms = _time(lambda: (_orm_breakdown(db, user_id, start, end), db.expunge_all()), repeat)
+            group_ms = _time(lambda: stats.get_category_totals_from_runs(user_id, start, end), repeat)
+            rollup_ms = _time(lambda: stats.get_category_totals(user_id, start, end), repeat)
+
+            slots = sum(entry["total"] for entry in expected.values())
+            print(f"{days:>6} {slots:>8} {orm_ms:>10.2f} {group_ms:>12.2f} {rollup_ms:>10.2f}")
+
+        print("\n✅ Benchmark complete (seeded data rolled back)")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the category breakdown")
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 90, 365, 1095])
+    parser.add_argument("--quests", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        print("⏱  Category breakdown benchmark")
+        run(args.days, args.quests, args.repeat)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        print("\n💡 Make sure your DATABASE_URL in .env is correct")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy batch level math against the scalar functions
+Run this from the backend directory:
+
+    python benchmark_level_math.py [--sizes 10000 100000 1000000 10000000] [--seed 0]
+
+For each size, random XP totals (plus every level boundary and the XP just
+below it) go through the scalar GameLogic functions in a Python loop and
+through their *_batch counterparts. Both timings are printed, and the
+results are checked to be identical element for element. The script exits
+non-zero on any mismatch.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _xp_sample(size: int, seed: int):
+    import numpy as np
+    from app.config import settings
+
+    rng = np.random.default_rng(seed)
+    levels = np.arange(1, 1001, dtype=np.int64)
+    boundaries = (levels - 1) ** 2 * settings.XP_PER_LEVEL_BASE
+    edges = np.concatenate([boundaries, boundaries - 1, [-1, 0, 1]])
+    randoms = rng.integers(0, 100 * settings.XP_PER_LEVEL_BASE * 1000, size=max(0, size - len(edges)))
+    return np.concatenate([edges, randoms])[:size]
+
+
+def _time(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch vs scalar level math")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.game_logic import GameLogic
+
+    pairs = [
+        ("calculate_level", GameLogic.calculate_level, GameLogic.calculate_level_batch),
+        ("level_progress", GameLogic.level_progress, GameLogic.level_progress_batch),
+    ]
+
+    print(f"{'function':<18}{'users':>12}{'scalar s':>12}{'batch s':>12}{'speedup':>10}  exact")
+    mismatches = 0
+    for size in args.sizes:
+        xp = _xp_sample(size, args.seed)
+        xp_list = xp.tolist()
+        # Levels are always small, so xp_for_level gets its own input
+        levels = GameLogic.calculate_level_batch(xp)
+        levels_list = levels.tolist()
+
+        cases = [(name, scalar, batch, xp, xp_list) for name, scalar, batch in pairs]
+        cases.append(("xp_for_level", GameLogic.xp_for_level, GameLogic.xp_for_level_batch, levels, levels_list))
+
+        for name, scalar, batch, values, values_list in cases:
+            expected, scalar_seconds = _time(lambda: [scalar(value) for value in values_list])
+            actual, batch_seconds = _time(lambda: batch(values))
+            wrong = int(np.count_nonzero(actual != np.asarray(expected)))
+            mismatches += wrong
+            speedup = scalar_seconds / batch_seconds if batch_seconds else float("inf")
+            print(f"{name:<18}{size:>12,}{scalar_seconds:>12.3f}{batch_seconds:>12.4f}{speedup:>9.0f}x  "
+                  f"{'✓' if not wrong else f'✗ {wrong} differ'}")
+
+    if mismatches:
+        print(f"\n❌ {mismatches} results differ from the scalar functions")
+        sys.exit(1)
+    print("\n✅ Batch results identical to the scalar functions")
+
+
+if __name__ == "__main__":
+    main()
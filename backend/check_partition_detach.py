@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Check detaching a month of partitioned run history against a real Postgres
+Run this from the backend directory, against a scratch or staging database
+with the partitioning migration applied:
+
+    python check_partition_detach.py [--month 1999-01]
+
+Inside a transaction that is rolled back at the end (DDL included), the
+month's partitions are created, a throwaway user is given a run with a
+completion in it, and PartitionService.detach_month detaches both tables.
+It then checks that the partitions are detached, still hold their rows,
+and that the detached completions table no longer has a foreign key into
+daily_runs. The month must not already have partitions.
+"""
+
+import argparse
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _seed(db, month: date, end: date) -> None:
+    from sqlalchemy import text
+    from app.services.partition_service import PartitionService
+
+    # Runs first: the completions partition's foreign key references them
+    for table, _ in reversed(PartitionService.PARTITIONED_TABLES):
+        db.execute(text(
+            f'CREATE TABLE "{PartitionService.partition_name(table, month)}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    user_id, run_id = uuid.uuid4(), uuid.uuid4()
+    db.execute(text(
+        "INSERT INTO users (id, username, email, hashed_password, goal_categories) "
+        "VALUES (:id, :name, :email, 'x', '[]')"
+    ), {"id": user_id, "name": f"check_{user_id.hex[:12]}", "email": f"{user_id.hex}@check.local"})
+    db.execute(text(
+        "INSERT INTO daily_runs (id, user_id, date, total_xp, is_perfect, is_locked) "
+        "VALUES (:id, :user_id, :date, 10, false, true)"
+    ), {"id": run_id, "user_id": user_id, "date": month})
+    db.execute(text(
+        "INSERT INTO daily_quest_completions (id, daily_run_id, run_date, quest_id, completed, xp_earned) "
+        "SELECT gen_random_uuid(), :run_id, :date, id, true, 10 FROM quests LIMIT 1"
+    ), {"run_id": run_id, "date": month})
+
+
+def run(month: date) -> None:
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.services.partition_service import PartitionService
+
+    db = SessionLocal()
+    try:
+        partitions = PartitionService(db)
+        if not partitions.is_partitioned("daily_runs"):
+            raise RuntimeError("daily_runs is not partitioned; apply the migrations first")
+        if any(month in partitions.list_partitions(table) for table, _ in PartitionService.PARTITIONED_TABLES):
+            raise RuntimeError(f"{month:%Y-%m} already has partitions; pick another --month")
+
+        _seed(db, month, PartitionService.add_months(month, 1))
+        detached = partitions.detach_month(month)
+        print(f"  ✓ Detached {', '.join(detached)}")
+
+        for table, _ in PartitionService.PARTITIONED_TABLES:
+            name = PartitionService.partition_name(table, month)
+            assert name in detached, f"{name} was not detached"
+            assert month not in partitions.list_partitions(table), f"{name} is still attached"
+            rows = db.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+            assert rows > 0, f"{name} lost its rows"
+            print(f"  ✓ {name} kept {rows} row(s)")
+
+        foreign_keys = db.execute(text(
+            "SELECT count(*) FROM pg_constraint con "
+            "JOIN pg_class child ON child.oid = con.conrelid "
+            "JOIN pg_class referenced ON referenced.oid = con.confrelid "
+            "WHERE con.contype = 'f' AND child.relname = :name AND referenced.relname = 'daily_runs'"
+        ), {"name": PartitionService.partition_name("daily_quest_completions", month)}).scalar()
+        assert foreign_keys == 0, "the detached completions table still references daily_runs"
+        print("  ✓ Detached completions table has no foreign key into daily_runs")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check detaching partitioned run history")
+    parser.add_argument("--month", type=lambda value: date.fromisoformat(f"{value}-01"), default=date(1999, 1, 1))
+    args = parser.parse_args()
+
+    try:
+        print(f"🔍 Detaching {args.month:%Y-%m} (rolled back afterwards)")
+        run(args.month)
+        print("\n✅ Partition detach check passed")
+    except AssertionError as e:
+        print(f"\n❌ Check failed: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        print("\n💡 Make sure your DATABASE_URL in .env is correct")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Move daily run completions between the row and compact storage layouts
+Run this from the backend directory:
+
+    python compact_daily_runs.py compact [--before YYYY-MM-DD] [--batch-size N]
+    python compact_daily_runs.py materialize [--batch-size N]
+    python compact_daily_runs.py compare [--sample N]
+
+`compact` only touches locked runs, so completion ids of editable runs that
+clients may still hold never change. `materialize` is the way back (run it
+before downgrading the 4b7e2a91c3d5 migration). `compare` reports storage per
+quest slot and read latency for both layouts on the live database.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _convert(to_compact: bool, before: date = None, batch_size: int = 500):
+    from app.database import SessionLocal
+    from app import models
+    from app.services.run_storage_service import RunStorageService
+
+    db = SessionLocal()
+    converted = 0
+    try:
+        while True:
+            query = db.query(models.DailyRun)
+            if to_compact:
+                query = query.filter(
+                    models.DailyRun.is_locked == True,
+                    ~models.DailyRun.is_compact
+                )
+                if before:
+                    query = query.filter(models.DailyRun.date < before)
+            else:
+                query = query.filter(models.DailyRun.is_compact)
+
+            runs = query.order_by(models.DailyRun.date).limit(batch_size).all()
+            if not runs:
+                break
+
+            storage = RunStorageService(db)
+            for run in runs:
+                if to_compact:
+                    storage.compact_run(run)
+                else:
+                    storage.materialize_run(run)
+
+            db.commit()
+            db.expunge_all()
+            converted += len(runs)
+            print(f"  ✓ {converted} runs converted")
+    finally:
+        db.close()
+
+    return converted
+
+
+def compare(sample: int = 200):
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app import models
+    from app.services.run_storage_service import RunStorageService
+
+    db = SessionLocal()
+    try:
+        print("📊 Storage (bytes per quest slot, heap + indexes / TOAST)")
+
+        # pg_partition_tree covers every monthly partition (or just the table)
+        slots = db.execute(text("SELECT count(*) FROM daily_quest_completions")).scalar()
+        table_bytes = db.execute(text(
+            "SELECT coalesce(sum(pg_total_relation_size(relid)), 0) "
+            "FROM pg_partition_tree('daily_quest_completions')"
+        )).scalar()
+        if slots:
+            print(f"  row layout:     {table_bytes / slots:8.1f}  ({slots} rows, {table_bytes} bytes)")
+
+        # Size the row-layout runs would take as compact columns
+        est_bytes, est_slots = db.execute(text(
+            "SELECT coalesce(sum(pg_column_size(q) + pg_column_size(t) + pg_column_size(x) + (n + 7) / 8 + 4), 0), "
+            "       coalesce(sum(n), 0) "
+            "FROM (SELECT array_agg(quest_id) AS q, array_agg(completed_at) AS t, array_agg(xp_earned) AS x, "
+            "             count(*) AS n "
+            "      FROM daily_quest_completions GROUP BY daily_run_id) s"
+        )).one()
+        if est_slots:
+            print(f"  compact (est.): {est_bytes / est_slots:8.1f}  (same runs re-encoded)")
+
+        compact_bytes, compact_slots = db.execute(text(
+            "SELECT coalesce(sum(pg_column_size(quest_ids) + pg_column_size(completion_bits) "
+            "                    + pg_column_size(completion_times) + pg_column_size(completion_xp)), 0), "
+            "       coalesce(sum(cardinality(quest_ids)), 0) "
+            "FROM daily_runs WHERE quest_ids IS NOT NULL"
+        )).one()
+        if compact_slots:
+            print(f"  compact layout: {compact_bytes / compact_slots:8.1f}  ({compact_slots} slots)")
+
+        print(f"\n⏱  Read latency over {sample} row-layout runs (load run + decode)")
+
+        run_ids = [
+            run_id for (run_id,) in db.query(models.DailyRun.id).filter(
+                ~models.DailyRun.is_compact
+            ).order_by(models.DailyRun.date.desc()).limit(sample).all()
+        ]
+        if not run_ids:
+            print("  no row-layout runs to sample")
+            return
+
+        def timed_read() -> float:
+            db.expire_all()
+            started = time.perf_counter()
+            storage = RunStorageService(db)
+            for run_id in run_ids:
+                run = db.query(models.DailyRun).filter(models.DailyRun.id == run_id).one()
+                storage.get_completions(run)
+            return (time.perf_counter() - started) / len(run_ids) * 1000
+
+        row_ms = timed_read()
+
+        # Re-encode the same runs inside a transaction that is rolled back
+        storage = RunStorageService(db)
+        for run in db.query(models.DailyRun).filter(models.DailyRun.id.in_(run_ids)).all():
+            storage.compact_run(run)
+        db.flush()
+        compact_ms = timed_read()
+        db.rollback()
+
+        print(f"  row layout:     {row_ms:8.3f} ms/run")
+        print(f"  compact layout: {compact_ms:8.3f} ms/run")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert daily run completion storage")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = sub.add_parser("compact", help="Move locked runs into the compact columns")
+    compact_parser.add_argument("--before", type=date.fromisoformat, default=None)
+    compact_parser.add_argument("--batch-size", type=int, default=500)
+
+    materialize_parser = sub.add_parser("materialize", help="Write completion rows back for compact runs")
+    materialize_parser.add_argument("--batch-size", type=int, default=500)
+
+    compare_parser = sub.add_parser("compare", help="Storage and latency comparison")
+    compare_parser.add_argument("--sample", type=int, default=200)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "compact":
+            print("🗜  Compacting locked runs...")
+            total = _convert(True, before=args.before, batch_size=args.batch_size)
+            print(f"\n✅ {total} runs compacted")
+        elif args.command == "materialize":
+            print("📋 Materializing compact runs...")
+            total = _convert(False, batch_size=args.batch_size)
+            print(f"\n✅ {total} runs materialized")
+        else:
+            compare(sample=args.sample)
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        print("\n💡 Make sure your DATABASE_URL in .env is correct")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""add compact run storage
+
+Revision ID: 4b7e2a91c3d5
+Revises: d97461d28fe2
+Create Date: 2026-10-19 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2a91c3d5'
+down_revision: Union[str, Sequence[str], None] = 'd97461d28fe2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # All nullable: existing runs stay in the row-per-completion layout until
+    # compact_daily_runs.py migrates them
+    op.add_column('daily_runs', sa.Column('quest_ids', ARRAY(UUID(as_uuid=True)), nullable=True))
+    op.add_column('daily_runs', sa.Column('completion_bits', sa.LargeBinary(), nullable=True))
+    op.add_column('daily_runs', sa.Column('completion_times', ARRAY(sa.DateTime(timezone=True)), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Run `python compact_daily_runs.py materialize` first or compact runs lose their completions
+    op.drop_column('daily_runs', 'completion_times')
+    op.drop_column('daily_runs', 'completion_bits')
+    op.drop_column('daily_runs', 'quest_ids')
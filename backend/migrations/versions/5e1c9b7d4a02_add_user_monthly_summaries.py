@@ -0,0 +1,45 @@
+"""add user_monthly_summaries
+
+Revision ID: 5e1c9b7d4a02
+Revises: 8d3f6c0a2e14
+Create Date: 2026-10-19 13:05:52.617304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1c9b7d4a02'
+down_revision: Union[str, Sequence[str], None] = '8d3f6c0a2e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_monthly_summaries',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('total_runs', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('locked_runs', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_xp', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('locked_xp', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('perfect_days', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('category_counts', sa.JSON(), server_default='{}', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index('idx_monthly_summary_user_month', 'user_monthly_summaries', ['user_id', 'month'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Summarized months cannot be expanded back into daily runs
+    op.drop_index('idx_monthly_summary_user_month', table_name='user_monthly_summaries')
+    op.drop_table('user_monthly_summaries')
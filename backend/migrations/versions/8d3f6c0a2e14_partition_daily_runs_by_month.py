@@ -0,0 +1,148 @@
+"""partition daily_runs and daily_quest_completions by month
+
+Revision ID: 8d3f6c0a2e14
+Revises: 4b7e2a91c3d5
+Create Date: 2026-10-19 11:40:27.881042
+
+"""
+from typing import Sequence, Union
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f6c0a2e14'
+down_revision: Union[str, Sequence[str], None] = '4b7e2a91c3d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+
+RUN_COLUMNS = """
+    id UUID NOT NULL,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    total_xp INTEGER NOT NULL DEFAULT 0,
+    is_perfect BOOLEAN NOT NULL DEFAULT false,
+    is_locked BOOLEAN NOT NULL DEFAULT false,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    quest_ids UUID[],
+    completion_bits BYTEA,
+    completion_times TIMESTAMPTZ[]
+"""
+
+COMPLETION_COLUMNS = """
+    id UUID NOT NULL,
+    daily_run_id UUID NOT NULL,
+    run_date DATE NOT NULL,
+    quest_id UUID NOT NULL REFERENCES quests(id) ON DELETE CASCADE,
+    completed BOOLEAN NOT NULL DEFAULT false,
+    xp_earned INTEGER NOT NULL DEFAULT 0,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+"""
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(first_month: date) -> None:
+    last_month = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    month = first_month
+    while month <= last_month:
+        upper = _add_months(month, 1)
+        suffix = f"p{month.year:04d}_{month.month:02d}"
+        op.execute(
+            f"CREATE TABLE daily_runs_{suffix} PARTITION OF daily_runs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        op.execute(
+            f"CREATE TABLE daily_quest_completions_{suffix} PARTITION OF daily_quest_completions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Move the existing tables aside
+    op.execute("ALTER TABLE daily_quest_completions RENAME TO daily_quest_completions_unpartitioned")
+    op.execute("ALTER TABLE daily_runs RENAME TO daily_runs_unpartitioned")
+
+    # 2. Partitioned parents; completions carry the run date as their key
+    op.execute(f"CREATE TABLE daily_runs ({RUN_COLUMNS}) PARTITION BY RANGE (date)")
+    op.execute(f"CREATE TABLE daily_quest_completions ({COMPLETION_COLUMNS}) PARTITION BY RANGE (run_date)")
+
+    first_run = op.get_bind().execute(sa.text("SELECT min(date) FROM daily_runs_unpartitioned")).scalar()
+    _create_monthly_partitions((first_run or date.today()).replace(day=1))
+    op.execute("CREATE TABLE daily_runs_default PARTITION OF daily_runs DEFAULT")
+    op.execute("CREATE TABLE daily_quest_completions_default PARTITION OF daily_quest_completions DEFAULT")
+
+    # 3. Copy the data
+    op.execute("""
+        INSERT INTO daily_runs (id, user_id, date, total_xp, is_perfect, is_locked, completed_at,
+                                created_at, quest_ids, completion_bits, completion_times)
+        SELECT id, user_id, date, total_xp, is_perfect, is_locked, completed_at,
+               created_at, quest_ids, completion_bits, completion_times
+        FROM daily_runs_unpartitioned
+    """)
+    op.execute("""
+        INSERT INTO daily_quest_completions (id, daily_run_id, run_date, quest_id, completed,
+                                             xp_earned, completed_at, created_at)
+        SELECT c.id, c.daily_run_id, r.date, c.quest_id, c.completed,
+               c.xp_earned, c.completed_at, c.created_at
+        FROM daily_quest_completions_unpartitioned c
+        JOIN daily_runs_unpartitioned r ON r.id = c.daily_run_id
+    """)
+
+    op.execute("DROP TABLE daily_quest_completions_unpartitioned")
+    op.execute("DROP TABLE daily_runs_unpartitioned")
+
+    # 4. Keys and indexes (created on the parents, inherited by every partition)
+    op.execute("ALTER TABLE daily_runs ADD PRIMARY KEY (id, date)")
+    op.execute("ALTER TABLE daily_quest_completions ADD PRIMARY KEY (id, run_date)")
+    op.execute("""
+        ALTER TABLE daily_quest_completions
+        ADD FOREIGN KEY (daily_run_id, run_date) REFERENCES daily_runs (id, date) ON DELETE CASCADE
+    """)
+    op.create_index('idx_daily_run_user_date', 'daily_runs', ['user_id', 'date'], unique=True)
+    op.create_index('idx_daily_run_date', 'daily_runs', ['date'])
+    op.create_index(
+        'idx_completion_run_quest', 'daily_quest_completions',
+        ['daily_run_id', 'quest_id', 'run_date'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE daily_quest_completions RENAME TO daily_quest_completions_partitioned")
+    op.execute("ALTER TABLE daily_runs RENAME TO daily_runs_partitioned")
+    op.execute("ALTER INDEX idx_daily_run_user_date RENAME TO idx_daily_run_user_date_partitioned")
+    op.execute("ALTER INDEX idx_daily_run_date RENAME TO idx_daily_run_date_partitioned")
+    op.execute("ALTER INDEX idx_completion_run_quest RENAME TO idx_completion_run_quest_partitioned")
+    op.execute("ALTER INDEX daily_runs_pkey RENAME TO daily_runs_partitioned_pkey")
+    op.execute("ALTER INDEX daily_quest_completions_pkey RENAME TO daily_quest_completions_partitioned_pkey")
+
+    op.execute(f"CREATE TABLE daily_runs ({RUN_COLUMNS}, PRIMARY KEY (id))")
+    op.execute(f"""
+        CREATE TABLE daily_quest_completions ({COMPLETION_COLUMNS}, PRIMARY KEY (id),
+            FOREIGN KEY (daily_run_id) REFERENCES daily_runs (id) ON DELETE CASCADE)
+    """)
+
+    op.execute("INSERT INTO daily_runs SELECT * FROM daily_runs_partitioned")
+    op.execute("INSERT INTO daily_quest_completions SELECT * FROM daily_quest_completions_partitioned")
+    op.execute("ALTER TABLE daily_quest_completions DROP COLUMN run_date")
+
+    # Dropping the parents drops every attached partition
+    op.execute("DROP TABLE daily_quest_completions_partitioned")
+    op.execute("DROP TABLE daily_runs_partitioned")
+
+    op.create_index('idx_daily_run_user_date', 'daily_runs', ['user_id', 'date'], unique=True)
+    op.create_index('idx_daily_run_date', 'daily_runs', ['date'])
+    op.create_index('idx_completion_run_quest', 'daily_quest_completions', ['daily_run_id', 'quest_id'], unique=True)
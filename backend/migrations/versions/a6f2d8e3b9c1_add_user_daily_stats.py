@@ -0,0 +1,77 @@
+"""add user_daily_stats rollup
+
+Revision ID: a6f2d8e3b9c1
+Revises: 5e1c9b7d4a02
+Create Date: 2026-10-19 14:22:08.310957
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f2d8e3b9c1'
+down_revision: Union[str, Sequence[str], None] = '5e1c9b7d4a02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_daily_stats',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('total_xp', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('is_perfect', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('is_locked', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('category_counts', sa.JSON(), server_default='{}', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index(
+        'idx_user_daily_stats_user_date', 'user_daily_stats', ['user_id', 'date'], unique=True,
+        postgresql_include=['total_xp', 'is_perfect', 'is_locked']
+    )
+
+    # Backfill from the existing runs (same query as DailyStatsService.rebuild)
+    op.execute("""
+        WITH slots AS (
+            SELECT r.user_id, r.date, c.quest_id, c.completed
+            FROM daily_runs r
+            JOIN daily_quest_completions c ON c.daily_run_id = r.id AND c.run_date = r.date
+            UNION ALL
+            SELECT r.user_id, r.date, s.quest_id, get_bit(r.completion_bits, (s.ord - 1)::int) = 1
+            FROM daily_runs r
+            CROSS JOIN LATERAL unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+            WHERE r.quest_ids IS NOT NULL
+        ),
+        per_category AS (
+            SELECT slots.user_id, slots.date, q.category,
+                   count(*) AS total,
+                   count(*) FILTER (WHERE slots.completed) AS completed
+            FROM slots JOIN quests q ON q.id = slots.quest_id
+            GROUP BY slots.user_id, slots.date, q.category
+        ),
+        categories AS (
+            SELECT user_id, date,
+                   jsonb_object_agg(category, jsonb_build_object('total', total, 'completed', completed)) AS counts
+            FROM per_category
+            GROUP BY user_id, date
+        )
+        INSERT INTO user_daily_stats (user_id, date, total_xp, is_perfect, is_locked, category_counts)
+        SELECT r.user_id, r.date, r.total_xp, r.is_perfect, r.is_locked,
+               coalesce(categories.counts, '{}'::jsonb)::json
+        FROM daily_runs r
+        LEFT JOIN categories ON categories.user_id = r.user_id AND categories.date = r.date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_daily_stats_user_date', table_name='user_daily_stats')
+    op.drop_table('user_daily_stats')
@@ -0,0 +1,49 @@
+"""add persisted background job runs
+
+Revision ID: a9f3c1e7b5d2
+Revises: d2c6a8e4f0b7
+Create Date: 2026-10-19 18:20:44.730192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f3c1e7b5d2'
+down_revision: Union[str, Sequence[str], None] = 'd2c6a8e4f0b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_runs',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('job_name', sa.String(50), nullable=False),
+        sa.Column('trigger', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), server_default='pending', nullable=False),
+        sa.Column('scheduled_for', sa.DateTime(), nullable=True),
+        sa.Column('progress_done', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('progress_total', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_job_run_name_created', 'job_runs', ['job_name', 'created_at'])
+    op.create_index('idx_job_run_slot', 'job_runs', ['job_name', 'scheduled_for'], unique=True,
+                    postgresql_where=sa.text('scheduled_for IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_job_run_slot', table_name='job_runs')
+    op.drop_index('idx_job_run_name_created', table_name='job_runs')
+    op.drop_table('job_runs')
@@ -0,0 +1,28 @@
+"""add timezone to users for staggered decay
+
+Revision ID: b3f7d1a9c2e6
+Revises: e8b2d4f6a1c9
+Create Date: 2026-10-19 21:03:18.274615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f7d1a9c2e6'
+down_revision: Union[str, Sequence[str], None] = 'e8b2d4f6a1c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('timezone', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'timezone')
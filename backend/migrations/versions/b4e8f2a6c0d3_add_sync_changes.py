@@ -0,0 +1,59 @@
+"""add per-user sync versions and change feed
+
+Revision ID: b4e8f2a6c0d3
+Revises: f1d9a3c7e5b2
+Create Date: 2026-10-19 17:24:51.316870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f2a6c0d3'
+down_revision: Union[str, Sequence[str], None] = 'f1d9a3c7e5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('sync_version', sa.BigInteger(), server_default='0', nullable=False))
+
+    op.create_table('sync_changes',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('entity_type', sa.String(30), nullable=False),
+        sa.Column('entity_id', UUID(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index('idx_sync_change_entity', 'sync_changes', ['user_id', 'entity_type', 'entity_id'], unique=True)
+    op.create_index('idx_sync_change_version', 'sync_changes', ['user_id', 'version'])
+
+    # Everything that exists today is version 1, so a full sync (since=0) returns it
+    op.execute("""
+        INSERT INTO sync_changes (user_id, entity_type, entity_id, version)
+        SELECT user_id, 'run', id, 1 FROM daily_runs
+        UNION ALL
+        SELECT user_id, 'goal', id, 1 FROM goals
+        UNION ALL
+        SELECT user_id, 'streak', id, 1 FROM streaks
+        UNION ALL
+        SELECT user_id, 'challenge_completion', id, 1 FROM weekly_challenge_completions
+    """)
+    op.execute("UPDATE users SET sync_version = 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_sync_change_version', table_name='sync_changes')
+    op.drop_index('idx_sync_change_entity', table_name='sync_changes')
+    op.drop_table('sync_changes')
+    op.drop_column('users', 'sync_version')
@@ -0,0 +1,40 @@
+"""add covering indexes for the category breakdown
+
+Revision ID: c3b8e1f5d7a4
+Revises: a6f2d8e3b9c1
+Create Date: 2026-10-19 15:03:44.120583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b8e1f5d7a4'
+down_revision: Union[str, Sequence[str], None] = 'a6f2d8e3b9c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Runs: (user_id, date) range scan that also yields the join key
+    op.drop_index('idx_daily_run_user_date', table_name='daily_runs')
+    op.create_index(
+        'idx_daily_run_user_date', 'daily_runs', ['user_id', 'date'], unique=True,
+        postgresql_include=['id']
+    )
+    # Completions: join on (daily_run_id, run_date), read quest_id/completed from the index
+    op.create_index(
+        'idx_completion_run_covering', 'daily_quest_completions', ['daily_run_id', 'run_date'],
+        postgresql_include=['quest_id', 'completed']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_completion_run_covering', table_name='daily_quest_completions')
+    op.drop_index('idx_daily_run_user_date', table_name='daily_runs')
+    op.create_index('idx_daily_run_user_date', 'daily_runs', ['user_id', 'date'], unique=True)
@@ -0,0 +1,29 @@
+"""add partial index for the nightly streak reset
+
+Revision ID: c5e1a7d3f9b4
+Revises: a9f3c1e7b5d2
+Create Date: 2026-10-19 18:41:19.204857
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1a7d3f9b4'
+down_revision: Union[str, Sequence[str], None] = 'a9f3c1e7b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_streak_live', 'streaks', ['last_completed_date'],
+                    postgresql_where=sa.text('current_streak > 0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_streak_live', table_name='streaks')
@@ -0,0 +1,45 @@
+"""add transactional outbox for domain events
+
+Revision ID: d2c6a8e4f0b7
+Revises: b4e8f2a6c0d3
+Create Date: 2026-10-19 17:52:06.118524
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2c6a8e4f0b7'
+down_revision: Union[str, Sequence[str], None] = 'b4e8f2a6c0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_events',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('event_type', sa.String(50), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index('idx_outbox_pending', 'outbox_events', ['available_at'], postgresql_where=sa.text('processed_at IS NULL'))
+    op.create_index('idx_outbox_processed', 'outbox_events', ['processed_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_outbox_processed', table_name='outbox_events')
+    op.drop_index('idx_outbox_pending', table_name='outbox_events')
+    op.drop_table('outbox_events')
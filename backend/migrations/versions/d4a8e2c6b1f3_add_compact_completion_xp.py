@@ -0,0 +1,44 @@
+"""add per-slot XP to compact runs
+
+Revision ID: d4a8e2c6b1f3
+Revises: b3f7d1a9c2e6
+Create Date: 2026-10-19 22:41:09.318264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8e2c6b1f3'
+down_revision: Union[str, Sequence[str], None] = 'b3f7d1a9c2e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('daily_runs', sa.Column('completion_xp', ARRAY(sa.Integer()), nullable=True))
+
+    # Freeze what existing compact runs showed until now: each completed
+    # slot's quest XP as of this upgrade
+    op.execute("""
+        UPDATE daily_runs r
+        SET completion_xp = coalesce((
+            SELECT array_agg(
+                       CASE WHEN get_bit(r.completion_bits, (s.ord - 1)::int) = 1
+                            THEN coalesce(q.base_xp, 0) ELSE 0 END
+                       ORDER BY s.ord)
+            FROM unnest(r.quest_ids) WITH ORDINALITY AS s(quest_id, ord)
+            LEFT JOIN quests q ON q.id = s.quest_id
+        ), '{}')
+        WHERE r.quest_ids IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('daily_runs', 'completion_xp')
@@ -0,0 +1,30 @@
+"""add users indexes for the leaderboard
+
+Revision ID: e7a4c2b6f8d1
+Revises: c3b8e1f5d7a4
+Create Date: 2026-10-19 16:11:37.442019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4c2b6f8d1'
+down_revision: Union[str, Sequence[str], None] = 'c3b8e1f5d7a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_user_total_xp', 'users', ['total_xp'])
+    op.create_index('idx_user_updated_at', 'users', ['updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_updated_at', table_name='users')
+    op.drop_index('idx_user_total_xp', table_name='users')
@@ -0,0 +1,30 @@
+"""add end_date to xp_decay_history for compacted ranges
+
+Revision ID: e8b2d4f6a1c9
+Revises: c5e1a7d3f9b4
+Create Date: 2026-10-19 20:12:47.531904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2d4f6a1c9'
+down_revision: Union[str, Sequence[str], None] = 'c5e1a7d3f9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('xp_decay_history', sa.Column('end_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Ranges cannot be split back into days: they stay as one row dated at
+    # their first day, so total XP lost is unchanged
+    op.drop_column('xp_decay_history', 'end_date')
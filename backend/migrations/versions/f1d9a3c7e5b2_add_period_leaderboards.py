@@ -0,0 +1,75 @@
+"""add weekly/monthly leaderboard aggregates and snapshots
+
+Revision ID: f1d9a3c7e5b2
+Revises: e7a4c2b6f8d1
+Create Date: 2026-10-19 16:58:12.904316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1d9a3c7e5b2'
+down_revision: Union[str, Sequence[str], None] = 'e7a4c2b6f8d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_period_xp',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('period_type', sa.String(10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('xp', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index('idx_period_xp_user', 'user_period_xp', ['period_type', 'period_start', 'user_id'], unique=True)
+    op.create_index('idx_period_xp_ranking', 'user_period_xp', ['period_type', 'period_start', 'xp'])
+
+    op.create_table('leaderboard_snapshots',
+        sa.Column('id', UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('period_type', sa.String(10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('user_id', UUID(), nullable=False),
+        sa.Column('username', sa.String(50), nullable=False),
+        sa.Column('xp', sa.Integer(), nullable=False),
+        sa.Column('frozen_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE')
+    )
+    op.create_index('idx_snapshot_period_rank', 'leaderboard_snapshots', ['period_type', 'period_start', 'rank'], unique=True)
+    op.create_index('idx_snapshot_period_user', 'leaderboard_snapshots', ['period_type', 'period_start', 'user_id'], unique=True)
+
+    # Backfill from locked runs and completed weekly challenges
+    # (date_trunc('week') starts weeks on Monday, like the service)
+    for period_type in ('week', 'month'):
+        op.execute(f"""
+            INSERT INTO user_period_xp (user_id, period_type, period_start, xp)
+            SELECT user_id, '{period_type}', date_trunc('{period_type}', day)::date, sum(xp)
+            FROM (
+                SELECT user_id, date AS day, total_xp AS xp FROM daily_runs WHERE is_locked
+                UNION ALL
+                SELECT user_id, completed_at::date, xp_earned FROM weekly_challenge_completions
+                WHERE is_completed AND completed_at IS NOT NULL
+            ) awards
+            GROUP BY user_id, date_trunc('{period_type}', day)
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_snapshot_period_user', table_name='leaderboard_snapshots')
+    op.drop_index('idx_snapshot_period_rank', table_name='leaderboard_snapshots')
+    op.drop_table('leaderboard_snapshots')
+    op.drop_index('idx_period_xp_ranking', table_name='user_period_xp')
+    op.drop_index('idx_period_xp_user', table_name='user_period_xp')
+    op.drop_table('user_period_xp')
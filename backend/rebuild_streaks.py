@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Recompute streaks from completion history
+Run this from the backend directory:
+
+    python rebuild_streaks.py [--user-id UUID] [--chunk-size N] [--workers N]
+
+Use after a bug or a manual data fix left streak rows wrong. Without
+--user-id every user is rebuilt, in chunks processed in parallel; only
+rows that differ from the history are written. The same rebuild runs as
+the `streak_rebuild` job (POST /jobs/streak_rebuild/run).
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild streaks from completion history")
+    parser.add_argument("--user-id", type=uuid.UUID, help="Rebuild a single user")
+    parser.add_argument("--chunk-size", type=int, help="Users per transaction (default STREAK_REBUILD_CHUNK_SIZE)")
+    parser.add_argument("--workers", type=int, help="Chunks in parallel (default STREAK_REBUILD_WORKERS)")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.services.streak_rebuild_service import StreakRebuildService
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        service = StreakRebuildService(db)
+        if args.user_id:
+            print(f"🔥 Rebuilding streaks for user {args.user_id}...")
+            stats = service.rebuild_user(args.user_id)
+        else:
+            print("🔥 Rebuilding streaks for all users...")
+            stats = service.rebuild_all(
+                chunk_size=args.chunk_size,
+                workers=args.workers,
+                progress=lambda done, total: print(f"  ✓ {done}/{total} users")
+            )
+    finally:
+        db.close()
+
+    print(f"\n✅ Checked {stats['streaks_checked']} streaks of {stats['users']} users, "
+          f"updated {stats['streaks_updated']} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
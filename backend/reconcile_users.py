@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Check every user's XP, level and streaks against their source rows
+Run this from the backend directory:
+
+    python reconcile_users.py [--apply] [--no-streaks] [--report DIR] [--workers N] [--batch-size N]
+
+Without --apply nothing is written; every mismatch goes to the report as a
+JSON line (kind "xp" or "streak", stored vs expected values), one file per
+user id range under DIR/<date>/. With --apply
+the fixes are written in bulk; a user whose XP changed while the check ran
+is skipped and picked up by the next run. The nightly `reconciliation` job
+runs the same check (RECONCILE_APPLY decides whether it writes).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile user XP, levels and streaks")
+    parser.add_argument("--apply", action="store_true", help="Write the fixes (default: report only)")
+    parser.add_argument("--no-streaks", action="store_true", help="Check XP and levels only")
+    parser.add_argument("--report", type=Path, help="Write every mismatch under this directory (JSON lines)")
+    parser.add_argument("--workers", type=int, help="Processes (default RECONCILE_WORKERS)")
+    parser.add_argument("--batch-size", type=int, help="Users per batch (default RECONCILE_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.services.reconciliation_service import ReconciliationService
+
+    mode = "Reconciling" if args.apply else "Checking"
+    print(f"🔍 {mode} user XP, levels{'' if args.no_streaks else ' and streaks'}...")
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        stats = ReconciliationService(db).reconcile(
+            apply=args.apply,
+            streaks=not args.no_streaks,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            report_dir=args.report,
+            progress=lambda done, total: print(f"  ✓ {done}/{total} users")
+        )
+    finally:
+        db.close()
+
+    print(f"\n✅ {stats['users']} users in {time.perf_counter() - started:.1f}s")
+    print(f"   XP/level mismatches: {stats['xp_mismatches']} (fixed {stats['xp_fixed']})")
+    print(f"   Streak mismatches:   {stats['streak_mismatches']} (fixed {stats['streaks_fixed']})")
+    if stats["reports"]:
+        print(f"   Report: {len(stats['reports'])} files in {Path(stats['reports'][0]).parent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Drain the transactional outbox in a dedicated process
+Run this from the backend directory:
+
+    python run_outbox_worker.py [--once]
+
+Applies the side effects of QuestToggled, RunLocked, MilestoneToggled and
+ChallengeCompleted events (rollups, streaks, XP totals, leaderboards,
+weekly unlocks, notifications). Any number of workers can run next to the
+API's own (OUTBOX_WORKER_ENABLED); set that to false to keep the work out
+of the API processes entirely.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process outbox events")
+    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    args = parser.parse_args()
+
+    from app.config import settings
+    from app.services.outbox_service import outbox_worker
+
+    if args.once:
+        stats = outbox_worker.run_once()
+        print(f"✓ Claimed {stats['claimed']}, processed {stats['processed']}, failed {stats['failed']}")
+        return
+
+    print(f"📬 Processing outbox events every {settings.OUTBOX_POLL_SECONDS}s (Ctrl+C to stop)...")
+    try:
+        outbox_worker.run_forever()
+    except KeyboardInterrupt:
+        print("\n✅ Outbox worker stopped")
+
+
+if __name__ == "__main__":
+    main()
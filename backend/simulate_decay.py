@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+What-if analysis of XP decay policies across all users
+Run this from the backend directory:
+
+    python simulate_decay.py [--policy RATE:GRACE_DAYS ...] [--days 7 30 90] [--json]
+
+The current policy (XPDecayService.DECAY_RATE / GRACE_PERIOD_DAYS) is always
+simulated first, so candidates can be compared against it, e.g.
+
+    python simulate_decay.py --policy 0.02:3 --policy 0.05:7 --days 7 30
+
+Every user is assumed to stay inactive for the whole horizon, so the numbers
+are the most each policy can take. The same analysis is available as
+POST /api/v1/decay/simulate.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def _policy(spec: str):
+    from app.services.decay_simulation_service import DecayPolicy
+
+    rate, _, grace = spec.partition(":")
+    try:
+        return DecayPolicy(float(rate), int(grace or 0))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected RATE:GRACE_DAYS, got {spec!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate XP decay policies")
+    parser.add_argument("--policy", type=_policy, action="append", default=[],
+                        help="Candidate policy as RATE:GRACE_DAYS (repeatable)")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90], help="Horizons in days")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.services.decay_simulation_service import DecayPolicy, DecaySimulationService
+
+    policies = [DecayPolicy.current()] + [p for p in args.policy if p != DecayPolicy.current()]
+
+    db = SessionLocal()
+    try:
+        result = DecaySimulationService(db).run(policies, args.days)
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"📉 {result['users']:,} users as of {result['as_of']} (loaded in {result['load_seconds']}s)")
+    for policy in result["policies"]:
+        label = " (current)" if policy["is_current"] else ""
+        print(f"\n{policy['decay_rate']:.2%}/day after {policy['grace_period_days']} grace days{label} "
+              f"- simulated in {policy['seconds']}s")
+        for days, summary in policy["horizons"].items():
+            lost = summary["xp_lost"]
+            print(f"  {days:>4} days: {summary['users_affected']:,} users lose {summary['xp_lost_total']:,} XP "
+                  f"(median {lost.get('p50', 0):,.0f}, p99 {lost.get('p99', 0):,.0f}); "
+                  f"{summary['users_dropping_levels']:,} drop a level")
+            print(f"             levels dropped: " + ", ".join(
+                f"{bucket}: {count:,}" for bucket, count in summary["levels_dropped"].items()
+            ))
+
+
+if __name__ == "__main__":
+    main()